@@ -152,6 +152,44 @@ WHITENOISE_USE_FINDERS = True
 WHITENOISE_AUTOREFRESH = DEBUG  # Auto-refresh in development
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache jest lokalny dla procesu - przy wielu procesach (gunicorn,
+# run_workers) użyj wspólnego backendu, np.
+# 'django.core.cache.backends.filebased.FileBasedCache' z LOCATION katalogu.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'barfik',
+    }
+}
+
+# Cache odpowiedzi API per użytkownik (barfik_system.caching) - działa tylko
+# ze wspólnym backendem cache; przy LocMemCache pozostaje wyłączony
+BARFIK_RESPONSE_CACHE_ENABLED = False
+BARFIK_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Kolejka zadań w tle (barfik_system.jobs): zadanie RUNNING dłużej niż dzierżawa
+# jest przejmowane przez inny worker, po limicie prób oznaczane jako FAILED
+BARFIK_JOB_LEASE_SECONDS = 15 * 60
+BARFIK_JOB_MAX_ATTEMPTS = 3
+
+# Snapshot słowników procesu (barfik_system.dictionaries): przy odczytach znacznik
+# wersji w bazie sprawdzany najwyżej raz na tyle sekund (zapisy sprawdzają go zawsze)
+BARFIK_DICTIONARY_CHECK_SECONDS = 30
+
+# Okno nakładania synchronizacji delta list zakupów (services.get_shopping_list_changes):
+# rekordy z updated_at do tylu sekund przed since są wysyłane ponownie
+BARFIK_SYNC_OVERLAP_SECONDS = 60
+
+# Listy zwierząt, diet i list zakupów serializowane z values() (views.FastListMixin)
+BARFIK_FAST_LIST_ENABLED = True
+
+# Renderer i parser JSON na orjson (barfik_system.renderers) - wynik identyczny
+# ze standardowymi klasami DRF; False przywraca JSONRenderer i JSONParser
+BARFIK_ORJSON_ENABLED = True
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -173,10 +211,12 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'barfik_system.renderers.ORJSONRenderer' if BARFIK_ORJSON_ENABLED
+        else 'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'barfik_system.renderers.ORJSONParser' if BARFIK_ORJSON_ENABLED
+        else 'rest_framework.parsers.JSONParser',
     ],
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
     'NON_FIELD_ERRORS_KEY': 'non_field_errors',
@@ -254,6 +294,7 @@ SPECTACULAR_SETTINGS = {
         {'name': 'ingredients', 'description': 'Składniki diet'},
         {'name': 'collaborations', 'description': 'Współpraca i udostępnianie zwierząt'},
         {'name': 'shopping-lists', 'description': 'Listy zakupów'},
+        {'name': 'jobs', 'description': 'Zadania w tle (asynchroniczne generowanie list)'},
     ],
 }
 
@@ -51,6 +51,9 @@ router.register(r'shopping-lists', views.ShoppingListViewSet, basename='shopping
 # Dashboard
 router.register(r'dashboard', views.DashboardViewSet, basename='dashboard')
 
+# Background jobs
+router.register(r'jobs', views.JobViewSet, basename='job')
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
@@ -98,7 +101,9 @@ urlpatterns = [
         'api/diets/<int:diet_id>/ingredients/',
         views.IngredientViewSet.as_view({
             'get': 'list',
-            'post': 'create'
+            'post': 'create',
+            'put': 'bulk_replace',
+            'patch': 'bulk_upsert'
         }),
         name='diet-ingredients-list'
     ),
@@ -117,7 +122,8 @@ urlpatterns = [
     path(
         'api/shopping-lists/<int:shopping_list_id>/items/',
         views.ShoppingListItemViewSet.as_view({
-            'get': 'list'
+            'get': 'list',
+            'patch': 'bulk_check'
         }),
         name='shoppinglist-items-list'
     ),
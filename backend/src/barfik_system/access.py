@@ -0,0 +1,79 @@
+"""Mapa dostępu użytkownika do zwierząt rozwiązywana raz na żądanie."""
+from typing import Dict, Iterable, List, Optional, Tuple
+from .models import AnimalAccess
+
+# Atrybut żądania, w którym przechowywana jest mapa
+REQUEST_ATTRIBUTE = '_barfik_access_map'
+
+
+class AccessMap:
+    """
+    Poziomy dostępu użytkownika do zwierząt: {animal_id: OWNER|EDIT|READ_ONLY}.
+
+    Obejmuje również zwierzęta usunięte (soft delete) - tak jak filtry
+    dostępu widoków; is_active zwierzęcia sprawdza się przez is_active().
+    """
+
+    def __init__(self, user_id: int, rows: Iterable[Tuple[int, str, bool]]):
+        self.user_id = user_id
+        self._levels: Dict[int, str] = {}
+        self._active_ids = set()
+        for animal_id, level, is_active in rows:
+            self._levels[animal_id] = level
+            if is_active:
+                self._active_ids.add(animal_id)
+
+    def __contains__(self, animal_id) -> bool:
+        return animal_id in self._levels
+
+    def level(self, animal_id: int) -> Optional[str]:
+        """Poziom dostępu do zwierzęcia lub None."""
+        return self._levels.get(animal_id)
+
+    def is_active(self, animal_id: int) -> bool:
+        """Czy zwierzę jest aktywne (nie usunięte)."""
+        return animal_id in self._active_ids
+
+    @property
+    def animal_ids(self) -> List[int]:
+        """ID wszystkich dostępnych zwierząt (posortowane)."""
+        return sorted(self._levels)
+
+
+def load_access_map(user) -> AccessMap:
+    """
+    Wczytaj mapę dostępu użytkownika jednym zapytaniem.
+
+    Źródłem jest projekcja AnimalAccess (unikalny indeks (user, animal))
+    złączona z Animal dla statusu is_active.
+
+    Args:
+        user: Obiekt użytkownika
+
+    Returns:
+        AccessMap: Zwierzęta własne i z aktywną współpracą
+    """
+    return AccessMap(
+        user.id,
+        AnimalAccess.objects.filter(user=user).values_list('animal_id', 'level', 'animal__is_active')
+    )
+
+
+def get_access_map(request) -> AccessMap:
+    """
+    Zwróć mapę dostępu zalogowanego użytkownika, wczytaną raz na żądanie.
+
+    Mapa jest przechowywana na obiekcie żądania i współdzielona przez klasy
+    uprawnień, widoki i serwisy obsługujące to żądanie.
+    """
+    access_map = getattr(request, REQUEST_ATTRIBUTE, None)
+    if not isinstance(access_map, AccessMap) or access_map.user_id != request.user.id:
+        access_map = load_access_map(request.user)
+        setattr(request, REQUEST_ATTRIBUTE, access_map)
+    return access_map
+
+
+def clear_access_map(request) -> None:
+    """Usuń mapę z żądania (po zmianie dostępu w trakcie żądania)."""
+    if hasattr(request, REQUEST_ATTRIBUTE):
+        delattr(request, REQUEST_ATTRIBUTE)
@@ -7,8 +7,10 @@ from .models import (
     Diet,
     Ingredient,
     Collaboration,
+    AnimalAccess,
     ShoppingList,
     ShoppingListItem,
+    Job,
 )
 
 
@@ -22,9 +24,9 @@ class AnimalTypeAdmin(admin.ModelAdmin):
 
 @admin.register(Unit)
 class UnitAdmin(admin.ModelAdmin):
-    list_display = ('name', 'symbol', 'conversion_factor')
+    list_display = ('name', 'symbol', 'dimension', 'conversion_factor')
     search_fields = ('name', 'symbol')
-    list_filter = ('symbol',)
+    list_filter = ('dimension', 'symbol')
     ordering = ('name',)
 
 
@@ -143,6 +145,21 @@ class CollaborationAdmin(admin.ModelAdmin):
         return Collaboration.all_objects.all()
 
 
+@admin.register(AnimalAccess)
+class AnimalAccessAdmin(admin.ModelAdmin):
+    """Projekcja dostępu - tylko podgląd (odbudowa: rebuild_animal_access)."""
+    list_display = ('animal', 'user', 'level')
+    list_filter = ('level',)
+    search_fields = ('animal__name', 'user__username', 'user__email')
+    raw_id_fields = ('animal', 'user')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(ShoppingList)
 class ShoppingListAdmin(admin.ModelAdmin):
     list_display = ('title', 'created_by', 'is_completed', 'is_active', 'created_at')
@@ -195,3 +212,13 @@ class ShoppingListItemAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Użyj all_objects aby pokazać również usunięte (soft delete)."""
         return ShoppingListItem.all_objects.all()
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'created_by', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind', 'created_at')
+    search_fields = ('kind', 'created_by__username', 'created_by__email')
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
+    raw_id_fields = ('created_by',)
+    ordering = ('-created_at',)
@@ -6,5 +6,6 @@ class BarfikSystemConfig(AppConfig):
     name = 'barfik_system'
     
     def ready(self):
-        """Importuj signals gdy aplikacja jest gotowa."""
+        """Importuj signals i kontrole konfiguracji gdy aplikacja jest gotowa."""
+        import barfik_system.checks  # noqa: F401
         import barfik_system.signals  # noqa: F401
@@ -0,0 +1,245 @@
+"""
+Cache odpowiedzi API wersjonowany licznikiem generacji użytkownika.
+
+Każdy użytkownik ma w cache znacznik generacji. Odpowiedzi są zapisywane
+pod kluczem zawierającym ten znacznik, a każda zmiana danych dostępnych dla
+użytkownika (sygnały w signals.py, operacje zbiorcze w services.py) ustawia
+nowy znacznik - stare wpisy przestają być osiągalne. Unieważnianie jest
+dokładne; timeout służy tylko do zwalniania pamięci. Przy wyłączonym cache
+funkcje unieważniające nie wykonują zapytań ani zapisów do cache.
+
+Zmiana słownika (jednostki, kategorie, gatunki) dotyczy odpowiedzi
+wszystkich użytkowników - zmienia znacznik globalny, który jest częścią
+generacji każdego użytkownika.
+
+Wartości liczone per obiekt (np. skład diety) są cache'owane przez
+cached_many pod kluczem zawierającym wersję obiektu i znacznik globalny.
+
+Wymaga backendu cache współdzielonego przez procesy (FileBasedCache,
+DatabaseCache, Redis, Memcached): znacznik zmieniony w jednym procesie
+musi być widoczny w pozostałych (workery uvicorn, run_workers). Przy
+backendzie lokalnym dla procesu (LocMemCache, DummyCache) cache jest
+wyłączony niezależnie od BARFIK_RESPONSE_CACHE_ENABLED.
+"""
+import hashlib
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Set
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+from .models import AnimalAccess, Diet, ShoppingList
+
+GENERATION_KEY = 'barfik:gen:{user_id}'
+GLOBAL_GENERATION_KEY = 'barfik:gen:global'
+RESPONSE_KEY = 'barfik:resp:{user_id}:{generation}:{scope}:{digest}'
+DIET_COMPOSITION_KEY = 'barfik:composition:{diet_id}:{version}:{generation}'
+LOCAL_CACHE_BACKENDS = (LocMemCache, DummyCache)
+
+
+def _cache():
+    return caches[getattr(settings, 'BARFIK_RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def is_shared_backend() -> bool:
+    """Czy backend cache (BARFIK_RESPONSE_CACHE_ALIAS) jest wspólny dla procesów."""
+    return not isinstance(_cache(), LOCAL_CACHE_BACKENDS)
+
+
+def is_enabled() -> bool:
+    """
+    Czy cache odpowiedzi jest włączony.
+
+    Wymaga BARFIK_RESPONSE_CACHE_ENABLED oraz backendu współdzielonego przez
+    procesy - przy LocMemCache unieważnienie w jednym procesie nie dotarłoby
+    do pozostałych.
+    """
+    return getattr(settings, 'BARFIK_RESPONSE_CACHE_ENABLED', False) and is_shared_backend()
+
+
+def _get_generations(keys: List[str]) -> Dict[str, str]:
+    """Odczytaj znaczniki spod kluczy, tworząc brakujące."""
+    generations = _cache().get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in generations}
+    if missing:
+        _cache().set_many(missing, timeout=None)
+        generations.update(missing)
+    return generations
+
+
+def get_global_generation() -> str:
+    """Zwróć bieżący znacznik globalny (zmieniany przy zmianie słowników)."""
+    return _get_generations([GLOBAL_GENERATION_KEY])[GLOBAL_GENERATION_KEY]
+
+
+def get_user_generation(user_id: int) -> str:
+    """Zwróć bieżącą generację użytkownika: znacznik globalny i znacznik użytkownika."""
+    key = GENERATION_KEY.format(user_id=user_id)
+    generations = _get_generations([GLOBAL_GENERATION_KEY, key])
+    return f'{generations[GLOBAL_GENERATION_KEY]}.{generations[key]}'
+
+
+def _set_new_generations(user_ids: Set[int]) -> None:
+    _cache().set_many(
+        {GENERATION_KEY.format(user_id=user_id): uuid.uuid4().hex for user_id in user_ids},
+        timeout=None
+    )
+
+
+def _set_new_global_generation() -> None:
+    _cache().set(GLOBAL_GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def bump_user_generations(user_ids: Iterable[int]) -> None:
+    """
+    Unieważnij cache odpowiedzi podanych użytkowników.
+
+    Znacznik zmieniany jest od razu oraz ponownie po zatwierdzeniu
+    transakcji - odpowiedź policzona na danych sprzed commitu nie zostanie
+    zapisana pod aktualną generacją.
+    """
+    if not is_enabled():
+        return
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    _set_new_generations(user_ids)
+    transaction.on_commit(lambda: _set_new_generations(user_ids))
+
+
+def bump_global_generation() -> None:
+    """Unieważnij cache odpowiedzi wszystkich użytkowników (zmiana słowników)."""
+    if not is_enabled():
+        return
+    _set_new_global_generation()
+    transaction.on_commit(_set_new_global_generation)
+
+
+def users_for_animals(animal_ids) -> Set[int]:
+    """
+    ID użytkowników z dostępem do zwierząt: właściciele i aktywni współpracownicy.
+
+    Args:
+        animal_ids: Lista ID lub queryset values('...') z ID zwierząt
+
+    Returns:
+        set: ID użytkowników (jedno zapytanie po projekcji AnimalAccess)
+    """
+    return set(
+        AnimalAccess.objects.filter(animal_id__in=animal_ids).values_list('user_id', flat=True)
+    )
+
+
+def invalidate_for_animals(animal_ids, extra_user_ids: Iterable[int] = ()) -> None:
+    """Unieważnij cache wszystkich użytkowników z dostępem do zwierząt."""
+    if not is_enabled():
+        return
+    bump_user_generations(users_for_animals(animal_ids) | set(extra_user_ids))
+
+
+def invalidate_for_shopping_lists(
+    shopping_list_ids,
+    extra_animal_ids: Iterable[int] = (),
+    extra_user_ids: Iterable[int] = ()
+) -> None:
+    """
+    Unieważnij cache twórców list oraz użytkowników z dostępem do ich diet.
+
+    Args:
+        shopping_list_ids: ID list zakupów
+        extra_animal_ids: Dodatkowe zwierzęta (np. diety usunięte z listy)
+        extra_user_ids: Dodatkowi użytkownicy (np. twórca usuniętej listy)
+    """
+    if not is_enabled():
+        return
+
+    animal_ids = set(
+        Diet.all_objects.filter(
+            shopping_lists__id__in=shopping_list_ids
+        ).values_list('animal_id', flat=True)
+    ) | set(extra_animal_ids)
+
+    creators = set(
+        ShoppingList.all_objects.filter(
+            id__in=shopping_list_ids
+        ).values_list('created_by_id', flat=True)
+    )
+
+    bump_user_generations(users_for_animals(animal_ids) | creators | set(extra_user_ids))
+
+
+def cached_user_response(request, scope: str, compute: Callable[[], Response]) -> Response:
+    """
+    Zwróć odpowiedź z cache użytkownika lub policz ją i zapisz.
+
+    Klucz obejmuje generację użytkownika, zakres (widok/akcja), pełny URL
+    z parametrami oraz negocjowany format odpowiedzi.
+
+    Args:
+        request: Request DRF (uwierzytelniony)
+        scope: Nazwa widoku/akcji
+        compute: Funkcja licząca odpowiedź przy braku w cache
+    """
+    if not is_enabled() or not request.user.is_authenticated:
+        return compute()
+
+    renderer = getattr(request, 'accepted_media_type', '') or ''
+    digest = hashlib.sha256(
+        f'{request.build_absolute_uri()}|{renderer}'.encode('utf-8')
+    ).hexdigest()
+    key = RESPONSE_KEY.format(
+        user_id=request.user.id,
+        generation=get_user_generation(request.user.id),
+        scope=scope,
+        digest=digest
+    )
+
+    data = _cache().get(key)
+    if data is not None:
+        return Response(data)
+
+    response = compute()
+    if response.status_code == 200:
+        _cache().set(
+            key,
+            response.data,
+            timeout=getattr(settings, 'BARFIK_RESPONSE_CACHE_TIMEOUT', 60 * 60 * 24)
+        )
+    return response
+
+
+def cached_many(
+    keys: Dict[int, str],
+    compute: Callable[[List[int]], Dict[int, Any]]
+) -> Dict[int, Any]:
+    """
+    Pobierz wiele wartości z cache i policz brakujące jednym wywołaniem.
+
+    Args:
+        keys: Mapa {id: klucz cache}; klucz powinien zawierać wersję obiektu
+        compute: Funkcja licząca wartości dla listy brakujących ID
+
+    Returns:
+        dict: {id: wartość} dla wszystkich ID z keys
+    """
+    cached = _cache().get_many(keys.values()) if is_enabled() else {}
+    result = {
+        object_id: cached[key]
+        for object_id, key in keys.items()
+        if key in cached
+    }
+
+    missing = [object_id for object_id in keys if object_id not in result]
+    if missing:
+        computed = compute(missing)
+        result.update(computed)
+        if is_enabled():
+            _cache().set_many(
+                {keys[object_id]: value for object_id, value in computed.items()},
+                timeout=getattr(settings, 'BARFIK_RESPONSE_CACHE_TIMEOUT', 60 * 60 * 24)
+            )
+
+    return result
@@ -0,0 +1,20 @@
+"""Kontrole konfiguracji aplikacji (manage.py check)."""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_response_cache_backend(app_configs, **kwargs):
+    """Ostrzeż, gdy cache odpowiedzi jest włączony przy backendzie lokalnym dla procesu."""
+    from .caching import is_shared_backend
+
+    if not getattr(settings, 'BARFIK_RESPONSE_CACHE_ENABLED', False) or is_shared_backend():
+        return []
+    return [
+        Warning(
+            'BARFIK_RESPONSE_CACHE_ENABLED wymaga backendu cache wspólnego dla procesów; '
+            'przy LocMemCache/DummyCache cache odpowiedzi pozostaje wyłączony.',
+            hint="Ustaw CACHES na np. 'django.core.cache.backends.filebased.FileBasedCache'.",
+            id='barfik_system.W001',
+        )
+    ]
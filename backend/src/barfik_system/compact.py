@@ -0,0 +1,27 @@
+"""
+Tryb kompaktowy odpowiedzi (?compact=true lub Accept: application/json; compact=true).
+
+Zagnieżdżone obiekty słowników (jednostki, kategorie składników, gatunki)
+są zastępowane ID, a każdy użyty obiekt jest zwracany raz w bloku
+"included" odpowiedzi:
+
+    {..., "ingredients": [{"unit": 1, "category": 2, ...}, ...],
+     "included": {"units": [{"id": 1, ...}], "categories": [{"id": 2, ...}]}}
+
+Obiekty bloku included pochodzą ze snapshotu słowników procesu, więc
+querysety w tym trybie nie dołączają tabel słowników.
+"""
+from django.utils.http import parse_header_parameters
+
+COMPACT_PARAMETER = 'compact'
+INCLUDED_KEY = 'included'
+TRUE_VALUES = ('1', 'true')
+
+
+def is_compact_request(request) -> bool:
+    """Czy klient wybrał tryb kompaktowy parametrem lub nagłówkiem Accept."""
+    value = request.query_params.get(COMPACT_PARAMETER)
+    if value is None:
+        _, params = parse_header_parameters(getattr(request, 'accepted_media_type', None) or '')
+        value = params.get(COMPACT_PARAMETER)
+    return value is not None and value.lower() in TRUE_VALUES
@@ -0,0 +1,137 @@
+"""Snapshot słowników (Unit, AnimalType, IngredientCategory) ładowany raz na proces."""
+import threading
+import time
+from types import MappingProxyType
+from typing import Iterable, Optional
+from django.conf import settings
+from django.db.models import F
+from .models import AnimalType, DictionaryVersion, IngredientCategory, Unit
+from .units import UnitConversionTable
+
+# Wiersz znacznika wersji w DictionaryVersion (tworzony przez migrację)
+VERSION_ID = 1
+
+
+class DictionarySnapshot:
+    """
+    Niezmienny snapshot słowników: mapy {id: instancja} i tabela konwersji.
+
+    Instancje są współdzielone między żądaniami - nie wolno ich modyfikować.
+    """
+
+    def __init__(self, units, animal_types, categories, version: Optional[int] = None):
+        self.units = MappingProxyType({unit.id: unit for unit in units})
+        self.animal_types = MappingProxyType({animal_type.id: animal_type for animal_type in animal_types})
+        self.categories = MappingProxyType({category.id: category for category in categories})
+        self.version = version
+        self.conversion_table = UnitConversionTable(
+            {
+                'id': unit.id,
+                'symbol': unit.symbol,
+                'dimension': unit.dimension,
+                'conversion_factor': unit.conversion_factor,
+            }
+            for unit in self.units.values()
+        )
+
+    def contains(
+        self,
+        unit_ids: Iterable[int] = (),
+        animal_type_ids: Iterable[int] = (),
+        category_ids: Iterable[int] = ()
+    ) -> bool:
+        """Czy snapshot zawiera wszystkie podane ID."""
+        return (
+            all(unit_id in self.units for unit_id in unit_ids)
+            and all(animal_type_id in self.animal_types for animal_type_id in animal_type_ids)
+            and all(category_id in self.categories for category_id in category_ids)
+        )
+
+
+_snapshot: Optional[DictionarySnapshot] = None
+# time.monotonic() ostatniego porównania snapshotu ze znacznikiem w bazie
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_stored_version() -> int:
+    """Znacznik wersji słowników zapisany w bazie (jedno zapytanie)."""
+    return DictionaryVersion.objects.filter(pk=VERSION_ID).values_list('version', flat=True).first() or 0
+
+
+def load_dictionaries() -> DictionarySnapshot:
+    """
+    Wczytaj słowniki z bazy (cztery zapytania).
+
+    Znacznik wersji odczytywany jest przed słownikami - zmiana zatwierdzona
+    w trakcie wczytywania spowoduje przeładowanie przy następnym sprawdzeniu.
+    """
+    global _checked_at
+    _checked_at = time.monotonic()
+    version = get_stored_version()
+    return DictionarySnapshot(
+        list(Unit.objects.all()),
+        list(AnimalType.objects.all()),
+        list(IngredientCategory.objects.all()),
+        version=version
+    )
+
+
+def get_dictionaries(
+    unit_ids: Iterable[int] = (),
+    animal_type_ids: Iterable[int] = (),
+    category_ids: Iterable[int] = (),
+    verify: bool = False
+) -> DictionarySnapshot:
+    """
+    Zwróć snapshot słowników procesu, wczytując go przy pierwszym użyciu.
+
+    Znacznik wersji w bazie (DictionaryVersion) porównywany jest przy
+    verify=True - ścieżki zapisu, które utrwalają wartości ze snapshotu
+    (np. amount_in_base_unit) - a przy odczytach najwyżej raz na
+    BARFIK_DICTIONARY_CHECK_SECONDS. Snapshot jest też wczytywany ponownie,
+    gdy brakuje któregoś z wymaganych ID (np. rekord dodany w innym
+    procesie). ID, których nie ma również po przeładowaniu, nie istnieją -
+    wywołujący sprawdza to przez contains() lub mapy.
+
+    Args:
+        unit_ids: ID jednostek, które powinny być w snapshocie
+        animal_type_ids: ID gatunków, które powinny być w snapshocie
+        category_ids: ID kategorii, które powinny być w snapshocie
+        verify: Czy zawsze porównać snapshot ze znacznikiem w bazie
+    """
+    global _snapshot
+
+    refresh_dictionaries(0 if verify else getattr(settings, 'BARFIK_DICTIONARY_CHECK_SECONDS', 30))
+    snapshot = _snapshot
+    if snapshot is None or not snapshot.contains(unit_ids, animal_type_ids, category_ids):
+        with _lock:
+            snapshot = _snapshot = load_dictionaries()
+
+    return snapshot
+
+
+def refresh_dictionaries(max_age: float = 0) -> None:
+    """
+    Porównaj snapshot procesu ze znacznikiem wersji w bazie (jedno zapytanie).
+
+    Zmiana słownika zatwierdzona w innym procesie unieważnia snapshot tego
+    procesu. Porównanie jest pomijane, jeśli poprzednie odbyło się mniej
+    niż max_age sekund temu.
+    """
+    global _snapshot, _checked_at
+    snapshot = _snapshot
+    now = time.monotonic()
+    if snapshot is None or (max_age and now - _checked_at < max_age):
+        return
+    _checked_at = now
+    if snapshot.version != get_stored_version():
+        _snapshot = None
+
+
+def invalidate_dictionaries() -> None:
+    """Unieważnij snapshot i zwiększ znacznik wersji (sygnały po zmianie słownika)."""
+    global _snapshot
+    _snapshot = None
+    if not DictionaryVersion.objects.filter(pk=VERSION_ID).update(version=F('version') + 1):
+        DictionaryVersion.objects.get_or_create(pk=VERSION_ID, defaults={'version': 1})
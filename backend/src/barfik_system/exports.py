@@ -0,0 +1,131 @@
+"""Strumieniowy eksport list zakupów i diet do CSV/NDJSON."""
+import csv
+import json
+from typing import Iterable, Iterator, List, Tuple
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from .models import Ingredient, ShoppingListItem
+
+# Ile wierszy pobierać z kursora bazy na raz (pamięć pozostaje stała)
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# (nazwa kolumny, lookup dla values())
+SHOPPING_LIST_ITEM_COLUMNS: List[Tuple[str, str]] = [
+    ('shopping_list_id', 'shopping_list_id'),
+    ('shopping_list_title', 'shopping_list__title'),
+    ('item_id', 'id'),
+    ('ingredient_name', 'ingredient_name'),
+    ('category', 'category'),
+    ('total_amount', 'total_amount'),
+    ('unit', 'unit__symbol'),
+    ('is_checked', 'is_checked'),
+]
+
+DIET_INGREDIENT_COLUMNS: List[Tuple[str, str]] = [
+    ('diet_id', 'diet_id'),
+    ('animal_name', 'diet__animal__name'),
+    ('start_date', 'diet__start_date'),
+    ('end_date', 'diet__end_date'),
+    ('ingredient_id', 'id'),
+    ('name', 'name'),
+    ('category', 'category__name'),
+    ('cooking_method', 'cooking_method'),
+    ('amount', 'amount'),
+    ('unit', 'unit__symbol'),
+    ('amount_in_base_unit', 'amount_in_base_unit'),
+]
+
+
+class _Echo:
+    """Pseudo-plik dla csv.writer - zwraca zapisany wiersz zamiast go buforować."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(queryset, columns: List[Tuple[str, str]]) -> Iterator[dict]:
+    """
+    Iteruj po wierszach querysetu jako słownikach z nazwami kolumn eksportu.
+    
+    Używa values().iterator(), więc nie są tworzone instancje modeli ani
+    cache querysetu.
+    """
+    lookups = [lookup for _, lookup in columns]
+    for row in queryset.values(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {name: row[lookup] for name, lookup in columns}
+
+
+def iter_csv(rows: Iterable[dict], columns: List[Tuple[str, str]]) -> Iterator[str]:
+    """Zamień wiersze na linie CSV (z nagłówkiem)."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows:
+        yield writer.writerow([row[name] for name, _ in columns])
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[str]:
+    """Zamień wiersze na linie NDJSON."""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def stream_export(queryset, columns: List[Tuple[str, str]], export_format: str, filename: str) -> StreamingHttpResponse:
+    """
+    Zbuduj StreamingHttpResponse dla eksportu.
+    
+    Args:
+        queryset: Queryset źródłowy (z ustalonym order_by)
+        columns: Definicja kolumn eksportu
+        export_format: 'csv' lub 'ndjson'
+        filename: Nazwa pliku bez rozszerzenia
+    
+    Returns:
+        StreamingHttpResponse
+    
+    Raises:
+        ValueError: Jeśli format nie jest obsługiwany
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f'Nieobsługiwany format eksportu: {export_format}. '
+            f'Dostępne: {", ".join(EXPORT_FORMATS)}'
+        )
+    
+    rows = iter_rows(queryset, columns)
+    content = iter_csv(rows, columns) if export_format == 'csv' else iter_ndjson(rows)
+    
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+def shopping_list_items_for_export(shopping_list_ids=None, user=None):
+    """
+    Queryset aktywnych pozycji do eksportu.
+    
+    Args:
+        shopping_list_ids: Ogranicz do wybranych list (opcjonalnie)
+        user: Ogranicz do aktywnych list utworzonych przez użytkownika (opcjonalnie)
+    """
+    queryset = ShoppingListItem.objects.filter(is_active=True)
+    if shopping_list_ids is not None:
+        queryset = queryset.filter(shopping_list_id__in=shopping_list_ids)
+    if user is not None:
+        queryset = queryset.filter(
+            shopping_list__created_by=user,
+            shopping_list__is_active=True
+        )
+    return queryset.order_by('shopping_list_id', *ShoppingListItem.DISPLAY_ORDERING)
+
+
+def diet_ingredients_for_export(diet_id: int):
+    """Queryset aktywnych składników diety do eksportu."""
+    return Ingredient.objects.filter(
+        diet_id=diet_id,
+        is_active=True
+    ).order_by('category__name', 'name', 'id')
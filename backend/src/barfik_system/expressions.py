@@ -0,0 +1,22 @@
+"""Wyrażenia ORM współdzielone przez serializery i serwisy."""
+from django.db.models import Func, IntegerField, Subquery, Value
+
+
+class SubqueryCount(Subquery):
+    """
+    Liczba wierszy skorelowanego podzapytania: (SELECT COUNT(1) FROM ... WHERE ...).
+
+    W przeciwieństwie do Count() po relacji nie dodaje JOIN-a ani GROUP BY
+    do zapytania głównego, więc queryset.count() (np. paginacji) pomija
+    nieużywaną adnotację i liczy po samej tabeli.
+
+    Example:
+        SubqueryCount(Ingredient.objects.filter(diet=OuterRef('pk'), is_active=True))
+    """
+    output_field = IntegerField()
+
+    def __init__(self, queryset, **extra):
+        queryset = queryset.order_by().annotate(
+            row_count=Func(Value(1), function='COUNT', output_field=IntegerField())
+        ).values('row_count')
+        super().__init__(queryset, **extra)
@@ -0,0 +1,78 @@
+"""
+Parametry ?fields= i ?expand= (wybór pól odpowiedzi i rozwinięcie relacji).
+
+?fields=id,start_date,ingredients.name,ingredients.unit.symbol - pola
+zagnieżdżone wskazywane są ścieżką z kropkami; pole bez dalszej ścieżki
+zachowuje wszystkie swoje pola.
+?expand=animal - pola z expandable_fields serializera zwracane jako obiekty
+zamiast ID.
+
+Parametry dotyczą akcji list i retrieve (żądania GET); pozostałe akcje
+zwracają pełne odpowiedzi.
+"""
+from typing import Dict, Optional, Set, Tuple
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAMETER = 'fields'
+EXPAND_PARAMETER = 'expand'
+SPARSE_ACTIONS = ('list', 'retrieve')
+
+
+def parse_field_paths(value: str) -> Dict[str, dict]:
+    """
+    Zamień listę ścieżek rozdzielonych przecinkami na drzewo.
+
+    Example:
+        parse_field_paths('id,unit.symbol') == {'id': {}, 'unit': {'symbol': {}}}
+    """
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def get_sparse_request(context):
+    """Żądanie z kontekstu serializera, jeśli obsługuje ?fields= i ?expand=."""
+    request = context.get('request')
+    view = context.get('view')
+    if (
+        request is None
+        or request.method not in SAFE_METHODS
+        or getattr(view, 'action', None) not in SPARSE_ACTIONS
+    ):
+        return None
+    return request
+
+
+def has_sparse_parameters(request) -> bool:
+    """Czy żądanie zawiera ?fields= lub ?expand=."""
+    return bool(
+        request.query_params.get(FIELDS_PARAMETER) or request.query_params.get(EXPAND_PARAMETER)
+    )
+
+
+def get_field_selection(request, path: Tuple[str, ...]) -> Optional[Set[str]]:
+    """
+    Nazwy pól wybranych przez ?fields= dla serializera pod ścieżką path.
+
+    Returns:
+        set lub None, jeśli zachowane mają być wszystkie pola
+    """
+    node = parse_field_paths(request.query_params.get(FIELDS_PARAMETER, ''))
+    for name in path:
+        if not node:
+            return None
+        node = node.get(name, {})
+    return set(node) or None
+
+
+def get_expanded_paths(request) -> Set[str]:
+    """Ścieżki pól rozwiniętych przez ?expand= (np. {'animal'})."""
+    return {
+        path.strip()
+        for path in request.query_params.get(EXPAND_PARAMETER, '').split(',')
+        if path.strip()
+    }
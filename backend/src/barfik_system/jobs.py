@@ -0,0 +1,222 @@
+"""Kolejka zadań w tle oparta o tabelę Job."""
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, Optional
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Diet, Job, ShoppingList
+from . import services
+
+logger = logging.getLogger(__name__)
+
+# Rejestr obsługiwanych typów zadań: kind -> handler(user, **payload)
+JOB_HANDLERS: Dict[str, Callable] = {}
+
+
+def register_job(kind: str):
+    """
+    Dekorator rejestrujący funkcję jako handler zadania danego typu.
+    
+    Handler dostaje użytkownika zlecającego i payload jako kwargs,
+    a zwraca słownik serializowalny do JSON (zapisywany w Job.result).
+    """
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue_job(user, kind: str, payload: Optional[Dict] = None) -> Job:
+    """
+    Dodaj zadanie do kolejki.
+    
+    Args:
+        user: Użytkownik zlecający zadanie
+        kind: Typ zadania (klucz w JOB_HANDLERS)
+        payload: Argumenty handlera (JSON)
+    
+    Returns:
+        Job: Utworzone zadanie w statusie PENDING
+    
+    Raises:
+        ValueError: Jeśli typ zadania nie jest zarejestrowany
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f'Nieznany typ zadania: {kind}')
+    
+    return Job.objects.create(
+        created_by=user,
+        kind=kind,
+        payload=payload or {}
+    )
+
+
+def _fail_exhausted_jobs(expired: Q, now) -> int:
+    """
+    Oznacz jako FAILED porzucone zadania, które wyczerpały limit prób.
+
+    Args:
+        expired: Warunek zadań RUNNING z wygasłą dzierżawą
+        now: Bieżący czas
+
+    Returns:
+        int: Liczba oznaczonych zadań
+    """
+    max_attempts = getattr(settings, 'BARFIK_JOB_MAX_ATTEMPTS', 3)
+    failed = Job.objects.filter(expired, attempts__gte=max_attempts).update(
+        status='FAILED',
+        error=f'Worker przestał odpowiadać - przekroczono limit prób ({max_attempts})',
+        finished_at=now,
+        updated_at=now
+    )
+    if failed:
+        logger.warning('Oznaczono %s porzuconych zadań jako FAILED', failed)
+    return failed
+
+
+def claim_next_job(worker: str, batch_size: int = 10) -> Optional[Job]:
+    """
+    Zarezerwuj najstarsze oczekujące lub porzucone zadanie dla workera.
+    
+    Rezerwacja to warunkowy UPDATE (status=PENDING -> RUNNING), więc
+    dwa workery nigdy nie dostaną tego samego zadania - niezależnie od
+    tego, czy baza wspiera SELECT ... FOR UPDATE SKIP LOCKED.
+    
+    Zadanie RUNNING starsze niż BARFIK_JOB_LEASE_SECONDS (worker przerwany
+    w trakcie) jest rezerwowane ponownie, a po BARFIK_JOB_MAX_ATTEMPTS
+    próbach oznaczane jako FAILED. Dzierżawa musi być dłuższa niż
+    najdłuższe zadanie.
+    
+    Args:
+        worker: Identyfikator workera
+        batch_size: Ilu kandydatów sprawdzić w jednym przebiegu
+    
+    Returns:
+        Job lub None jeśli kolejka jest pusta
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'BARFIK_JOB_LEASE_SECONDS', 15 * 60))
+    expired = Q(status='RUNNING', started_at__lt=now - lease)
+    _fail_exhausted_jobs(expired, now)
+    
+    claimable = Q(status='PENDING') | expired
+    candidate_ids = list(
+        Job.objects.filter(claimable)
+        .order_by('id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    
+    for job_id in candidate_ids:
+        now = timezone.now()
+        claimed = Job.objects.filter(claimable, id=job_id).update(
+            status='RUNNING',
+            worker=worker,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            updated_at=now
+        )
+        if claimed:
+            return Job.objects.select_related('created_by').get(id=job_id)
+    
+    return None
+
+
+def run_job(job: Job) -> Job:
+    """
+    Wykonaj zarezerwowane zadanie i zapisz wynik lub błąd.
+    
+    Args:
+        job: Zadanie w statusie RUNNING
+    
+    Returns:
+        Job: Zadanie w statusie SUCCEEDED lub FAILED
+    """
+    handler = JOB_HANDLERS.get(job.kind)
+    
+    try:
+        if handler is None:
+            raise ValueError(f'Nieznany typ zadania: {job.kind}')
+        job.result = handler(job.created_by, **job.payload)
+        job.status = 'SUCCEEDED'
+        job.error = ''
+    except Exception as exc:
+        logger.exception('Zadanie %s (%s) zakończone błędem', job.id, job.kind)
+        job.result = None
+        job.status = 'FAILED'
+        job.error = str(exc)
+    
+    job.finished_at = timezone.now()
+    # Zapis tylko przy aktualnej dzierżawie - po jej wygaśnięciu zadanie mógł przejąć inny worker
+    saved = Job.objects.filter(
+        id=job.id, status='RUNNING', worker=job.worker, started_at=job.started_at
+    ).update(
+        result=job.result,
+        status=job.status,
+        error=job.error,
+        finished_at=job.finished_at,
+        updated_at=job.finished_at
+    )
+    if not saved:
+        logger.warning('Zadanie %s przejęte przez inny worker - wynik pominięty', job.id)
+    
+    return job
+
+
+def run_next_job(worker: str) -> Optional[Job]:
+    """Zarezerwuj i wykonaj jedno zadanie. Zwraca None gdy kolejka jest pusta."""
+    job = claim_next_job(worker)
+    if job is None:
+        return None
+    return run_job(job)
+
+
+# Handlery zadań
+
+def _check_diet_access(user, diet_ids) -> None:
+    """
+    Sprawdź w chwili wykonania, czy użytkownik nadal ma dostęp do diet.
+    
+    Dostęp sprawdzany przy zlecaniu mógł zostać odebrany (np. koniec
+    współpracy), zanim worker dotarł do zadania.
+    
+    Raises:
+        ValueError: Jeśli do którejś z diet nie ma już dostępu
+    """
+    accessible = set(
+        Diet.all_objects.filter(
+            services.get_accessible_diets(user),
+            id__in=diet_ids
+        ).values_list('id', flat=True)
+    )
+    missing = set(diet_ids) - accessible
+    if missing:
+        raise ValueError(f'Brak dostępu do diet: {sorted(missing)}')
+
+
+@register_job('generate_shopping_list')
+def generate_shopping_list_job(user, diet_ids, days_count, title=''):
+    """Wygeneruj listę zakupów (services.generate_shopping_list)."""
+    _check_diet_access(user, diet_ids)
+    shopping_list = services.generate_shopping_list(
+        user=user,
+        diet_ids=diet_ids,
+        days_count=days_count,
+        title=title
+    )
+    return {'shopping_list_id': shopping_list.id}
+
+
+@register_job('regenerate_shopping_list')
+def regenerate_shopping_list_job(user, shopping_list_id, incremental=True):
+    """Przelicz listę zakupów użytkownika (services.regenerate_shopping_list)."""
+    shopping_list = ShoppingList.objects.filter(id=shopping_list_id, created_by=user).first()
+    if shopping_list is None:
+        raise ValueError('Nie znaleziono listy zakupów.')
+    _check_diet_access(user, list(shopping_list.diets.values_list('id', flat=True)))
+    
+    shopping_list = services.regenerate_shopping_list(
+        shopping_list_id,
+        incremental=incremental
+    )
+    return {'shopping_list_id': shopping_list.id}
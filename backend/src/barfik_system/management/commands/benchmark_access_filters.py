@@ -0,0 +1,155 @@
+"""Management command porównujący formy filtrów dostępu (OR-join + DISTINCT, EXISTS, AnimalAccess)."""
+import statistics
+import time
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from barfik_system.access import load_access_map
+from barfik_system.models import Animal, AnimalType, Collaboration, Diet
+from barfik_system import services
+
+
+class Rollback(Exception):
+    """Wycofanie danych benchmarku po pomiarach."""
+
+
+def legacy_accessible_animals(user):
+    """Poprzednia forma filtra - LEFT JOIN przez Collaboration (wymaga distinct())."""
+    return Q(owner=user) | Q(
+        collaborations__user=user,
+        collaborations__is_active=True
+    )
+
+
+def legacy_accessible_diets(user):
+    """Poprzednia forma filtra diet - JOIN przez Animal i Collaboration (wymaga distinct())."""
+    return Q(animal__owner=user) | Q(
+        animal__collaborations__user=user,
+        animal__collaborations__is_active=True
+    )
+
+
+def exists_accessible_animals(user):
+    """Forma z podzapytaniem EXISTS po Collaboration (bez projekcji AnimalAccess)."""
+    return Q(owner=user) | Q(Exists(
+        Collaboration.objects.filter(animal=OuterRef('pk'), user=user, is_active=True)
+    ))
+
+
+def exists_accessible_diets(user):
+    """Forma filtra diet z podzapytaniem EXISTS po Collaboration."""
+    return Q(animal__owner=user) | Q(Exists(
+        Collaboration.objects.filter(animal=OuterRef('animal_id'), user=user, is_active=True)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Porównuje filtry dostępu OR-join + DISTINCT z formą EXISTS, projekcją AnimalAccess '
+        'i mapą dostępu na danych z wieloma współpracownikami na zwierzę (dane są wycofywane)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--animals', type=int, default=200, help='Liczba zwierząt użytkownika')
+        parser.add_argument('--collaborators', type=int, default=30, help='Współpracownicy na zwierzę')
+        parser.add_argument('--diets', type=int, default=5, help='Diety na zwierzę')
+        parser.add_argument('--repeat', type=int, default=20, help='Liczba powtórzeń pomiaru')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.build_dataset(options)
+                self.run(user, options['repeat'])
+                raise Rollback()
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('✓ Dane benchmarku wycofane'))
+
+    def build_dataset(self, options):
+        """Utwórz użytkownika ze zwierzętami udostępnionymi wielu współpracownikom."""
+        species = AnimalType.objects.first() or AnimalType.objects.create(name='Benchmark')
+        user = User.objects.create(username='benchmark-owner@barfik.pl')
+        collaborators = User.objects.bulk_create([
+            User(username=f'benchmark-{index}@barfik.pl')
+            for index in range(options['collaborators'])
+        ])
+        animals = Animal.objects.bulk_create([
+            Animal(owner=user, species=species, name=f'Benchmark {index}')
+            for index in range(options['animals'])
+        ])
+        Collaboration.objects.bulk_create([
+            Collaboration(animal=animal, user=collaborator, permission='READ_ONLY')
+            for animal in animals
+            for collaborator in collaborators
+        ])
+        # bulk_create nie wysyła sygnałów - projekcja budowana jawnie
+        services.rebuild_animal_access([animal.id for animal in animals])
+        Diet.objects.bulk_create([
+            Diet(animal=animal, start_date=date.today())
+            for animal in animals
+            for _ in range(options['diets'])
+        ])
+
+        self.stdout.write(
+            f'Dane: {len(animals)} zwierząt, {len(collaborators)} współpracowników na zwierzę, '
+            f'{len(animals) * options["diets"]} diet'
+        )
+        return user
+
+    def run(self, user, repeat):
+        """Zmierz COUNT i pierwszą stronę listy dla każdej formy filtra."""
+        access_map = load_access_map(user)
+        variants = {
+            'zwierzęta': (
+                Animal.all_objects,
+                {
+                    'OR-join + DISTINCT': (legacy_accessible_animals(user), True),
+                    'EXISTS': (exists_accessible_animals(user), False),
+                    'AnimalAccess': (services.get_accessible_animals(user), False),
+                    'mapa dostępu': (services.get_accessible_animals(user, access_map), False),
+                }
+            ),
+            'diety': (
+                Diet.all_objects,
+                {
+                    'OR-join + DISTINCT': (legacy_accessible_diets(user), True),
+                    'EXISTS': (exists_accessible_diets(user), False),
+                    'AnimalAccess': (services.get_accessible_diets(user), False),
+                    'mapa dostępu': (services.get_accessible_diets(user, access_map), False),
+                }
+            ),
+        }
+
+        for resource, (manager, filters) in variants.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{resource}'))
+            expected_ids = None
+            for label, (access_filter, distinct) in filters.items():
+                queryset = manager.filter(access_filter).order_by('-created_at', '-id')
+                if distinct:
+                    queryset = queryset.distinct()
+
+                ids = sorted(queryset.values_list('id', flat=True))
+                if expected_ids is None:
+                    expected_ids = ids
+                elif ids != expected_ids:
+                    self.stdout.write(self.style.ERROR(f'✗ {label}: inny wynik niż OR-join'))
+                    continue
+
+                count_ms = self.measure(lambda: queryset.count(), repeat)
+                page_ms = self.measure(lambda: list(queryset[:20]), repeat)
+                self.stdout.write(
+                    f'  {label:<20} wierszy={len(ids):<6} '
+                    f'COUNT={count_ms:8.2f} ms  strona={page_ms:8.2f} ms'
+                )
+
+        self.stdout.write(f'\nBaza: {connection.vendor}, mediana z {repeat} powtórzeń')
+
+    def measure(self, callback, repeat):
+        """Mediana czasu wykonania w milisekundach."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            callback()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
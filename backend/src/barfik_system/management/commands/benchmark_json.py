@@ -0,0 +1,163 @@
+"""Management command porównujący kodowanie i dekodowanie JSON (DRF vs orjson)."""
+import io
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from barfik_system.models import (
+    Animal, AnimalType, Diet, Ingredient, IngredientCategory,
+    ShoppingList, ShoppingListItem, Unit
+)
+from barfik_system.renderers import ORJSONParser, ORJSONRenderer, orjson
+from barfik_system.serializers import (
+    DietDetailSerializer, DietListSerializer, ShoppingListSerializer,
+    get_serializer_annotations
+)
+from barfik_system import services
+
+
+class Rollback(Exception):
+    """Wycofanie danych benchmarku po pomiarach."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Porównuje kodowanie i dekodowanie JSON (JSONRenderer/JSONParser vs orjson) '
+        'na odpowiedziach diet i list zakupów (dane są wycofywane)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--diets', type=int, default=100, help='Liczba diet')
+        parser.add_argument('--ingredients', type=int, default=20, help='Składniki na dietę')
+        parser.add_argument('--items', type=int, default=200, help='Pozycje listy zakupów')
+        parser.add_argument('--repeat', type=int, default=20, help='Liczba powtórzeń pomiaru')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson nie jest zainstalowany - klasy działają jak JSONRenderer/JSONParser'))
+
+        try:
+            with transaction.atomic():
+                payloads = self.build_payloads(options)
+                self.run(payloads, options['repeat'])
+                raise Rollback()
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('✓ Dane benchmarku wycofane'))
+
+    def build_payloads(self, options):
+        """Utwórz diety i listę zakupów i zserializuj je jak widoki API."""
+        species = AnimalType.objects.first() or AnimalType.objects.create(name='Benchmark')
+        units = list(Unit.objects.all()[:3]) or [Unit.objects.create(
+            name='gram', symbol='g', conversion_factor=Decimal('1'), dimension='mass'
+        )]
+        categories = list(IngredientCategory.objects.all()[:3]) or [IngredientCategory.objects.create(
+            code='benchmark', name='Benchmark'
+        )]
+        user = User.objects.create(username='benchmark-json@barfik.pl', email='benchmark-json@barfik.pl')
+        animal = Animal.objects.create(owner=user, species=species, name='Benchmark', weight_kg=Decimal('12.50'))
+
+        today = date.today()
+        diets = Diet.objects.bulk_create([
+            Diet(
+                animal=animal,
+                start_date=today - timedelta(days=index),
+                end_date=today + timedelta(days=7),
+                total_daily_mass=Decimal('1234.567'),
+                description=f'Dieta {index} - wołowina, żołądki, marchew'
+            )
+            for index in range(options['diets'])
+        ])
+        Ingredient.objects.bulk_create([
+            Ingredient(
+                diet=diet,
+                name=f'Składnik {index}',
+                category=categories[index % len(categories)],
+                unit=units[index % len(units)],
+                amount=Decimal('123.456'),
+                amount_in_base_unit=Decimal('123.456')
+            )
+            for diet in diets
+            for index in range(options['ingredients'])
+        ])
+        shopping_list = ShoppingList.objects.create(created_by=user, days_count=7, title='Benchmark')
+        shopping_list.diets.set(diets[:10])
+        ShoppingListItem.objects.bulk_create([
+            ShoppingListItem(
+                shopping_list=shopping_list,
+                ingredient_name=f'Pozycja {index}',
+                category=categories[index % len(categories)].name,
+                unit=units[index % len(units)],
+                total_amount=Decimal('864.192'),
+                is_checked=index % 2 == 0
+            )
+            for index in range(options['items'])
+        ])
+
+        diet_queryset = Diet.objects.filter(animal=animal).select_related('animal')
+        payloads = {
+            'lista diet': DietListSerializer(
+                diet_queryset.annotate(**get_serializer_annotations(DietListSerializer)),
+                many=True
+            ).data,
+            'szczegóły diety': DietDetailSerializer(
+                diet_queryset.prefetch_related('ingredients__unit', 'ingredients__category').first()
+            ).data,
+            'lista zakupów': ShoppingListSerializer(
+                services.get_shopping_list_for_output(shopping_list.id)
+            ).data,
+        }
+        payloads['szczegóły diet (wszystkie)'] = DietDetailSerializer(
+            diet_queryset.prefetch_related('ingredients__unit', 'ingredients__category'),
+            many=True
+        ).data
+        return payloads
+
+    def run(self, payloads, repeat):
+        """Zmierz kodowanie i dekodowanie każdej odpowiedzi."""
+        renderers = {'JSONRenderer': JSONRenderer(), 'orjson': ORJSONRenderer()}
+        parsers = {'JSONParser': JSONParser(), 'orjson': ORJSONParser()}
+
+        for label, data in payloads.items():
+            body = renderers['JSONRenderer'].render(data)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label} ({len(body) / 1024:.1f} KiB)'))
+
+            if renderers['orjson'].render(data) != body:
+                self.stdout.write(self.style.ERROR('✗ orjson: inne bajty niż JSONRenderer'))
+                continue
+            if parsers['orjson'].parse(io.BytesIO(body)) != parsers['JSONParser'].parse(io.BytesIO(body)):
+                self.stdout.write(self.style.ERROR('✗ orjson: inny wynik parsowania niż JSONParser'))
+                continue
+
+            encode = {
+                name: self.measure(lambda renderer=renderer: renderer.render(data), repeat)
+                for name, renderer in renderers.items()
+            }
+            decode = {
+                name: self.measure(lambda parser=parser: parser.parse(io.BytesIO(body)), repeat)
+                for name, parser in parsers.items()
+            }
+            for (encoder, encode_ms), (decoder, decode_ms) in zip(encode.items(), decode.items()):
+                self.stdout.write(
+                    f'  {encoder:<12} kodowanie={encode_ms:8.3f} ms   '
+                    f'{decoder:<10} dekodowanie={decode_ms:8.3f} ms'
+                )
+            self.stdout.write(
+                f'  przyspieszenie: kodowanie {encode["JSONRenderer"] / encode["orjson"]:.1f}x, '
+                f'dekodowanie {decode["JSONParser"] / decode["orjson"]:.1f}x'
+            )
+
+        self.stdout.write(f'\nMediana z {repeat} powtórzeń')
+
+    def measure(self, callback, repeat):
+        """Mediana czasu wykonania w milisekundach."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            callback()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
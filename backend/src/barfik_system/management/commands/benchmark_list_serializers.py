@@ -0,0 +1,179 @@
+"""Management command porównujący serializery list (ModelSerializer vs values())."""
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from barfik_system.models import (
+    Animal, AnimalType, Diet, Ingredient, IngredientCategory,
+    ShoppingList, ShoppingListItem, Unit
+)
+from barfik_system.serializers import (
+    AnimalListSerializer, AnimalListValuesSerializer,
+    DietListSerializer, DietListValuesSerializer,
+    ShoppingListSerializer, ShoppingListValuesSerializer,
+    get_serializer_annotations
+)
+from barfik_system import services
+
+
+class Rollback(Exception):
+    """Wycofanie danych benchmarku po pomiarach."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Porównuje przepustowość (wiersze/s) serializerów list ModelSerializer '
+        'z serializerami opartymi na values() (dane są wycofywane)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--animals', type=int, default=200, help='Liczba zwierząt użytkownika')
+        parser.add_argument('--diets', type=int, default=3, help='Diety na zwierzę')
+        parser.add_argument('--shopping-lists', type=int, default=100, help='Liczba list zakupów')
+        parser.add_argument('--items', type=int, default=20, help='Pozycje na liście zakupów')
+        parser.add_argument('--page-size', type=int, default=100, help='Wierszy na stronę')
+        parser.add_argument('--repeat', type=int, default=20, help='Liczba powtórzeń pomiaru')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.build_dataset(options)
+                self.run(user, options['page_size'], options['repeat'])
+                raise Rollback()
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('✓ Dane benchmarku wycofane'))
+
+    def build_dataset(self, options):
+        """Utwórz użytkownika ze zwierzętami, dietami i listami zakupów."""
+        species = AnimalType.objects.first() or AnimalType.objects.create(name='Benchmark')
+        unit = Unit.objects.first() or Unit.objects.create(
+            name='gram', symbol='g', conversion_factor=Decimal('1'), dimension='mass'
+        )
+        category = IngredientCategory.objects.first() or IngredientCategory.objects.create(
+            code='benchmark', name='Benchmark'
+        )
+        user = User.objects.create(username='benchmark-lists@barfik.pl', email='benchmark-lists@barfik.pl')
+
+        animals = Animal.objects.bulk_create([
+            Animal(owner=user, species=species, name=f'Benchmark {index}', weight_kg=Decimal('12.50'))
+            for index in range(options['animals'])
+        ])
+        # bulk_create nie wysyła sygnałów - projekcja budowana jawnie
+        services.rebuild_animal_access([animal.id for animal in animals])
+
+        today = date.today()
+        diets = Diet.objects.bulk_create([
+            Diet(
+                animal=animal,
+                start_date=today - timedelta(days=index),
+                end_date=today + timedelta(days=7),
+                total_daily_mass=Decimal('350.000'),
+                description='Benchmark'
+            )
+            for animal in animals
+            for index in range(options['diets'])
+        ])
+        Ingredient.objects.bulk_create([
+            Ingredient(
+                diet=diet, name='Wołowina', category=category, unit=unit,
+                amount=Decimal('350.000'), amount_in_base_unit=Decimal('350.000')
+            )
+            for diet in diets
+        ])
+
+        shopping_lists = ShoppingList.objects.bulk_create([
+            ShoppingList(created_by=user, days_count=7, title=f'Lista {index}')
+            for index in range(options['shopping_lists'])
+        ])
+        through = ShoppingList.diets.through
+        through.objects.bulk_create([
+            through(shoppinglist_id=shopping_list.id, diet_id=diet.id)
+            for index, shopping_list in enumerate(shopping_lists)
+            for diet in diets[index % len(diets):][:3]
+        ])
+        ShoppingListItem.objects.bulk_create([
+            ShoppingListItem(
+                shopping_list=shopping_list, ingredient_name=f'Pozycja {index}',
+                category=category.name, unit=unit, total_amount=Decimal('2450.000')
+            )
+            for shopping_list in shopping_lists
+            for index in range(options['items'])
+        ])
+
+        self.stdout.write(
+            f'Dane: {len(animals)} zwierząt, {len(diets)} diet, '
+            f'{len(shopping_lists)} list po {options["items"]} pozycji'
+        )
+        return user
+
+    def run(self, user, page_size, repeat):
+        """Zmierz pobranie i serializację jednej strony każdej listy."""
+        variants = {
+            'zwierzęta': (
+                Animal.all_objects.filter(services.get_accessible_animals(user))
+                .select_related('species', 'owner')
+                .order_by('-is_active', '-created_at'),
+                AnimalListSerializer,
+                AnimalListValuesSerializer,
+            ),
+            'diety': (
+                Diet.all_objects.filter(services.get_accessible_diets(user))
+                .select_related('animal')
+                .annotate(**get_serializer_annotations(DietListSerializer))
+                .order_by('-is_active', '-start_date'),
+                DietListSerializer,
+                DietListValuesSerializer,
+            ),
+            'listy zakupów': (
+                ShoppingList.objects.filter(created_by=user)
+                .prefetch_related(*services.get_shopping_list_prefetches())
+                .order_by('-created_at'),
+                ShoppingListSerializer,
+                ShoppingListValuesSerializer,
+            ),
+        }
+        renderer = JSONRenderer()
+
+        for resource, (queryset, serializer_class, values_serializer_class) in variants.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{resource}'))
+
+            def model_page():
+                return serializer_class(list(queryset[:page_size]), many=True).data
+
+            def values_page():
+                serializer = values_serializer_class()
+                return serializer.serialize(serializer.values(queryset)[:page_size])
+
+            expected = renderer.render(model_page())
+            if renderer.render(values_page()) != expected:
+                self.stdout.write(self.style.ERROR('✗ values(): inny JSON niż ModelSerializer'))
+                continue
+
+            rows = len(queryset[:page_size])
+            timings = {
+                'ModelSerializer': self.measure(model_page, repeat),
+                'values()': self.measure(values_page, repeat),
+            }
+            for label, seconds in timings.items():
+                self.stdout.write(
+                    f'  {label:<16} wierszy={rows:<5} '
+                    f'czas={seconds * 1000:8.2f} ms  {rows / seconds:10.0f} wierszy/s'
+                )
+            self.stdout.write(
+                f'  przyspieszenie: {timings["ModelSerializer"] / timings["values()"]:.1f}x'
+            )
+
+        self.stdout.write(f'\nMediana z {repeat} powtórzeń, strona {page_size} wierszy (zapytania + serializacja)')
+
+    def measure(self, callback, repeat):
+        """Mediana czasu wykonania w sekundach."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            callback()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
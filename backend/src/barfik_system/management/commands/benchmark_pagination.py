@@ -0,0 +1,152 @@
+"""Management command porównujący koszt strony PageNumberPagination i paginacji kursorowej."""
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from barfik_system.models import Animal, AnimalType, Diet
+from barfik_system.pagination import KeysetCursorPagination
+from barfik_system.views import AnimalViewSet, DietViewSet
+from barfik_system import services
+
+
+class Rollback(Exception):
+    """Wycofanie danych benchmarku po pomiarach."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Porównuje czas strony list zwierząt i diet przy PageNumberPagination '
+        '(COUNT + OFFSET) i paginacji kursorowej na początku, w środku i na końcu '
+        'listy (dane są wycofywane)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--animals', type=int, default=5000, help='Liczba zwierząt użytkownika')
+        parser.add_argument('--diets', type=int, default=2, help='Diety na zwierzę')
+        parser.add_argument('--page-size', type=int, default=100, help='Wierszy na stronę')
+        parser.add_argument('--repeat', type=int, default=10, help='Liczba powtórzeń pomiaru')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.build_dataset(options)
+                # Żądania APIRequestFactory (host testserver) budują linki kursora
+                with override_settings(ALLOWED_HOSTS=['testserver']):
+                    self.run(user, options['page_size'], options['repeat'])
+                raise Rollback()
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('✓ Dane benchmarku wycofane'))
+
+    def build_dataset(self, options):
+        """Utwórz użytkownika ze zwierzętami (część usuniętych) i dietami."""
+        species = AnimalType.objects.first() or AnimalType.objects.create(name='Benchmark')
+        user = User.objects.create(username='benchmark-pages@barfik.pl', email='benchmark-pages@barfik.pl')
+
+        animals = Animal.objects.bulk_create([
+            Animal(
+                owner=user, species=species, name=f'Benchmark {index}',
+                weight_kg=Decimal('12.50'), is_active=index % 10 != 0
+            )
+            for index in range(options['animals'])
+        ])
+        # bulk_create nie wysyła sygnałów - projekcja budowana jawnie
+        services.rebuild_animal_access([animal.id for animal in animals])
+
+        today = date.today()
+        diets = Diet.objects.bulk_create([
+            Diet(
+                animal=animal,
+                start_date=today - timedelta(days=index % 365),
+                total_daily_mass=Decimal('350.000'),
+                is_active=index % 7 != 0
+            )
+            for index, animal in enumerate(
+                animal for animal in animals for _ in range(options['diets'])
+            )
+        ])
+
+        self.stdout.write(f'Dane: {len(animals)} zwierząt, {len(diets)} diet')
+        return user
+
+    def run(self, user, page_size, repeat):
+        """Zmierz stronę na różnych głębokościach obiema paginacjami."""
+        variants = {
+            'zwierzęta': (
+                Animal.all_objects.filter(services.get_accessible_animals(user)),
+                AnimalViewSet.cursor_ordering,
+            ),
+            'diety': (
+                Diet.all_objects.filter(services.get_accessible_diets(user)),
+                DietViewSet.cursor_ordering,
+            ),
+        }
+        factory = APIRequestFactory()
+
+        for resource, (queryset, cursor_ordering) in variants.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{resource} (klucz {", ".join(cursor_ordering)})'))
+            queryset = queryset.order_by(*cursor_ordering)
+            view = SimpleNamespace(cursor_ordering=cursor_ordering)
+
+            def page_number(page):
+                paginator = PageNumberPagination()
+                paginator.page_size = page_size
+                return paginator.paginate_queryset(
+                    queryset, Request(factory.get('/', {'page': page})), view
+                )
+
+            def cursor_page(cursor):
+                paginator = KeysetCursorPagination()
+                paginator.page_size = page_size
+                params = {'cursor': cursor} if cursor else {}
+                return paginator, paginator.paginate_queryset(
+                    queryset, Request(factory.get('/', params)), view
+                )
+
+            # Kursory kolejnych stron (przejście po linkach next)
+            cursors = [None]
+            while True:
+                paginator, _ = cursor_page(cursors[-1])
+                next_link = paginator.get_next_link()
+                if next_link is None:
+                    break
+                cursors.append(parse_qs(urlparse(next_link).query)['cursor'][0])
+
+            pages = sorted({1, len(cursors) // 2 + 1, len(cursors)})
+            for page in pages:
+                if [row.id for row in page_number(page)] != [row.id for row in cursor_page(cursors[page - 1])[1]]:
+                    self.stdout.write(self.style.ERROR(f'✗ strona {page}: różne wiersze'))
+                    continue
+
+                with CaptureQueriesContext(connection) as offset_queries:
+                    page_number(page)
+                with CaptureQueriesContext(connection) as cursor_queries:
+                    cursor_page(cursors[page - 1])
+                timings = {
+                    'PageNumber': (self.measure(lambda: page_number(page), repeat), len(offset_queries)),
+                    'kursor': (self.measure(lambda: cursor_page(cursors[page - 1]), repeat), len(cursor_queries)),
+                }
+                line = '  '.join(
+                    f'{label}={seconds * 1000:7.2f} ms ({queries} zap.)'
+                    for label, (seconds, queries) in timings.items()
+                )
+                self.stdout.write(f'  strona {page:>4}/{len(cursors)}: {line}')
+
+        self.stdout.write(f'\nMediana z {repeat} powtórzeń, strona {page_size} wierszy (zapytania + instancje)')
+
+    def measure(self, callback, repeat):
+        """Mediana czasu wykonania w sekundach."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            callback()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
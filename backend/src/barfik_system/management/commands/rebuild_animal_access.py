@@ -0,0 +1,44 @@
+"""Management command odbudowujący projekcję AnimalAccess."""
+from django.core.management.base import BaseCommand
+from barfik_system.models import Animal, AnimalAccess
+from barfik_system import services
+
+
+class Command(BaseCommand):
+    help = (
+        'Odbudowuje tabelę AnimalAccess z Animal.owner i aktywnych Collaboration '
+        '(porcjami zwierząt, każda porcja w osobnej transakcji)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Liczba zwierząt w jednej porcji (domyślnie 500)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            self.stderr.write(self.style.ERROR('--chunk-size musi być dodatnie'))
+            return
+
+        animals = Animal.all_objects.order_by('id').values_list('id', flat=True)
+        last_id = 0
+        chunks = 0
+        entries = 0
+
+        # Stronicowanie po kluczu - kolejne porcje nie przesuwają offsetu
+        while True:
+            chunk = list(animals.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            entries += services.rebuild_animal_access(chunk)
+            last_id = chunk[-1]
+            chunks += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Odbudowano AnimalAccess: {entries} wpisów w {chunks} porcjach '
+            f'(w tabeli: {AnimalAccess.objects.count()})'
+        ))
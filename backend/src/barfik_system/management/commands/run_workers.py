@@ -0,0 +1,124 @@
+"""
+Komenda Django uruchamiająca workery kolejki zadań w tle (tabela Job).
+
+Usage:
+    python manage.py run_workers
+    python manage.py run_workers --processes 4
+    python manage.py run_workers --once
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, InterfaceError, close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+
+def work_loop(worker, poll_interval, once):
+    """
+    Pętla pojedynczego workera: rezerwuj i wykonuj zadania aż do przerwania.
+
+    Uruchamiana również jako osobny proces - dlatego django.setup() i import
+    kolejki są wykonywane dopiero tutaj. Przed każdą rezerwacją zamykane są
+    zerwane i przeterminowane połączenia (jak na początku żądania HTTP),
+    a błąd bazy danych nie kończy workera - jest logowany i ponawiany
+    po poll_interval (z --once worker kończy pracę).
+
+    Returns:
+        int: Liczba wykonanych zadań
+    """
+    import django
+    django.setup()
+
+    from barfik_system import jobs
+
+    processed = 0
+    try:
+        while True:
+            close_old_connections()
+            try:
+                job = jobs.run_next_job(worker)
+            except (DatabaseError, InterfaceError):
+                logger.exception('Worker %s: błąd bazy danych', worker)
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+            if job is not None:
+                processed += 1
+                continue
+            if once:
+                break
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        connections.close_all()
+
+    return processed
+
+
+class Command(BaseCommand):
+    help = 'Uruchamia workery przetwarzające zadania w tle (generowanie list zakupów itp.)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Liczba procesów workerów (domyślnie 1)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Czas oczekiwania (s) gdy kolejka jest pusta',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Przetwórz oczekujące zadania i zakończ',
+        )
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        poll_interval = options['poll_interval']
+        once = options['once']
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+
+        self.stdout.write(self.style.SUCCESS(f'Uruchamianie workerów: {processes}'))
+
+        if processes == 1:
+            processed = work_loop(f'{prefix}:0', poll_interval, once)
+            self.stdout.write(self.style.SUCCESS(f'✓ Wykonano zadań: {processed}'))
+            return
+
+        # Połączenia DB nie mogą być współdzielone między procesami
+        connections.close_all()
+
+        pool = [
+            multiprocessing.Process(
+                target=work_loop,
+                args=(f'{prefix}:{index}', poll_interval, once),
+                daemon=True
+            )
+            for index in range(processes)
+        ]
+        for process in pool:
+            process.start()
+
+        try:
+            for process in pool:
+                process.join()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Zatrzymywanie workerów...'))
+            for process in pool:
+                process.terminate()
+            for process in pool:
+                process.join()
+
+        self.stdout.write(self.style.SUCCESS('✓ Workery zakończyły pracę'))
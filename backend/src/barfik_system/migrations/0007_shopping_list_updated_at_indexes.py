@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 03:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barfik_system', '0006_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shoppinglist',
+            index=models.Index(fields=['created_by', 'updated_at'], name='barfik_syst_created_aa6db5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppinglistitem',
+            index=models.Index(fields=['shopping_list', 'updated_at'], name='barfik_syst_shoppin_1d63ab_idx'),
+        ),
+    ]
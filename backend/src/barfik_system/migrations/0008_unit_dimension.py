@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+
+# Jednostki ze słownika initial_data.json, które nie są jednostkami masy
+NON_MASS_SYMBOLS = {
+    'volume': ['ml', 'l'],
+    'count': ['szt'],
+}
+
+
+def set_unit_dimensions(apps, schema_editor):
+    Unit = apps.get_model('barfik_system', 'Unit')
+    for dimension, symbols in NON_MASS_SYMBOLS.items():
+        Unit.objects.filter(symbol__in=symbols).update(dimension=dimension)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barfik_system', '0007_shopping_list_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unit',
+            name='dimension',
+            field=models.CharField(choices=[('mass', 'Masa'), ('volume', 'Objętość'), ('count', 'Sztuki')], default='mass', help_text='Wymiar jednostki - konwersja możliwa tylko w obrębie wymiaru', max_length=16),
+        ),
+        migrations.RunPython(set_unit_dimensions, migrations.RunPython.noop),
+    ]
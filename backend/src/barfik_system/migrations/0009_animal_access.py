@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-17 04:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_animal_access(apps, schema_editor):
+    Animal = apps.get_model('barfik_system', 'Animal')
+    Collaboration = apps.get_model('barfik_system', 'Collaboration')
+    AnimalAccess = apps.get_model('barfik_system', 'AnimalAccess')
+
+    levels = {}
+    for animal_id, user_id, permission in Collaboration.objects.filter(
+        is_active=True
+    ).order_by('id').values_list('animal_id', 'user_id', 'permission'):
+        levels.setdefault((animal_id, user_id), permission)
+    for animal_id, owner_id in Animal.objects.values_list('id', 'owner_id'):
+        levels[(animal_id, owner_id)] = 'OWNER'
+
+    AnimalAccess.objects.bulk_create(
+        [
+            AnimalAccess(animal_id=animal_id, user_id=user_id, level=level)
+            for (animal_id, user_id), level in levels.items()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barfik_system', '0008_unit_dimension'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnimalAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('OWNER', 'Właściciel'), ('EDIT', 'Edycja'), ('READ_ONLY', 'Tylko odczyt')], max_length=16)),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accesses', to='barfik_system.animal')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='animal_accesses', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Dostęp do zwierzęcia',
+                'verbose_name_plural': 'Dostępy do zwierząt',
+                'constraints': [models.UniqueConstraint(fields=('user', 'animal'), name='uix_animal_access_user_animal')],
+            },
+        ),
+        migrations.RunPython(populate_animal_access, migrations.RunPython.noop),
+    ]
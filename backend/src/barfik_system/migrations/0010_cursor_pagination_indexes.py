@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-17 05:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barfik_system', '0009_animal_access'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['-is_active', '-created_at', 'id'], name='animal_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diet',
+            index=models.Index(fields=['-is_active', '-start_date', 'id'], name='diet_cursor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppinglist',
+            index=models.Index(fields=['created_by', '-created_at', 'id'], name='shopping_list_cursor_idx'),
+        ),
+    ]
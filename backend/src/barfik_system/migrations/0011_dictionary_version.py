@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-17 05:32
+
+from django.db import migrations, models
+
+
+def create_dictionary_version(apps, schema_editor):
+    DictionaryVersion = apps.get_model('barfik_system', 'DictionaryVersion')
+    DictionaryVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('barfik_system', '0010_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DictionaryVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Wersja słowników',
+                'verbose_name_plural': 'Wersje słowników',
+            },
+        ),
+        migrations.RunPython(create_dictionary_version, migrations.RunPython.noop),
+    ]
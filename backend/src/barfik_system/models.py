@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.db.models import Q
@@ -49,6 +49,12 @@ class AnimalType(TimeStampedModel):
 
 class Unit(models.Model):
     """Słownik jednostek z konwersją do jednostki bazowej."""
+    DIMENSION_CHOICES = [
+        ('mass', 'Masa'),
+        ('volume', 'Objętość'),
+        ('count', 'Sztuki'),
+    ]
+
     name = models.CharField(max_length=64, unique=True)
     symbol = models.CharField(max_length=16, unique=True)
     conversion_factor = models.DecimalField(
@@ -56,6 +62,12 @@ class Unit(models.Model):
         decimal_places=6,
         validators=[MinValueValidator(0.000001)]
     )
+    dimension = models.CharField(
+        max_length=16,
+        choices=DIMENSION_CHOICES,
+        default='mass',
+        help_text='Wymiar jednostki - konwersja możliwa tylko w obrębie wymiaru'
+    )
 
     class Meta:
         verbose_name = "Jednostka"
@@ -86,6 +98,24 @@ class IngredientCategory(models.Model):
         return self.name
 
 
+class DictionaryVersion(models.Model):
+    """
+    Znacznik wersji słowników (Unit, AnimalType, IngredientCategory) - jeden wiersz.
+
+    Zwiększany w transakcji zmiany słownika; procesy porównują go ze
+    swoim snapshotem słowników (dictionaries.py) przed zapisem wartości
+    liczonych ze snapshotu i okresowo przy odczytach.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Wersja słowników"
+        verbose_name_plural = "Wersje słowników"
+
+    def __str__(self):
+        return f"Słowniki v{self.version}"
+
+
 # Modele główne
 class Animal(TimeStampedModel, SoftDeletableMixin):
     """Profil zwierzęcia."""
@@ -115,8 +145,15 @@ class Animal(TimeStampedModel, SoftDeletableMixin):
         indexes = [
             models.Index(fields=['owner', 'is_active']),
             models.Index(fields=['species', 'is_active']),
+            # Klucz paginacji kursorowej (AnimalViewSet.cursor_ordering)
+            models.Index(fields=['-is_active', '-created_at', 'id'], name='animal_cursor_idx'),
         ]
 
+    def save(self, *args, **kwargs):
+        # Zapis i projekcja AnimalAccess (sygnał post_save) w jednej transakcji
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.species.name})"
 
@@ -143,6 +180,8 @@ class Diet(TimeStampedModel, SoftDeletableMixin):
         indexes = [
             models.Index(fields=['animal', 'is_active']),
             models.Index(fields=['animal', 'start_date', 'end_date']),
+            # Klucz paginacji kursorowej (DietViewSet.cursor_ordering)
+            models.Index(fields=['-is_active', '-start_date', 'id'], name='diet_cursor_idx'),
         ]
 
     def clean(self):
@@ -205,8 +244,14 @@ class Ingredient(TimeStampedModel, SoftDeletableMixin):
 
     def save(self, *args, **kwargs):
         from decimal import Decimal
+        from .units import get_conversion_table
         amount_decimal = Decimal(str(self.amount))
-        conversion_factor_decimal = Decimal(str(self.unit.conversion_factor))
+        # Mnożnik ze snapshotu słowników sprawdzonego ze znacznikiem wersji w bazie
+        table = get_conversion_table([self.unit_id])
+        if self.unit_id in table:
+            conversion_factor_decimal = table.factor(self.unit_id)
+        else:
+            conversion_factor_decimal = Decimal(str(self.unit.conversion_factor))
         self.amount_in_base_unit = amount_decimal * conversion_factor_decimal
         super().save(*args, **kwargs)
 
@@ -251,10 +296,55 @@ class Collaboration(TimeStampedModel, SoftDeletableMixin):
             models.Index(fields=['animal', 'user', 'is_active']),
         ]
 
+    def save(self, *args, **kwargs):
+        # Zapis i projekcja AnimalAccess (sygnał post_save) w jednej transakcji
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user.email} -> {self.animal.name} ({self.permission})"
 
 
+class AnimalAccess(models.Model):
+    """
+    Projekcja poziomu dostępu użytkownika do zwierzęcia.
+
+    Utrzymywana przez sygnały Animal i Collaboration (services.refresh_animal_access,
+    services.rebuild_animal_access); odbudowa: komenda rebuild_animal_access.
+    Soft delete zwierzęcia nie usuwa wpisów - status czyta się z Animal.is_active.
+    """
+    LEVEL_CHOICES = [
+        ('OWNER', 'Właściciel'),
+        ('EDIT', 'Edycja'),
+        ('READ_ONLY', 'Tylko odczyt'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='animal_accesses'
+    )
+    animal = models.ForeignKey(
+        Animal,
+        on_delete=models.CASCADE,
+        related_name='accesses'
+    )
+    level = models.CharField(max_length=16, choices=LEVEL_CHOICES)
+
+    class Meta:
+        verbose_name = "Dostęp do zwierzęcia"
+        verbose_name_plural = "Dostępy do zwierząt"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'animal'],
+                name='uix_animal_access_user_animal'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.animal_id} ({self.level})"
+
+
 class ShoppingList(TimeStampedModel, SoftDeletableMixin):
     """Lista zakupów generowana z diet."""
     created_by = models.ForeignKey(
@@ -273,12 +363,18 @@ class ShoppingList(TimeStampedModel, SoftDeletableMixin):
     )
     is_completed = models.BooleanField(default=False, db_index=True)
 
+    # Kolejność diet listy w odpowiedziach API (prefetch i values())
+    DIETS_ORDERING = ('start_date', 'id')
+
     class Meta:
         verbose_name = "Lista zakupów"
         verbose_name_plural = "Listy zakupów"
         indexes = [
             models.Index(fields=['created_by', 'is_active']),
             models.Index(fields=['is_completed', 'is_active']),
+            models.Index(fields=['created_by', 'updated_at']),
+            # Klucz paginacji kursorowej (ShoppingListViewSet.cursor_ordering) dla list użytkownika
+            models.Index(fields=['created_by', '-created_at', 'id'], name='shopping_list_cursor_idx'),
         ]
 
     def __str__(self):
@@ -306,13 +402,57 @@ class ShoppingListItem(TimeStampedModel, SoftDeletableMixin):
     )
     is_checked = models.BooleanField(default=False, db_index=True)
 
+    # Kolejność pozycji w odpowiedziach API (prefetch, values(), lista pozycji, eksport)
+    DISPLAY_ORDERING = ('category', 'ingredient_name', 'id')
+
     class Meta:
         verbose_name = "Pozycja listy zakupów"
         verbose_name_plural = "Pozycje list zakupów"
         indexes = [
             models.Index(fields=['shopping_list', 'is_active']),
             models.Index(fields=['shopping_list', 'is_checked']),
+            models.Index(fields=['shopping_list', 'updated_at']),
         ]
 
     def __str__(self):
         return f"{self.ingredient_name} ({self.total_amount} {self.unit.symbol})"
+
+
+class Job(TimeStampedModel):
+    """Zadanie w tle (kolejka oparta o bazę danych)."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Oczekuje'),
+        ('RUNNING', 'W trakcie'),
+        ('SUCCEEDED', 'Zakończone'),
+        ('FAILED', 'Błąd'),
+    ]
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='jobs'
+    )
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default='PENDING'
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=128, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Zadanie w tle"
+        verbose_name_plural = "Zadania w tle"
+        indexes = [
+            models.Index(fields=['status', 'id']),
+            models.Index(fields=['created_by', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
@@ -0,0 +1,149 @@
+"""
+Paginacja kursorowa (keyset) list zwierząt, diet i list zakupów.
+
+Domyślną paginacją API jest PageNumberPagination. Klient wybiera kursor
+parametrem ?pagination=cursor - kolejne strony wskazują linki next/previous
+z parametrem ?cursor=. Strona jest wybierana warunkiem na kluczu sortowania
+widoku (cursor_ordering, np. ('-is_active', '-start_date', 'id')) zamiast
+COUNT(*) i OFFSET, więc jej koszt nie rośnie z numerem strony.
+"""
+import base64
+import binascii
+import json
+import operator
+from functools import reduce
+from typing import List, Optional, Tuple
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.db.models.query import ValuesIterable
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+PAGINATION_PARAMETER = 'pagination'
+CURSOR_PAGINATION = 'cursor'
+
+
+def is_cursor_request(request) -> bool:
+    """Czy klient wybrał paginację kursorową (?pagination=cursor)."""
+    return request.query_params.get(PAGINATION_PARAMETER) == CURSOR_PAGINATION
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginacja po kluczu cursor_ordering widoku.
+
+    Kursor zawiera wartości klucza wiersza granicznego i kierunek, a strona
+    to WHERE klucz > granica ORDER BY klucz LIMIT page_size + 1 (warunek
+    rozpisany na pola, bo kierunki sortowania pól mogą być różne). Ostatnie
+    pole klucza musi być unikalne (id). Parametr ?ordering= jest pomijany.
+
+    Obsługuje querysety modeli i values() (FastListMixin).
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.key_fields = [
+            queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering
+        ]
+        position, reverse = self.decode_cursor(request)
+
+        queryset = self.with_key_columns(queryset)
+        if reverse:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+        else:
+            ordering = list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(view.cursor_ordering)
+
+    def with_key_columns(self, queryset):
+        """Dołącz pola klucza do values() lub only() (np. po ?fields=)."""
+        names = [field.attname for field in self.key_fields]
+        if issubclass(queryset._iterable_class, ValuesIterable):
+            missing = [name for name in names if name not in queryset._fields]
+            return queryset.values(*queryset._fields, *missing) if missing else queryset
+
+        loaded, deferred = queryset.query.deferred_loading
+        if loaded and not deferred:
+            return queryset.only(*loaded, *(field.name for field in self.key_fields))
+        return queryset
+
+    def get_position_filter(self, position: list, reverse: bool) -> Q:
+        """
+        Warunek "po pozycji" w kierunku stronicowania.
+
+        Dla klucza (a, b, id): a < A OR (a = A AND b < B) OR (a = A AND b = B AND
+        id > ID), poprzedzone a <= A, aby indeks był przeszukiwany zakresem.
+        """
+        conditions = []
+        equal = Q()
+        for field, name, value in zip(self.key_fields, self.ordering, position):
+            lookup = 'lt' if name.startswith('-') != reverse else 'gt'
+            conditions.append(equal & Q(**{f'{field.attname}__{lookup}': value}))
+            equal &= Q(**{field.attname: value})
+
+        first = self.key_fields[0].attname
+        first_lookup = 'lte' if self.ordering[0].startswith('-') != reverse else 'gte'
+        return Q(**{f'{first}__{first_lookup}': position[0]}) & reduce(operator.or_, conditions)
+
+    def get_position(self, row) -> list:
+        """Wartości klucza wiersza (instancji lub słownika z values())."""
+        if isinstance(row, dict):
+            return [row[field.attname] for field in self.key_fields]
+        return [getattr(row, field.attname) for field in self.key_fields]
+
+    def decode_cursor(self, request) -> Tuple[Optional[list], bool]:
+        """Pozycja i kierunek z ?cursor= ((None, False) dla pierwszej strony)."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = cursor['p']
+            if not isinstance(values, list) or len(values) != len(self.key_fields):
+                raise ValueError(values)
+            position = [field.to_python(value) for field, value in zip(self.key_fields, values)]
+            if None in position:
+                raise ValueError(values)
+            return position, bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position: List, reverse: bool) -> str:
+        """Link do strony za (lub przed) pozycją."""
+        # default=str - daty i czasy z pełną precyzją (DjangoJSONEncoder obcina mikrosekundy)
+        encoded = base64.urlsafe_b64encode(
+            json.dumps({'p': position, 'r': int(reverse)}, default=str).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
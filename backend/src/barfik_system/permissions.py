@@ -1,7 +1,7 @@
 """Uprawnienia DRF dla aplikacji Barfik."""
 from rest_framework import permissions
-from django.db.models import Q
-from .models import Animal, Collaboration, Diet, Ingredient
+from .models import Animal, AnimalAccess, Collaboration, Diet, Ingredient
+from .access import get_access_map
 
 
 class AnimalAccessMixin:
@@ -11,6 +11,9 @@ class AnimalAccessMixin:
     Zapewnia wspólną logikę dla:
     - Wyodrębniania obiektu Animal z różnych typów modeli
     - Sprawdzania poziomu uprawnień użytkownika do zwierzęcia
+
+    W obsłudze żądania poziom uprawnień pochodzi z mapy dostępu
+    (access.get_access_map) wczytywanej raz na żądanie.
     """
 
     def get_animal_from_object(self, obj):
@@ -31,6 +34,24 @@ class AnimalAccessMixin:
             return obj.animal
         return None
 
+    def get_animal_id_from_object(self, obj):
+        """
+        Wyodrębnij ID zwierzęcia bez pobierania obiektu Animal.
+
+        Args:
+            obj: Obiekt modelu (Animal, Diet, Ingredient, Collaboration)
+
+        Returns:
+            int lub None jeśli nie można określić zwierzęcia
+        """
+        if isinstance(obj, Animal):
+            return obj.id
+        if isinstance(obj, Ingredient):
+            return obj.diet.animal_id
+        if isinstance(obj, (Diet, Collaboration)):
+            return obj.animal_id
+        return None
+
     def get_user_permission_for_animal(self, user, animal):
         """
         Sprawdź poziom uprawnień użytkownika do zwierzęcia.
@@ -47,7 +68,7 @@ class AnimalAccessMixin:
         Returns:
             str: 'OWNER', 'EDIT', 'READ_ONLY' lub None
         """
-        if animal.owner == user:
+        if animal.owner_id == user.id:
             return 'OWNER'
 
         # Sprawdź czy collaborations są już prefetched
@@ -58,14 +79,11 @@ class AnimalAccessMixin:
                     return collaboration.permission
             return None
 
-        # Fallback: query do bazy danych
-        collaboration = Collaboration.objects.filter(
+        # Fallback: jedno zapytanie po unikalnym indeksie projekcji AnimalAccess
+        return AnimalAccess.objects.filter(
             animal=animal,
-            user=user,
-            is_active=True
-        ).values_list('permission', flat=True).first()
-
-        return collaboration
+            user=user
+        ).values_list('level', flat=True).first()
 
 
 class AnimalResourcePermission(permissions.BasePermission, AnimalAccessMixin):
@@ -100,30 +118,30 @@ class AnimalResourcePermission(permissions.BasePermission, AnimalAccessMixin):
 
             if animal_id:
                 try:
-                    animal = Animal.objects.get(id=animal_id, is_active=True)
-
-                    # Właściciel może wszystko
-                    if animal.owner == request.user:
-                        return True
+                    animal_id = int(animal_id)
+                except (TypeError, ValueError):
+                    return False
 
-                    # Współpracownik z EDIT może tworzyć
-                    permission = self.get_user_permission_for_animal(request.user, animal)
-                    return permission == 'EDIT'
+                access_map = get_access_map(request)
 
-                except Animal.DoesNotExist:
-                    # Zwróć False - DRF zwróci 403, co jest OK dla nieistniejącego zasobu
+                # Nieistniejące lub usunięte zwierzę - DRF zwróci 403,
+                # co jest OK dla nieistniejącego zasobu
+                if not access_map.is_active(animal_id):
                     return False
 
+                # Właściciel może wszystko, współpracownik z EDIT może tworzyć
+                return access_map.level(animal_id) in ('OWNER', 'EDIT')
+
         return True
 
     def has_object_permission(self, request, view, obj):
         """Sprawdź uprawnienia na poziomie obiektu."""
-        animal = self.get_animal_from_object(obj)
+        animal_id = self.get_animal_id_from_object(obj)
 
-        if not animal:
+        if not animal_id:
             return False
 
-        permission = self.get_user_permission_for_animal(request.user, animal)
+        permission = get_access_map(request).level(animal_id)
 
         if not permission:
             return False
@@ -233,20 +251,23 @@ class IsShoppingListOwner(permissions.BasePermission):
             shopping_list = obj
 
         # Twórca ma pełny dostęp
-        if shopping_list.created_by == request.user:
+        if shopping_list.created_by_id == request.user.id:
             return True
 
-        # Optymalizacja: Sprawdź dostęp do diet na liście jednym zapytaniem
-        # zamiast pętli po każdej diecie
-        accessible_diets_exists = shopping_list.diets.filter(
-            Q(animal__owner=request.user) |
-            Q(animal__collaborations__user=request.user,
-              animal__collaborations__is_active=True),
+        access_map = get_access_map(request)
+
+        # Diety pobrane przez prefetch_related - sprawdzenie bez zapytania
+        if 'diets' in getattr(shopping_list, '_prefetched_objects_cache', {}):
+            return any(
+                diet.is_active and diet.animal_id in access_map
+                for diet in shopping_list.diets.all()
+            )
+
+        return shopping_list.diets.filter(
+            animal_id__in=access_map.animal_ids,
             is_active=True
         ).exists()
 
-        return accessible_diets_exists
-
 
 def has_access_to_animal(user, animal):
     """
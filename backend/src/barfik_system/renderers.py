@@ -0,0 +1,105 @@
+"""
+Renderer i parser JSON na orjson - zamienniki JSONRenderer i JSONParser DRF.
+
+Wynik jest bajtowo identyczny ze standardowymi klasami: typy spoza JSON
+(datetime, date, time, Decimal, UUID, napisy leniwe) formatuje
+JSONEncoder.default DRF, a przypadki, w których orjson zachowuje się inaczej
+niż moduł json, obsługuje standardowa implementacja. Bez zainstalowanego
+orjson klasy działają jak klasy bazowe.
+"""
+import io
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson jest opcjonalny
+    orjson = None
+
+# Cyfry zamieniane na 0 przed wyszukiwaniem wzorców liczb (bytes.translate
+# i wyszukiwanie podciągu są wielokrotnie szybsze niż wyrażenie regularne)
+DIGITS_TO_ZERO = bytes.maketrans(b'123456789', b'000000000')
+# orjson zapisuje floaty z wykładnikiem bez znaku i zer (1e16, 1e-7 zamiast
+# 1e+16, 1e-07), a wartości z zakresu [1e-5, 1e-4) bez wykładnika (0.00001
+# zamiast 1e-05). Dopasowanie wewnątrz napisu powoduje jedynie użycie
+# standardowego renderera.
+EXPONENT_MARKER = b'0e'
+SMALL_FLOAT_MARKER = b'0.0000'
+# Liczba całkowita poza zakresem 64 bitów (orjson zamienia ją na float)
+LONG_INTEGER_MARKER = b'0' * 19
+
+# Wspólny prefiks UTF-8 znaków U+2000-U+203F (m.in. U+2028 i U+2029)
+SEPARATOR_PREFIX = b'\xe2\x80'
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer na orjson.
+
+    Standardowy renderer jest używany dla wcięć (?indent / Accept z indent),
+    ustawień UNICODE_JSON=False lub COMPACT_JSON=False, kluczy słowników
+    innych niż str, liczb całkowitych powyżej 64 bitów i liczb w notacji
+    wykładniczej lub mniejszych od 1e-4. Wartości NaN i Infinity orjson
+    zapisuje jako null (JSONRenderer zgłasza ValueError) - API ich nie
+    zwraca, DecimalField serializowane są jako napisy.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if SMALL_FLOAT_MARKER in ret or EXPONENT_MARKER in ret.translate(DIGITS_TO_ZERO):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Jak JSONRenderer - separatory wierszy i akapitów zawsze escapowane
+        if SEPARATOR_PREFIX in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser na orjson.
+
+    Treść w kodowaniu innym niż UTF-8, tryb STRICT_JSON=False, długie liczby
+    całkowite i błędy składni obsługuje standardowy parser (ten sam komunikat
+    ParseError).
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+
+        if LONG_INTEGER_MARKER not in body.translate(DIGITS_TO_ZERO):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+
+        return super().parse(io.BytesIO(body), media_type, parser_context)
@@ -1,18 +1,234 @@
 """Serializery DRF dla aplikacji Barfik."""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 from rest_framework import serializers
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from drf_spectacular.utils import extend_schema_field
 from drf_spectacular.types import OpenApiTypes
 from .models import (
     AnimalType, Unit, IngredientCategory, Animal, Diet, 
-    Ingredient, Collaboration, ShoppingList, ShoppingListItem
+    Ingredient, Collaboration, ShoppingList, ShoppingListItem, Job
 )
+from .compact import INCLUDED_KEY
+from .dictionaries import get_dictionaries
+from .expressions import SubqueryCount
+from .fieldsets import (
+    get_expanded_paths, get_field_selection, get_sparse_request, has_sparse_parameters
+)
+
+
+class DictionaryPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Pole PK słownika rozwiązywane ze snapshotu słowników procesu.
+
+    Queryset służy jedynie do generowania schematu i listy wyboru - walidacja
+    nie wykonuje zapytań, dopóki ID jest znane snapshotowi.
+    """
+
+    # Mapa w DictionarySnapshot -> argument get_dictionaries()
+    REQUIRED_IDS_ARGUMENTS = {
+        'units': 'unit_ids',
+        'animal_types': 'animal_type_ids',
+        'categories': 'category_ids',
+    }
+
+    def __init__(self, dictionary, **kwargs):
+        self.dictionary = dictionary
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        snapshot = get_dictionaries(**{self.REQUIRED_IDS_ARGUMENTS[self.dictionary]: [pk]})
+        instance = getattr(snapshot, self.dictionary).get(pk)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
+class AnnotatedFieldMixin:
+    """
+    Pole tylko do odczytu czytane z adnotacji querysetu (np. Count,
+    SubqueryCount, Sum).
+
+    Widoki z SerializerAnnotationsMixin nakładają adnotację automatycznie
+    (nazwa adnotacji = source pola). Dla obiektu bez adnotacji (np. świeżo
+    utworzonego) wartość jest liczona osobnym zapytaniem.
+    """
+
+    def __init__(self, annotation, **kwargs):
+        self.annotation = annotation
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        try:
+            return getattr(instance, self.source)
+        except AttributeError:
+            return type(instance)._base_manager.filter(pk=instance.pk).annotate(
+                **{self.source: self.annotation}
+            ).values_list(self.source, flat=True).get()
+
+
+class AnnotatedIntegerField(AnnotatedFieldMixin, serializers.IntegerField):
+    """Liczba całkowita z adnotacji querysetu (np. Count)."""
+
+
+def get_serializer_annotations(serializer_class, context=None) -> dict:
+    """
+    Zwróć adnotacje zadeklarowane w polach serializera: {source: wyrażenie}.
+
+    Args:
+        serializer_class: Klasa serializera
+        context: Kontekst serializera (pola pominięte przez ?fields= nie są liczone)
+    """
+    return {
+        field.source: field.annotation
+        for field in serializer_class(context=context or {}).fields.values()
+        if isinstance(field, AnnotatedFieldMixin)
+    }
+
+
+class SparseFieldsMixin:
+    """
+    Obsługa ?fields= i ?expand= (fieldsets.py) w serializerze i jego
+    zagnieżdżonych serializerach.
+
+    Pola spoza ?fields= są usuwane z serializera, a pola z expandable_fields
+    wskazane w ?expand= zastępowane zagnieżdżonym serializerem.
+    """
+    # {pole: (serializer rozwinięcia, ścieżki select_related dla widoku)}
+    expandable_fields = {}
+
+    def get_field_path(self) -> tuple:
+        """Ścieżka serializera od korzenia, np. ('ingredients', 'unit')."""
+        path = []
+        field = self
+        while field.parent is not None:
+            # Element ListSerializer ma pustą nazwę pola
+            if field.field_name:
+                path.append(field.field_name)
+            field = field.parent
+        return tuple(reversed(path))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = get_sparse_request(self.context)
+        if request is None or not has_sparse_parameters(request):
+            return fields
+
+        path = self.get_field_path()
+        expanded = get_expanded_paths(request)
+        for name, (serializer_class, _) in self.expandable_fields.items():
+            if '.'.join(path + (name,)) in expanded:
+                fields[name] = serializer_class(read_only=True)
+
+        selection = get_field_selection(request, path)
+        if selection is not None:
+            for name in list(fields):
+                if name not in selection:
+                    del fields[name]
+        return fields
+
+
+class IncludedDictionaries:
+    """
+    Obiekty słowników użyte w odpowiedzi w trybie kompaktowym (compact.py).
+
+    DictionaryReferenceField zapisuje ID, a render() zwraca blok included:
+    {mapa DictionarySnapshot: [obiekty posortowane po ID]}.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.serializers = {}
+
+    def add(self, dictionary: str, pk: int, serializer) -> None:
+        self.ids.setdefault(dictionary, set()).add(pk)
+        # Pierwszy związany serializer słownika (z wyborem pól z ?fields=)
+        self.serializers.setdefault(dictionary, serializer)
+
+    def render(self) -> dict:
+        snapshot = get_dictionaries(**{
+            DictionaryPrimaryKeyRelatedField.REQUIRED_IDS_ARGUMENTS[dictionary]: ids
+            for dictionary, ids in self.ids.items()
+        })
+        included = {}
+        for dictionary, ids in self.ids.items():
+            dictionary_map = getattr(snapshot, dictionary)
+            to_representation = self.serializers[dictionary].to_representation
+            # ID zawsze w obiekcie, także gdy ?fields= go pomija
+            included[dictionary] = [
+                {'id': pk, **to_representation(dictionary_map[pk])}
+                for pk in sorted(ids) if pk in dictionary_map
+            ]
+        return included
+
+
+class DictionaryReferenceField(serializers.Field):
+    """
+    ID obiektu słownika w trybie kompaktowym; obiekt trafia do
+    IncludedDictionaries z kontekstu serializera.
+
+    Wartość czytana jest z kolumny klucza obcego (<source>_id), bez
+    dołączania tabeli słownika do zapytania.
+    """
+
+    def __init__(self, dictionary, serializer, **kwargs):
+        self.dictionary = dictionary
+        self.serializer = serializer
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def bind(self, field_name, parent):
+        super().bind(field_name, parent)
+        # Serializer obiektu pod tą samą ścieżką - ?fields= obejmuje też included
+        self.serializer.bind(field_name, parent)
+
+    def get_attribute(self, instance):
+        return getattr(instance, f'{self.source}_id')
+
+    def to_representation(self, value):
+        # ID z get_attribute albo instancja ze snapshotu (ValuesListSerializer)
+        pk = getattr(value, 'pk', value)
+        self.context[INCLUDED_KEY].add(self.dictionary, pk, self.serializer)
+        return pk
+
+
+class DictionaryReferencesMixin:
+    """
+    Tryb kompaktowy w serializerze: pola z dictionary_references są
+    zastępowane przez DictionaryReferenceField, gdy kontekst zawiera
+    IncludedDictionaries (CompactResponseMixin widoku).
+    """
+    # {pole: mapa DictionarySnapshot}
+    dictionary_references = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if INCLUDED_KEY not in self.context:
+            return fields
+
+        for name, dictionary in self.dictionary_references.items():
+            if name in fields:
+                fields[name] = DictionaryReferenceField(dictionary, fields[name])
+        return fields
 
 
 # User & Auth Serializers
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla profilu użytkownika."""
     
     class Meta:
@@ -55,7 +271,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
 # Dictionary Serializers
 
-class AnimalTypeSerializer(serializers.ModelSerializer):
+class AnimalTypeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla gatunków zwierząt."""
     
     class Meta:
@@ -64,16 +280,16 @@ class AnimalTypeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class UnitSerializer(serializers.ModelSerializer):
+class UnitSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla jednostek miar."""
     
     class Meta:
         model = Unit
-        fields = ['id', 'name', 'symbol', 'conversion_factor']
+        fields = ['id', 'name', 'symbol', 'conversion_factor', 'dimension']
         read_only_fields = ['id']
 
 
-class IngredientCategorySerializer(serializers.ModelSerializer):
+class IngredientCategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla kategorii składników."""
     
     class Meta:
@@ -84,11 +300,14 @@ class IngredientCategorySerializer(serializers.ModelSerializer):
 
 # Main Model Serializers
 
-class AnimalListSerializer(serializers.ModelSerializer):
+class AnimalListSerializer(DictionaryReferencesMixin, SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla listy zwierząt (uproszczony)."""
     species = AnimalTypeSerializer(read_only=True)
     owner_email = serializers.EmailField(source='owner.email', read_only=True)
     
+    expandable_fields = {'owner': (UserSerializer, ())}
+    dictionary_references = {'species': 'animal_types'}
+    
     class Meta:
         model = Animal
         fields = [
@@ -99,16 +318,19 @@ class AnimalListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at', 'owner']
 
 
-class AnimalDetailSerializer(serializers.ModelSerializer):
+class AnimalDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla szczegółów zwierzęcia."""
     species = AnimalTypeSerializer(read_only=True)
-    species_id = serializers.PrimaryKeyRelatedField(
+    species_id = DictionaryPrimaryKeyRelatedField(
+        'animal_types',
         queryset=AnimalType.objects.all(),
         source='species',
         write_only=True
     )
     owner_email = serializers.EmailField(source='owner.email', read_only=True)
     
+    expandable_fields = {'owner': (UserSerializer, ())}
+    
     class Meta:
         model = Animal
         fields = [
@@ -127,7 +349,8 @@ class AnimalDetailSerializer(serializers.ModelSerializer):
 
 class AnimalCreateSerializer(serializers.ModelSerializer):
     """Serializer dla tworzenia zwierzęcia."""
-    species_id = serializers.PrimaryKeyRelatedField(
+    species_id = DictionaryPrimaryKeyRelatedField(
+        'animal_types',
         queryset=AnimalType.objects.all(),
         source='species'
     )
@@ -137,11 +360,16 @@ class AnimalCreateSerializer(serializers.ModelSerializer):
         fields = ['species_id', 'name', 'date_of_birth', 'weight_kg', 'note']
 
 
-class CollaborationSerializer(serializers.ModelSerializer):
+class CollaborationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla współpracy."""
     user_email = serializers.EmailField(source='user.email', read_only=True)
     animal_name = serializers.CharField(source='animal.name', read_only=True)
     
+    expandable_fields = {
+        'user': (UserSerializer, ()),
+        'animal': (AnimalListSerializer, ('animal__species', 'animal__owner')),
+    }
+    
     class Meta:
         model = Collaboration
         fields = [
@@ -163,22 +391,26 @@ class CollaborationSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(DictionaryReferencesMixin, SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla składników."""
     category = IngredientCategorySerializer(read_only=True)
-    category_id = serializers.PrimaryKeyRelatedField(
+    category_id = DictionaryPrimaryKeyRelatedField(
+        'categories',
         queryset=IngredientCategory.objects.all(),
         source='category',
         required=False,
         allow_null=True
     )
     unit = UnitSerializer(read_only=True)
-    unit_id = serializers.PrimaryKeyRelatedField(
+    unit_id = DictionaryPrimaryKeyRelatedField(
+        'units',
         queryset=Unit.objects.all(),
         source='unit',
         write_only=True
     )
     
+    dictionary_references = {'unit': 'units', 'category': 'categories'}
+    
     class Meta:
         model = Ingredient
         fields = [
@@ -193,10 +425,46 @@ class IngredientSerializer(serializers.ModelSerializer):
         ]
 
 
-class DietListSerializer(serializers.ModelSerializer):
+class IngredientBulkItemSerializer(serializers.Serializer):
+    """
+    Składnik w zapisie zbiorczym.
+    
+    ID jednostek i kategorii są sprawdzane zbiorczo w serwisie, a nie
+    osobnym zapytaniem dla każdej pozycji.
+    """
+    id = serializers.IntegerField(required=False, help_text='ID istniejącego składnika (aktualizacja)')
+    name = serializers.CharField(max_length=128)
+    category_id = serializers.IntegerField(required=False, allow_null=True)
+    cooking_method = serializers.ChoiceField(choices=Ingredient.COOKING_CHOICES)
+    unit_id = serializers.IntegerField()
+    amount = serializers.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        min_value=Decimal('0.001')
+    )
+
+
+class IngredientBulkSerializer(serializers.Serializer):
+    """Serializer dla zbiorczego zapisu składników diety."""
+    ingredients = IngredientBulkItemSerializer(many=True)
+    
+    def validate_ingredients(self, value):
+        """Sprawdź czy ID składników się nie powtarzają."""
+        ids = [item['id'] for item in value if item.get('id')]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('ID składników nie mogą się powtarzać.')
+        return value
+
+
+class DietListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla listy diet (uproszczony)."""
     animal_name = serializers.CharField(source='animal.name', read_only=True)
-    ingredients_count = serializers.SerializerMethodField()
+    ingredients_count = AnnotatedIntegerField(
+        SubqueryCount(Ingredient.objects.filter(diet=OuterRef('pk'), is_active=True)),
+        help_text='Liczba aktywnych składników'
+    )
+    
+    expandable_fields = {'animal': (AnimalListSerializer, ('animal__species', 'animal__owner'))}
     
     class Meta:
         model = Diet
@@ -209,17 +477,15 @@ class DietListSerializer(serializers.ModelSerializer):
             'id', 'total_daily_mass', 
             'created_at', 'updated_at'
         ]
-    
-    def get_ingredients_count(self, obj):
-        """Liczba aktywnych składników."""
-        return obj.ingredients.filter(is_active=True).count()
 
 
-class DietDetailSerializer(serializers.ModelSerializer):
+class DietDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla szczegółów diety z listą składników."""
     animal_name = serializers.CharField(source='animal.name', read_only=True)
     ingredients = IngredientSerializer(many=True, read_only=True)
     
+    expandable_fields = {'animal': (AnimalListSerializer, ('animal__species', 'animal__owner'))}
+    
     class Meta:
         model = Diet
         fields = [
@@ -270,10 +536,85 @@ class DietCreateSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class ShoppingListItemSerializer(serializers.ModelSerializer):
+class DietCloneSerializer(serializers.Serializer):
+    """Serializer dla klonowania diety."""
+    start_date = serializers.DateField()
+    end_date = serializers.DateField(required=False, allow_null=True)
+    animal_id = serializers.PrimaryKeyRelatedField(
+        queryset=Animal.objects.filter(is_active=True),
+        source='animal',
+        required=False,
+        help_text='Zwierzę docelowe (domyślnie zwierzę diety źródłowej)'
+    )
+    scale = serializers.DecimalField(
+        max_digits=8,
+        decimal_places=3,
+        min_value=Decimal('0.001'),
+        default=Decimal('1'),
+        help_text='Mnożnik ilości składników'
+    )
+    description = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, attrs):
+        """Walidacja zakresu dat."""
+        start_date = attrs.get('start_date')
+        end_date = attrs.get('end_date')
+        
+        if end_date and start_date and start_date > end_date:
+            raise serializers.ValidationError({
+                'end_date': 'Data rozpoczęcia nie może być późniejsza niż data zakończenia.'
+            })
+        
+        return attrs
+
+
+class DietCompositionEntrySerializer(serializers.Serializer):
+    """Udział kategorii i metody obróbki w diecie."""
+    category_id = serializers.IntegerField(allow_null=True)
+    category_code = serializers.CharField()
+    category_name = serializers.CharField()
+    cooking_method = serializers.CharField()
+    dimension = serializers.CharField(help_text='Wymiar jednostki (mass/volume/count)')
+    amount_in_base_unit = serializers.DecimalField(max_digits=12, decimal_places=3)
+    percentage = serializers.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        help_text='Udział w sumie diety w tym samym wymiarze'
+    )
+
+
+class DietCompositionSerializer(serializers.Serializer):
+    """Skład diety."""
+    diet_id = serializers.IntegerField()
+    composition = DietCompositionEntrySerializer(many=True)
+
+
+class DietCompositionQuerySerializer(serializers.Serializer):
+    """Parametry zapytania o skład wielu diet (?ids=1,2,3)."""
+    MAX_IDS = 100
+    
+    ids = serializers.CharField()
+    
+    def validate_ids(self, value):
+        """Zamień listę ID rozdzielonych przecinkami na listę liczb."""
+        try:
+            ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+        except ValueError:
+            raise serializers.ValidationError('Podaj ID diet rozdzielone przecinkami.')
+        
+        if not ids:
+            raise serializers.ValidationError('Podaj co najmniej jedno ID diety.')
+        if len(ids) > self.MAX_IDS:
+            raise serializers.ValidationError(f'Można pobrać skład najwyżej {self.MAX_IDS} diet.')
+        return ids
+
+
+class ShoppingListItemSerializer(DictionaryReferencesMixin, SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla pozycji listy zakupów."""
     unit = UnitSerializer(read_only=True)
     
+    dictionary_references = {'unit': 'units'}
+    
     class Meta:
         model = ShoppingListItem
         fields = [
@@ -284,11 +625,24 @@ class ShoppingListItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ShoppingListSerializer(serializers.ModelSerializer):
+class ShoppingListItemCheckSerializer(serializers.Serializer):
+    """Docelowy stan zaznaczenia pojedynczej pozycji."""
+    id = serializers.IntegerField()
+    is_checked = serializers.BooleanField()
+
+
+class ShoppingListItemBulkCheckSerializer(serializers.Serializer):
+    """Serializer dla zbiorczego zaznaczania/odznaczania pozycji."""
+    items = ShoppingListItemCheckSerializer(many=True, allow_empty=False)
+
+
+class ShoppingListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer dla listy zakupów."""
     items = ShoppingListItemSerializer(many=True, read_only=True)
     diets_info = serializers.SerializerMethodField()
     
+    expandable_fields = {'created_by': (UserSerializer, ('created_by',))}
+    
     class Meta:
         model = ShoppingList
         fields = [
@@ -312,6 +666,11 @@ class ShoppingListSerializer(serializers.ModelSerializer):
     })
     def get_diets_info(self, obj):
         """Informacje o dietach na liście."""
+        # Diety z services.get_shopping_list_prefetches() - bez zapytań na liście
+        if 'diets' in getattr(obj, '_prefetched_objects_cache', {}):
+            diets = [diet for diet in obj.diets.all() if diet.is_active]
+        else:
+            diets = obj.diets.filter(is_active=True).select_related('animal')
         return [
             {
                 'id': diet.id,
@@ -319,7 +678,7 @@ class ShoppingListSerializer(serializers.ModelSerializer):
                 'start_date': diet.start_date,
                 'end_date': diet.end_date
             }
-            for diet in obj.diets.filter(is_active=True)
+            for diet in diets
         ]
     
     def validate_days_count(self, value):
@@ -353,6 +712,83 @@ class ShoppingListCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class JobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Serializer dla statusu zadania w tle."""
+    
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'result', 'error', 'attempts',
+            'created_at', 'started_at', 'finished_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+# Delta Sync Serializers
+
+SYNC_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class SyncVersionField(serializers.Field):
+    """
+    Znacznik synchronizacji delta.
+    
+    Reprezentowany jako liczba mikrosekund od epoki (version); na wejściu
+    przyjmuje version albo datetime w ISO 8601.
+    """
+    
+    def to_representation(self, value):
+        return (value - SYNC_EPOCH) // timedelta(microseconds=1)
+    
+    def to_internal_value(self, data):
+        data = str(data).strip()
+        
+        if data.isdigit():
+            return SYNC_EPOCH + timedelta(microseconds=int(data))
+        
+        # '+' ze strefy czasowej w nieenkodowanym query stringu zamienia się na spację
+        parsed = parse_datetime(data.replace(' ', '+'))
+        if parsed is None:
+            raise serializers.ValidationError(
+                'Niepoprawny format - oczekiwano version lub daty ISO 8601.'
+            )
+        
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+
+class ShoppingListChangesQuerySerializer(serializers.Serializer):
+    """Parametry zapytania o zmiany (?since=)."""
+    since = SyncVersionField(required=False)
+
+
+class ShoppingListItemChangeSerializer(ShoppingListItemSerializer):
+    """Pozycja w strumieniu zmian (z ID listy; is_active=False oznacza usunięcie)."""
+    
+    class Meta(ShoppingListItemSerializer.Meta):
+        fields = ['shopping_list'] + ShoppingListItemSerializer.Meta.fields
+
+
+class ShoppingListChangeSerializer(serializers.ModelSerializer):
+    """Lista zakupów w strumieniu zmian (bez pozycji)."""
+    
+    class Meta:
+        model = ShoppingList
+        fields = [
+            'id', 'title', 'days_count', 'is_completed',
+            'is_active', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class ShoppingListChangesSerializer(serializers.Serializer):
+    """Odpowiedź synchronizacji delta."""
+    version = SyncVersionField(help_text='Znacznik do przekazania jako kolejne since')
+    shopping_lists = ShoppingListChangeSerializer(many=True)
+    items = ShoppingListItemChangeSerializer(many=True)
+
+
 # Dashboard Serializers
 
 class DashboardStatsSerializer(serializers.Serializer):
@@ -399,3 +835,179 @@ class DashboardSerializer(serializers.Serializer):
     """Główny serializer dla dashboardu."""
     stats = DashboardStatsSerializer()
     alerts = DashboardAlertsSerializer()
+
+
+# Fast List Serializers
+
+class ValuesListSerializer:
+    """
+    Serializacja list tylko do odczytu z wierszy queryset.values().
+
+    Kształt odpowiedzi jest wyprowadzany z pól serializer_class, a wartości
+    formatowane ich to_representation() - JSON jest identyczny jak z
+    ModelSerializer, ale bez tworzenia instancji modeli i zagnieżdżonych
+    serializerów dla każdego wiersza. Obiekty słowników (dictionary_fields)
+    są dołączane w pamięci ze snapshotu słowników, a pola relacji wiele i
+    pola metod (related_fields) zbiorczo dla całej strony w get_related().
+
+    Example:
+        serializer = AnimalListValuesSerializer()
+        data = serializer.serialize(serializer.values(queryset)[:100])
+    """
+    serializer_class = None
+    # {pole: mapa DictionarySnapshot} - obiekt słownika z kolumny <source>_id
+    dictionary_fields = {}
+    # Pola wypełniane przez get_related() (brak wpisu = pusta lista)
+    related_fields = ()
+
+    def __init__(self, context=None, serializer=None):
+        """
+        Args:
+            context: Kontekst serializera (request - ?fields=)
+            serializer: Instancja serializera (np. związany element listy
+                zagnieżdżonej); domyślnie serializer_class(context=context)
+        """
+        self.context = context or {}
+        self.serializer = serializer or self.serializer_class(context=self.context)
+        self.columns = ['id']
+        self.dictionary_columns = {}
+        self.dictionary_serializers = {}
+        self.getters = []
+        for field in self.serializer.fields.values():
+            if not field.write_only:
+                self.getters.append((field.field_name, self._build_getter(field)))
+        self.field_names = {name for name, _ in self.getters}
+
+    def _add_column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def _build_getter(self, field):
+        """Funkcja (wiersz, related) -> wartość pola w odpowiedzi."""
+        name = field.field_name
+
+        if name in self.related_fields:
+            return lambda row, related: related[name].get(row['id'], [])
+
+        if name in self.dictionary_fields:
+            column = f'{field.source}_id'
+            self._add_column(column)
+            self.dictionary_columns[name] = column
+            self.dictionary_serializers[name] = field
+            return lambda row, related: related[name].get(row[column])
+
+        if isinstance(field, (
+            serializers.BaseSerializer,
+            serializers.SerializerMethodField,
+            serializers.ManyRelatedField
+        )):
+            raise ImproperlyConfigured(
+                f'{type(self).__name__}: pole {name} wymaga dictionary_fields lub related_fields'
+            )
+
+        column = field.source.replace('.', '__')
+        self._add_column(column)
+
+        # values() zwraca klucz główny - tak jak PrimaryKeyRelatedField
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            return lambda row, related: row[column]
+
+        to_representation = field.to_representation
+
+        def getter(row, related):
+            value = row[column]
+            return None if value is None else to_representation(value)
+        return getter
+
+    def values(self, queryset):
+        """Queryset wierszy z kolumnami potrzebnymi do serializacji."""
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def get_related(self, rows) -> dict:
+        """Wartości related_fields dla wierszy: {pole: {id: wartość}}."""
+        return {}
+
+    def get_dictionary_objects(self, rows) -> dict:
+        """Zserializowane obiekty słowników użyte w wierszach: {pole: {id: dane}}."""
+        ids = {
+            name: {row[column] for row in rows if row[column] is not None}
+            for name, column in self.dictionary_columns.items()
+        }
+        required = {}
+        for name in ids:
+            argument = DictionaryPrimaryKeyRelatedField.REQUIRED_IDS_ARGUMENTS[self.dictionary_fields[name]]
+            required.setdefault(argument, set()).update(ids[name])
+        snapshot = get_dictionaries(**required)
+
+        objects = {}
+        for name, pks in ids.items():
+            dictionary_map = getattr(snapshot, self.dictionary_fields[name])
+            # Związany serializer pola - z wyborem pól z ?fields=
+            to_representation = self.dictionary_serializers[name].to_representation
+            objects[name] = {pk: to_representation(dictionary_map[pk]) for pk in pks}
+        return objects
+
+    def serialize(self, rows) -> list:
+        """Zserializuj wiersze z values() do listy słowników."""
+        rows = list(rows)
+        related = self.get_related(rows)
+        if self.dictionary_columns:
+            related.update(self.get_dictionary_objects(rows))
+        getters = self.getters
+        return [
+            {name: getter(row, related) for name, getter in getters}
+            for row in rows
+        ]
+
+
+class AnimalListValuesSerializer(ValuesListSerializer):
+    """AnimalListSerializer z wierszy values() - gatunek ze snapshotu słowników."""
+    serializer_class = AnimalListSerializer
+    dictionary_fields = {'species': 'animal_types'}
+
+
+class DietListValuesSerializer(ValuesListSerializer):
+    """DietListSerializer z wierszy values() - ingredients_count z adnotacji querysetu."""
+    serializer_class = DietListSerializer
+
+
+class ShoppingListItemValuesSerializer(ValuesListSerializer):
+    """ShoppingListItemSerializer z wierszy values() - jednostka ze snapshotu słowników."""
+    serializer_class = ShoppingListItemSerializer
+    dictionary_fields = {'unit': 'units'}
+
+
+class ShoppingListValuesSerializer(ValuesListSerializer):
+    """ShoppingListSerializer z wierszy values() - diety i pozycje dwoma zapytaniami na stronę."""
+    serializer_class = ShoppingListSerializer
+    related_fields = ('diets', 'diets_info', 'items')
+
+    def get_related(self, rows) -> dict:
+        ids = [row['id'] for row in rows]
+        related = {name: defaultdict(list) for name in self.related_fields}
+
+        if self.field_names & {'diets', 'diets_info'}:
+            diets = Diet.objects.filter(shopping_lists__in=ids).values(
+                'id', 'shopping_lists', 'animal__name', 'start_date', 'end_date'
+            ).order_by(*ShoppingList.DIETS_ORDERING)
+            for diet in diets:
+                related['diets'][diet['shopping_lists']].append(diet['id'])
+                related['diets_info'][diet['shopping_lists']].append({
+                    'id': diet['id'],
+                    'animal_name': diet['animal__name'],
+                    'start_date': diet['start_date'],
+                    'end_date': diet['end_date']
+                })
+
+        if 'items' in self.field_names:
+            item_serializer = ShoppingListItemValuesSerializer(
+                self.context,
+                serializer=self.serializer.fields['items'].child
+            )
+            items = list(ShoppingListItem.objects.filter(shopping_list_id__in=ids).values(
+                *item_serializer.columns, 'shopping_list_id'
+            ).order_by(*ShoppingListItem.DISPLAY_ORDERING))
+            for item, data in zip(items, item_serializer.serialize(items)):
+                related['items'][item['shopping_list_id']].append(data)
+
+        return related
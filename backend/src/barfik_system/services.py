@@ -1,12 +1,65 @@
 """Warstwa serwisowa dla logiki biznesowej Barfik."""
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
 from decimal import Decimal
-from typing import List, Dict
-from django.db import transaction
-from django.db.models import Sum, Q
+from typing import List, Dict, Optional
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+from django.db.models import Sum, Min, Q, Value, Exists, OuterRef, Prefetch, Subquery, DecimalField
+from django.db.models.functions import Coalesce, Lower, Now, NullIf, Round, Trim
 from .models import (
     Diet, Ingredient, ShoppingList, ShoppingListItem, 
-    Collaboration, Animal, Unit
+    Collaboration, Animal, AnimalAccess, Unit
 )
+from .units import AMOUNT_QUANTUM, get_conversion_table
+from .dictionaries import get_dictionaries
+from .access import AccessMap
+from . import caching
+
+
+def recalculate_diet_totals(diet_ids) -> int:
+    """
+    Przelicz total_daily_mass wielu diet jednym UPDATE z podzapytaniem.
+    
+    total_daily_mass = suma amount_in_base_unit aktywnych składników
+    (0 dla diety bez składników). update() nie wysyła sygnałów, więc cache
+    odpowiedzi użytkowników tych diet jest unieważniany jawnie.
+    
+    Args:
+        diet_ids: ID diet do przeliczenia
+    
+    Returns:
+        int: Liczba zaktualizowanych diet
+    """
+    diet_ids = list(diet_ids)
+    if not diet_ids:
+        return 0
+    
+    total = Ingredient.objects.filter(
+        diet_id=OuterRef('pk'),
+        is_active=True
+    ).values('diet_id').annotate(
+        total=Sum('amount_in_base_unit')
+    ).values('total')
+    
+    updated = Diet.all_objects.filter(id__in=diet_ids).update(
+        total_daily_mass=Coalesce(
+            Subquery(total),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=12, decimal_places=3)
+        ),
+        updated_at=timezone.now()
+    )
+    
+    if updated:
+        caching.invalidate_for_animals(
+            Diet.all_objects.filter(id__in=diet_ids).values('animal_id')
+        )
+    
+    return updated
 
 
 def recalculate_diet_total(diet_id: int) -> Decimal:
@@ -19,29 +72,49 @@ def recalculate_diet_total(diet_id: int) -> Decimal:
     Returns:
         Decimal: Nowa wartość total_daily_mass
     """
-    try:
-        diet = Diet.objects.get(id=diet_id)
-        
-        # Suma amount_in_base_unit wszystkich aktywnych składników
-        total = Ingredient.objects.filter(
-            diet=diet,
-            is_active=True
-        ).aggregate(
-            total=Sum('amount_in_base_unit')
-        )['total'] or Decimal('0')
-        
-        # Aktualizuj dietę
-        diet.total_daily_mass = total
-        diet.save(update_fields=['total_daily_mass', 'updated_at'])
-        
-        return total
-    except Diet.DoesNotExist:
+    if not recalculate_diet_totals([diet_id]):
         return Decimal('0')
+    
+    return Diet.all_objects.values_list('total_daily_mass', flat=True).get(id=diet_id)
+
+
+_pending_recalculation = threading.local()
+
+
+def _flush_diet_recalculation() -> None:
+    """Przelicz wszystkie diety oznaczone od ostatniego przeliczenia."""
+    diet_ids = getattr(_pending_recalculation, 'diet_ids', None)
+    if not diet_ids:
+        return
+    
+    _pending_recalculation.diet_ids = set()
+    recalculate_diet_totals(diet_ids)
+
+
+def schedule_diet_recalculation(diet_id: int) -> None:
+    """
+    Oznacz dietę do przeliczenia po zatwierdzeniu transakcji.
+    
+    Diety oznaczone w trakcie transakcji są przeliczane raz, jednym
+    UPDATE (recalculate_diet_totals) w transaction.on_commit. Poza
+    transakcją przeliczenie następuje od razu. Po rollbacku oznaczone ID
+    zostają w zbiorze i są przeliczane przy kolejnym commicie - ponowne
+    przeliczenie jest nieszkodliwe.
+    
+    Args:
+        diet_id: ID diety
+    """
+    if not hasattr(_pending_recalculation, 'diet_ids'):
+        _pending_recalculation.diet_ids = set()
+    
+    _pending_recalculation.diet_ids.add(diet_id)
+    # Pierwszy wykonany callback przelicza wszystko, kolejne są pustymi wywołaniami
+    transaction.on_commit(_flush_diet_recalculation)
 
 
 def create_ingredient(diet_id: int, **ingredient_data) -> Ingredient:
     """
-    Utwórz składnik i zaktualizuj total_daily_mass diety.
+    Utwórz składnik; total_daily_mass diety jest przeliczany po commicie.
     
     Args:
         diet_id: ID diety
@@ -53,20 +126,16 @@ def create_ingredient(diet_id: int, **ingredient_data) -> Ingredient:
     with transaction.atomic():
         diet = Diet.objects.select_for_update().get(id=diet_id)
         
-        ingredient = Ingredient.objects.create(
+        # Sygnał post_save oznacza dietę do przeliczenia
+        return Ingredient.objects.create(
             diet=diet,
             **ingredient_data
         )
-        
-        # Przelicz total dla diety
-        recalculate_diet_total(diet_id)
-        
-        return ingredient
 
 
 def update_ingredient(ingredient_id: int, **update_data) -> Ingredient:
     """
-    Zaktualizuj składnik i przelicz total_daily_mass diety.
+    Zaktualizuj składnik; total_daily_mass diety jest przeliczany po commicie.
     
     Args:
         ingredient_id: ID składnika
@@ -81,17 +150,15 @@ def update_ingredient(ingredient_id: int, **update_data) -> Ingredient:
         for key, value in update_data.items():
             setattr(ingredient, key, value)
         
+        # Sygnał post_save oznacza dietę do przeliczenia
         ingredient.save()
         
-        # Przelicz total dla diety
-        recalculate_diet_total(ingredient.diet.id)
-        
         return ingredient
 
 
 def delete_ingredient(ingredient_id: int) -> bool:
     """
-    Soft delete składnika i przelicz total_daily_mass diety.
+    Soft delete składnika; total_daily_mass diety jest przeliczany po commicie.
     
     Args:
         ingredient_id: ID składnika
@@ -101,18 +168,409 @@ def delete_ingredient(ingredient_id: int) -> bool:
     """
     with transaction.atomic():
         try:
-            ingredient = Ingredient.objects.select_related('diet').get(id=ingredient_id)
-            diet_id = ingredient.diet.id
-            
-            ingredient.is_active = False
-            ingredient.save(update_fields=['is_active', 'updated_at'])
-            
-            # Przelicz total dla diety
-            recalculate_diet_total(diet_id)
-            
-            return True
+            ingredient = Ingredient.objects.get(id=ingredient_id)
         except Ingredient.DoesNotExist:
             return False
+        
+        # Sygnał post_save oznacza dietę do przeliczenia
+        ingredient.is_active = False
+        ingredient.save(update_fields=['is_active', 'updated_at'])
+        
+        return True
+
+
+@transaction.atomic
+def bulk_save_ingredients(
+    diet: Diet,
+    items: List[Dict],
+    replace: bool = False
+) -> List[Ingredient]:
+    """
+    Zbiorczo utwórz, zaktualizuj i (przy replace) usuń składniki diety.
+    
+    ID jednostek i kategorii są sprawdzane w snapshocie słowników procesu
+    (porównanym ze znacznikiem wersji w bazie); amount_in_base_unit liczone
+    jest w pamięci.
+    Zapis odbywa się przez bulk_create/bulk_update, a total_daily_mass
+    diety przeliczany jest raz, po commicie.
+    
+    Args:
+        diet: Dieta (uprawnienia sprawdzone wcześniej)
+        items: Dane składników; pozycje z 'id' aktualizują istniejące
+        replace: Czy usunąć (soft delete) aktywne składniki spoza listy
+    
+    Returns:
+        list: Aktywne składniki diety po zapisie
+    
+    Raises:
+        ValueError: Przy nieznanych jednostkach/kategoriach lub składnikach
+            spoza diety
+    """
+    unit_ids = {data['unit_id'] for data in items}
+    category_ids = {data['category_id'] for data in items if data.get('category_id')}
+    dictionaries = get_dictionaries(unit_ids=unit_ids, category_ids=category_ids, verify=True)
+    table = dictionaries.conversion_table
+    unknown_units = sorted(unit_id for unit_id in unit_ids if unit_id not in table)
+    if unknown_units:
+        raise ValueError(
+            f'Nieznane jednostki: {", ".join(str(i) for i in unknown_units)}'
+        )
+    
+    unknown_categories = sorted(
+        category_id for category_id in category_ids if category_id not in dictionaries.categories
+    )
+    if unknown_categories:
+        raise ValueError(
+            f'Nieznane kategorie: {", ".join(str(i) for i in unknown_categories)}'
+        )
+    
+    existing = {
+        ingredient.id: ingredient
+        for ingredient in Ingredient.objects.select_for_update().filter(
+            diet=diet,
+            is_active=True
+        )
+    }
+    
+    missing = sorted({data['id'] for data in items if data.get('id')} - set(existing))
+    if missing:
+        raise ValueError(
+            f'Składniki nie należą do tej diety: {", ".join(str(i) for i in missing)}'
+        )
+    
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    
+    for data in items:
+        values = {
+            'name': data['name'],
+            'category_id': data.get('category_id'),
+            'cooking_method': data['cooking_method'],
+            'unit_id': data['unit_id'],
+            'amount': data['amount'],
+            'amount_in_base_unit': (
+                data['amount'] * table.factor(data['unit_id'])
+            ).quantize(AMOUNT_QUANTUM),
+        }
+        
+        ingredient = existing.pop(data['id'], None) if data.get('id') else None
+        if ingredient is None:
+            to_create.append(Ingredient(diet=diet, **values))
+            continue
+        
+        if any(getattr(ingredient, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(ingredient, field, value)
+            ingredient.updated_at = now
+            to_update.append(ingredient)
+    
+    if to_create:
+        Ingredient.objects.bulk_create(to_create)
+    
+    if to_update:
+        Ingredient.objects.bulk_update(
+            to_update,
+            ['name', 'category', 'cooking_method', 'unit', 'amount',
+             'amount_in_base_unit', 'updated_at']
+        )
+    
+    to_delete = list(existing) if replace else []
+    if to_delete:
+        Ingredient.objects.filter(id__in=to_delete).update(is_active=False, updated_at=now)
+    
+    # Operacje zbiorcze nie wysyłają sygnałów - przeliczenie i cache jawnie
+    if to_create or to_update or to_delete:
+        schedule_diet_recalculation(diet.id)
+        caching.invalidate_for_animals([diet.animal_id])
+    
+    return list(
+        Ingredient.objects.filter(
+            diet=diet,
+            is_active=True
+        ).select_related('unit', 'category').order_by('name', 'id')
+    )
+
+
+def _copy_diet_ingredients(source_diet_id: int, target_diet_id: int, scale: Decimal) -> int:
+    """
+    Skopiuj aktywne składniki diety jednym INSERT ... SELECT.
+    
+    Lista kolumn budowana jest z metadanych modelu. Ilość jest skalowana
+    i zaokrąglana do precyzji pola, a amount_in_base_unit liczone tak jak
+    w Ingredient.save (ilość * conversion_factor jednostki).
+    
+    Returns:
+        int: Liczba skopiowanych składników
+    """
+    qn = connection.ops.quote_name
+    
+    def column(model, name):
+        return qn(model._meta.get_field(name).column)
+    
+    ingredient_table = qn(Ingredient._meta.db_table)
+    unit_table = qn(Unit._meta.db_table)
+    amount_field = Ingredient._meta.get_field('amount')
+    places = amount_field.decimal_places
+    scaled_amount = f'ROUND(i.{qn(amount_field.column)} * %s, {places})'
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    
+    columns = []
+    selects = []
+    params = []
+    for field in Ingredient._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        
+        columns.append(qn(field.column))
+        if field.name == 'diet':
+            selects.append('%s')
+            params.append(target_diet_id)
+        elif field.name == 'amount':
+            selects.append(scaled_amount)
+            params.append(scale)
+        elif field.name == 'amount_in_base_unit':
+            selects.append(f'ROUND({scaled_amount} * u.{column(Unit, "conversion_factor")}, {places})')
+            params.append(scale)
+        elif field.name in ('created_at', 'updated_at'):
+            selects.append('%s')
+            params.append(now)
+        else:
+            selects.append(f'i.{qn(field.column)}')
+    
+    sql = (
+        f'INSERT INTO {ingredient_table} ({", ".join(columns)}) '
+        f'SELECT {", ".join(selects)} '
+        f'FROM {ingredient_table} i '
+        f'INNER JOIN {unit_table} u ON u.{column(Unit, "id")} = i.{column(Ingredient, "unit")} '
+        f'WHERE i.{column(Ingredient, "diet")} = %s AND i.{column(Ingredient, "is_active")} = %s'
+    )
+    params.extend([source_diet_id, True])
+    
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+@transaction.atomic
+def clone_diet(
+    source: Diet,
+    start_date,
+    end_date=None,
+    animal: Animal = None,
+    scale: Decimal = Decimal('1'),
+    description: str = None
+) -> Diet:
+    """
+    Sklonuj dietę ze składnikami (np. na kolejny okres).
+    
+    Składniki kopiowane są po stronie bazy jednym INSERT ... SELECT, bez
+    Ingredient.save() i sygnałów; total_daily_mass nowej diety ustawiany
+    jest jednym UPDATE.
+    
+    Args:
+        source: Dieta źródłowa (uprawnienia sprawdzone wcześniej)
+        start_date: Data rozpoczęcia nowej diety
+        end_date: Data zakończenia (opcjonalna)
+        animal: Zwierzę docelowe (domyślnie zwierzę diety źródłowej)
+        scale: Mnożnik ilości składników
+        description: Opis (domyślnie opis diety źródłowej)
+    
+    Returns:
+        Diet: Nowa dieta
+    """
+    diet = Diet.objects.create(
+        animal=animal or source.animal,
+        start_date=start_date,
+        end_date=end_date,
+        description=source.description if description is None else description
+    )
+    
+    if _copy_diet_ingredients(source.id, diet.id, scale):
+        recalculate_diet_totals([diet.id])
+        diet.refresh_from_db(fields=['total_daily_mass', 'updated_at'])
+    
+    return diet
+
+
+def compute_diet_compositions(diet_ids) -> Dict[int, List[Dict]]:
+    """
+    Policz skład diet (kategoria x metoda obróbki) w bazie danych.
+    
+    Suma amount_in_base_unit jest grupowana po diecie, kategorii, metodzie
+    obróbki i wymiarze jednostki; udział procentowy liczony jest w SQL
+    względem sumy diety w tym samym wymiarze (masy nie miesza się ze
+    sztukami).
+    
+    Args:
+        diet_ids: ID diet
+    
+    Returns:
+        dict: {diet_id: [wiersze składu]} - również dla diet bez składników
+    """
+    diet_ids = list(diet_ids)
+    
+    dimension_total = Ingredient.objects.filter(
+        diet_id=OuterRef('diet_id'),
+        unit__dimension=OuterRef('unit__dimension'),
+        is_active=True
+    ).values('diet_id').annotate(
+        total=Sum('amount_in_base_unit')
+    ).values('total')
+    
+    rows = Ingredient.objects.filter(
+        diet_id__in=diet_ids,
+        is_active=True
+    ).values(
+        'diet_id', 'category_id', 'category__code', 'category__name',
+        'cooking_method', 'unit__dimension'
+    ).annotate(
+        total=Sum('amount_in_base_unit'),
+        percentage=Round(
+            Sum('amount_in_base_unit') * Value(Decimal('100'))
+            / NullIf(Subquery(dimension_total), Value(Decimal('0'))),
+            2,
+            output_field=DecimalField(max_digits=6, decimal_places=2)
+        )
+    ).order_by('diet_id', 'unit__dimension', '-total', 'category__name', 'cooking_method')
+    
+    compositions = {diet_id: [] for diet_id in diet_ids}
+    for row in rows:
+        compositions[row['diet_id']].append({
+            'category_id': row['category_id'],
+            'category_code': row['category__code'] or '',
+            'category_name': row['category__name'] or '',
+            'cooking_method': row['cooking_method'],
+            'dimension': row['unit__dimension'],
+            'amount_in_base_unit': row['total'],
+            'percentage': row['percentage'],
+        })
+    
+    return compositions
+
+
+def get_diet_compositions(diets) -> Dict[int, List[Dict]]:
+    """
+    Zwróć skład diet, korzystając z cache.
+    
+    Klucz cache zawiera updated_at diety, który zmienia się przy każdym
+    przeliczeniu total_daily_mass (czyli przy każdej zmianie składników),
+    więc wpis jest unieważniany bez jawnego usuwania. Znacznik globalny
+    unieważnia wpisy po zmianie kategorii lub jednostek.
+    
+    Args:
+        diets: Diety (wymagane pola id i updated_at)
+    
+    Returns:
+        dict: {diet_id: [wiersze składu]}
+    """
+    generation = caching.get_global_generation() if caching.is_enabled() else ''
+    return caching.cached_many(
+        {
+            diet.id: caching.DIET_COMPOSITION_KEY.format(
+                diet_id=diet.id,
+                version=int(diet.updated_at.timestamp() * 1_000_000),
+                generation=generation
+            )
+            for diet in diets
+        },
+        compute_diet_compositions
+    )
+
+
+def _shopping_list_item_key(name: str, dimension: str) -> tuple:
+    """Klucz agregacji/porównania pozycji: znormalizowana nazwa i wymiar jednostki."""
+    return (name.strip().lower(), dimension)
+
+
+def aggregate_ingredients(diet_ids, days_count: int) -> List[Dict]:
+    """
+    Zagreguj aktywne składniki diet po stronie bazy danych.
+    
+    Grupowanie i sumowanie odbywa się w SQL (values() + Sum) po
+    znormalizowanej nazwie (lower + trim) oraz jednostce - bez budowania
+    instancji modeli. Wiersze są następnie scalane w Pythonie po nazwie
+    i wymiarze jednostki (tabela konwersji z units.py, bez dodatkowych
+    zapytań), a suma w jednostce bazowej jest przeliczana na jednostkę
+    prezentacji wybraną deterministycznie spośród użytych jednostek.
+    Klucz nazwy jest normalizowany ponownie w Pythonie, bo lower()
+    w SQLite obsługuje tylko znaki ASCII.
+    
+    Args:
+        diet_ids: Lista ID diet lub queryset zwracający ID
+        days_count: Liczba dni (mnożnik ilości)
+    
+    Returns:
+        list: Słowniki z kluczami name, category, dimension, unit_id, total_amount
+    """
+    rows = list(
+        Ingredient.objects.filter(
+            diet_id__in=diet_ids,
+            diet__is_active=True,
+            is_active=True
+        ).annotate(
+            normalized_name=Lower(Trim('name'))
+        ).values(
+            'normalized_name', 'unit_id'
+        ).annotate(
+            name=Min('name'),
+            category_name=Coalesce(Min('category__name'), Value('')),
+            total=Sum('amount_in_base_unit')
+        ).order_by('normalized_name', 'unit_id')
+    )
+    
+    table = get_conversion_table({row['unit_id'] for row in rows})
+    
+    aggregated = {}
+    for row in rows:
+        dimension = table.dimension(row['unit_id'])
+        key = _shopping_list_item_key(row['normalized_name'], dimension)
+        
+        if key not in aggregated:
+            aggregated[key] = {
+                'name': row['name'].strip(),
+                'category': row['category_name'],
+                'dimension': dimension,
+                'unit_ids': set(),
+                'total_in_base_unit': Decimal('0')
+            }
+        
+        aggregated[key]['unit_ids'].add(row['unit_id'])
+        aggregated[key]['total_in_base_unit'] += row['total'] or Decimal('0')
+    
+    result = []
+    for data in aggregated.values():
+        unit_id = table.choose_display_unit(data['unit_ids'])
+        result.append({
+            'name': data['name'],
+            'category': data['category'],
+            'dimension': data['dimension'],
+            'unit_id': unit_id,
+            'total_amount': table.from_base(
+                data['total_in_base_unit'] * days_count,
+                unit_id
+            )
+        })
+    
+    return result
+
+
+def _build_shopping_list_items(
+    shopping_list: ShoppingList,
+    aggregated: List[Dict]
+) -> List[ShoppingListItem]:
+    """Zbuduj (niezapisane) pozycje listy zakupów z wyniku agregacji."""
+    return [
+        ShoppingListItem(
+            shopping_list=shopping_list,
+            ingredient_name=data['name'],
+            category=data['category'],
+            unit_id=data['unit_id'],
+            total_amount=data['total_amount'],
+            is_checked=False
+        )
+        for data in aggregated
+    ]
 
 
 @transaction.atomic
@@ -126,10 +584,9 @@ def generate_shopping_list(
     Wygeneruj listę zakupów z wybranych diet.
     
     Logika:
-    1. Zbierz wszystkie aktywne składniki z wybranych diet
-    2. Pomnóż amount_in_base_unit przez days_count
-    3. Agreguj po ingredient_name (case-insensitive, normalized)
-    4. Utwórz ShoppingList i ShoppingListItem
+    1. Zagreguj aktywne składniki wybranych diet w bazie (aggregate_ingredients)
+    2. Pomnóż sumy amount_in_base_unit przez days_count
+    3. Utwórz ShoppingList i ShoppingListItem (bulk_create)
     
     Args:
         user: Użytkownik tworzący listę
@@ -140,40 +597,17 @@ def generate_shopping_list(
     Returns:
         ShoppingList: Utworzona lista zakupów
     """
-    # Pobierz diety
-    diets = Diet.objects.filter(
-        id__in=diet_ids,
-        is_active=True
-    ).prefetch_related('ingredients')
+    active_diet_ids = list(
+        Diet.objects.filter(
+            id__in=diet_ids,
+            is_active=True
+        ).values_list('id', flat=True)
+    )
     
-    if not diets.exists():
+    if not active_diet_ids:
         raise ValueError('Nie znaleziono aktywnych diet.')
     
-    # Zbierz składniki z wszystkich diet
-    ingredients = Ingredient.objects.filter(
-        diet__in=diets,
-        is_active=True
-    ).select_related('unit', 'category')
-    
-    # Agreguj składniki po nazwie (case-insensitive)
-    aggregated = {}
-    
-    for ingredient in ingredients:
-        # Normalizacja nazwy (lowercase, trim)
-        normalized_name = ingredient.name.strip().lower()
-        
-        if normalized_name not in aggregated:
-            aggregated[normalized_name] = {
-                'name': ingredient.name,  # Zachowaj oryginalną nazwę pierwszego wystąpienia
-                'category': ingredient.category.name if ingredient.category else '',  # Kopia nazwy kategorii
-                'unit': ingredient.unit,
-                'total_amount': Decimal('0')
-            }
-        
-        # Dodaj amount pomnożony przez days_count
-        aggregated[normalized_name]['total_amount'] += (
-            ingredient.amount_in_base_unit * days_count
-        )
+    aggregated = aggregate_ingredients(active_diet_ids, days_count)
     
     # Utwórz ShoppingList
     shopping_list = ShoppingList.objects.create(
@@ -184,127 +618,412 @@ def generate_shopping_list(
     )
     
     # Dodaj diety do M2M
-    shopping_list.diets.set(diets)
-    
-    # Utwórz ShoppingListItem dla każdego zagregowanego składnika
-    items = []
-    for data in aggregated.values():
-        items.append(
-            ShoppingListItem(
-                shopping_list=shopping_list,
-                ingredient_name=data['name'],
-                category=data['category'],
-                unit=data['unit'],
-                total_amount=data['total_amount'],
-                is_checked=False
-            )
-        )
+    shopping_list.diets.set(active_diet_ids)
     
     # Bulk create dla wydajności
-    ShoppingListItem.objects.bulk_create(items)
+    ShoppingListItem.objects.bulk_create(
+        _build_shopping_list_items(shopping_list, aggregated)
+    )
+    
+    # bulk_create nie wysyła sygnałów - unieważnij cache jawnie
+    caching.invalidate_for_shopping_lists([shopping_list.id])
     
     return shopping_list
 
 
+def _apply_shopping_list_diff(
+    shopping_list: ShoppingList,
+    aggregated: List[Dict]
+) -> bool:
+    """
+    Nanieś wynik agregacji na istniejące pozycje listy (tryb przyrostowy).
+    
+    - zmienione ilości/jednostki/kategorie: bulk_update (is_checked bez zmian)
+    - nowe nazwy: bulk_create
+    - nazwy, których już nie ma: soft delete jednym update()
+    - duplikaty jednej nazwy i wymiaru (np. wiersze w g i kg): zostaje
+      najstarszy, pozostałe są scalane w niego i usuwane (soft delete)
+    
+    Args:
+        shopping_list: Lista zakupów
+        aggregated: Wynik aggregate_ingredients
+    
+    Returns:
+        bool: True jeśli dodano, zmieniono lub usunięto pozycje
+    """
+    now = timezone.now()
+    active_items = list(shopping_list.items.filter(is_active=True).order_by('id'))
+    table = get_conversion_table({item.unit_id for item in active_items})
+    existing = defaultdict(list)
+    for item in active_items:
+        existing[_shopping_list_item_key(item.ingredient_name, table.dimension(item.unit_id))].append(item)
+    
+    to_create = []
+    to_update = []
+    to_retire = []
+    
+    for data in aggregated:
+        items = existing.pop(_shopping_list_item_key(data['name'], data['dimension']), None)
+        
+        if not items:
+            to_create.append(data)
+            continue
+        
+        item, duplicates = items[0], items[1:]
+        # Scalona pozycja jest kupiona tylko gdy kupione były wszystkie wiersze
+        is_checked = all(row.is_checked for row in items)
+        to_retire.extend(duplicates)
+        
+        if (
+            item.total_amount != data['total_amount']
+            or item.unit_id != data['unit_id']
+            or item.category != data['category']
+            or item.is_checked != is_checked
+        ):
+            item.total_amount = data['total_amount']
+            item.unit_id = data['unit_id']
+            item.category = data['category']
+            item.is_checked = is_checked
+            item.updated_at = now
+            to_update.append(item)
+    
+    if to_update:
+        ShoppingListItem.objects.bulk_update(
+            to_update,
+            ['total_amount', 'unit', 'category', 'is_checked', 'updated_at']
+        )
+    
+    if to_create:
+        ShoppingListItem.objects.bulk_create(
+            _build_shopping_list_items(shopping_list, to_create)
+        )
+    
+    # Pozycje, które zniknęły z diet, i scalone duplikaty (soft delete)
+    for items in existing.values():
+        to_retire.extend(items)
+    if to_retire:
+        ShoppingListItem.objects.filter(
+            id__in=[item.id for item in to_retire]
+        ).update(is_active=False, updated_at=now)
+    
+    return bool(to_create or to_update or to_retire)
+
+
 @transaction.atomic
-def regenerate_shopping_list(shopping_list_id: int) -> ShoppingList:
+def regenerate_shopping_list(
+    shopping_list_id: int,
+    incremental: bool = False
+) -> ShoppingList:
     """
     Przelicz listę zakupów po zmianie diet lub days_count.
     
+    Tryb pełny usuwa (soft delete) wszystkie pozycje i tworzy je od nowa.
+    Tryb przyrostowy (incremental=True) porównuje nową agregację z aktywnymi
+    pozycjami i zapisuje tylko różnice, zachowując stan is_checked.
+    
     Args:
         shopping_list_id: ID listy zakupów
+        incremental: Czy użyć trybu przyrostowego (diff)
     
     Returns:
         ShoppingList: Zaktualizowana lista
     """
-    shopping_list = ShoppingList.objects.prefetch_related(
-        'diets', 'items'
+    shopping_list = ShoppingList.objects.get(id=shopping_list_id)
+    
+    aggregated = aggregate_ingredients(
+        shopping_list.diets.values('id'),
+        shopping_list.days_count
+    )
+    
+    if incremental:
+        changed = _apply_shopping_list_diff(shopping_list, aggregated)
+    else:
+        # Usuń stare pozycje (soft delete, updated_at dla synchronizacji delta)
+        shopping_list.items.update(is_active=False, updated_at=timezone.now())
+        
+        ShoppingListItem.objects.bulk_create(
+            _build_shopping_list_items(shopping_list, aggregated)
+        )
+        changed = True
+    
+    # Odznacz is_completed jeśli była zaznaczona, a lista się zmieniła
+    if changed and shopping_list.is_completed:
+        shopping_list.is_completed = False
+        shopping_list.save(update_fields=['is_completed', 'updated_at'])
+    
+    # Operacje zbiorcze nie wysyłają sygnałów - unieważnij cache jawnie
+    if changed:
+        caching.invalidate_for_shopping_lists([shopping_list.id])
+    
+    return shopping_list
+
+
+def get_shopping_list_prefetches(with_units: bool = True) -> List[Prefetch]:
+    """
+    Plan prefetch dla serializacji ShoppingList (ShoppingListSerializer).
+    
+    Diety ze zwierzętami i aktywne pozycje z jednostkami - stała liczba
+    zapytań niezależnie od liczby list, diet i pozycji. Kolejność jak
+    w ShoppingListValuesSerializer (DIETS_ORDERING, DISPLAY_ORDERING).
+    
+    Args:
+        with_units: Dołącz jednostki pozycji (tryb kompaktowy bierze je ze snapshotu słowników)
+    
+    Returns:
+        list: Obiekty Prefetch dla prefetch_related()
+    """
+    items = ShoppingListItem.objects.filter(is_active=True).order_by(
+        *ShoppingListItem.DISPLAY_ORDERING
+    )
+    if with_units:
+        items = items.select_related('unit')
+    return [
+        Prefetch(
+            'diets',
+            queryset=Diet.objects.filter(is_active=True).select_related('animal').order_by(
+                *ShoppingList.DIETS_ORDERING
+            )
+        ),
+        Prefetch('items', queryset=items),
+    ]
+
+
+def get_shopping_list_for_output(shopping_list_id: int) -> ShoppingList:
+    """
+    Pobierz listę zakupów gotową do serializacji (z planem prefetch).
+    
+    Args:
+        shopping_list_id: ID listy zakupów
+    
+    Returns:
+        ShoppingList: Lista z prefetchowanymi dietami i pozycjami
+    """
+    return ShoppingList.objects.prefetch_related(
+        *get_shopping_list_prefetches()
     ).get(id=shopping_list_id)
+
+
+def set_items_checked(
+    shopping_list: ShoppingList,
+    states: Dict[int, bool]
+) -> List[ShoppingListItem]:
+    """
+    Ustaw is_checked dla wielu pozycji listy jednym bulk_update.
     
-    # Usuń stare pozycje (soft delete)
-    shopping_list.items.update(is_active=False)
+    Args:
+        shopping_list: Lista zakupów (uprawnienia sprawdzone wcześniej)
+        states: Mapa {item_id: is_checked}
     
-    # Wygeneruj nowe pozycje
-    diets = shopping_list.diets.filter(is_active=True)
-    days_count = shopping_list.days_count
+    Returns:
+        list: Pozycje, których stan faktycznie się zmienił
     
-    # Zbierz składniki
-    ingredients = Ingredient.objects.filter(
-        diet__in=diets,
-        is_active=True
-    ).select_related('unit', 'category')
+    Raises:
+        ValueError: Jeśli któraś pozycja nie należy do listy lub jest nieaktywna
+    """
+    items = list(
+        shopping_list.items.filter(
+            id__in=states.keys(),
+            is_active=True
+        ).select_related('unit')
+    )
     
-    # Agreguj
-    aggregated = {}
-    for ingredient in ingredients:
-        normalized_name = ingredient.name.strip().lower()
-        
-        if normalized_name not in aggregated:
-            aggregated[normalized_name] = {
-                'name': ingredient.name,
-                'category': ingredient.category.name if ingredient.category else '',
-                'unit': ingredient.unit,
-                'total_amount': Decimal('0')
-            }
-        
-        aggregated[normalized_name]['total_amount'] += (
-            ingredient.amount_in_base_unit * days_count
+    missing = set(states) - {item.id for item in items}
+    if missing:
+        raise ValueError(
+            f'Pozycje nie należą do tej listy: {", ".join(str(i) for i in sorted(missing))}'
         )
     
-    # Utwórz nowe pozycje
-    items = []
-    for data in aggregated.values():
-        items.append(
-            ShoppingListItem(
-                shopping_list=shopping_list,
-                ingredient_name=data['name'],
-                category=data['category'],
-                unit=data['unit'],
-                total_amount=data['total_amount'],
-                is_checked=False
-            )
+    now = timezone.now()
+    changed = []
+    for item in items:
+        if item.is_checked != states[item.id]:
+            item.is_checked = states[item.id]
+            item.updated_at = now
+            changed.append(item)
+    
+    if changed:
+        ShoppingListItem.objects.bulk_update(changed, ['is_checked', 'updated_at'])
+        caching.invalidate_for_shopping_lists([shopping_list.id])
+    
+    return changed
+
+
+def get_shopping_list_changes(user, since=None, shopping_list_id: int = None) -> Dict:
+    """
+    Zwróć zmiany list zakupów i pozycji od podanego momentu (synchronizacja delta).
+    
+    Zwracane są rekordy, których updated_at >= since - BARFIK_SYNC_OVERLAP_SECONDS,
+    łącznie z usuniętymi (is_active=False) jako "tombstones". Bez since
+    zwracany jest pełny stan aktywnych rekordów. Klient przekazuje zwrócone
+    version jako kolejne since i deduplikuje rekordy po id.
+    
+    updated_at jest ustalany w chwili zapisu, a nie commitu - transakcja
+    zatwierdzona po odczycie może mieć znacznik sprzed version. Okno
+    nakładania ponownie wysyła rekordy z tego okresu; powinno obejmować
+    najdłuższą transakcję zapisu i rozbieżność zegarów serwerów.
+    
+    Args:
+        user: Użytkownik (twórca list)
+        since: Datetime ostatniej synchronizacji lub None
+        shopping_list_id: Ogranicz do jednej listy (opcjonalnie)
+    
+    Returns:
+        dict: {'version': datetime, 'shopping_lists': QuerySet, 'items': QuerySet}
+    """
+    # Czas serwera bazy, ustalany przed zapytaniami - wspólny dla wszystkich procesów API
+    version = User.objects.filter(pk=user.pk).annotate(now=Now()).values_list('now', flat=True).get()
+    
+    shopping_lists = ShoppingList.all_objects.filter(created_by=user)
+    items = ShoppingListItem.all_objects.filter(
+        shopping_list__created_by=user
+    ).select_related('unit')
+    
+    if shopping_list_id is not None:
+        shopping_lists = shopping_lists.filter(id=shopping_list_id)
+        items = items.filter(shopping_list_id=shopping_list_id)
+    
+    if since is None:
+        shopping_lists = shopping_lists.filter(is_active=True)
+        items = items.filter(is_active=True, shopping_list__is_active=True)
+    else:
+        since -= timedelta(seconds=getattr(settings, 'BARFIK_SYNC_OVERLAP_SECONDS', 60))
+        shopping_lists = shopping_lists.filter(updated_at__gte=since)
+        items = items.filter(updated_at__gte=since)
+    
+    return {
+        'version': version,
+        'shopping_lists': shopping_lists.order_by('updated_at', 'id'),
+        'items': items.order_by('updated_at', 'id'),
+    }
+
+
+def sync_owner_access(animal: Animal, created: bool = False) -> None:
+    """
+    Utrzymaj wpis OWNER w AnimalAccess po zapisie zwierzęcia.
+    
+    Args:
+        animal: Zapisane zwierzę
+        created: Czy zwierzę zostało właśnie utworzone
+    """
+    if created:
+        AnimalAccess.objects.create(animal_id=animal.id, user_id=animal.owner_id, level='OWNER')
+    elif not AnimalAccess.objects.filter(
+        animal_id=animal.id,
+        user_id=animal.owner_id,
+        level='OWNER'
+    ).exists():
+        # Zmiana właściciela - odbuduj wszystkie wpisy zwierzęcia
+        rebuild_animal_access([animal.id])
+
+
+def refresh_animal_access(animal_id: int, user_id: int) -> None:
+    """
+    Przelicz wpis AnimalAccess jednej pary (zwierzę, użytkownik).
+    
+    Poziom wynika z Animal.owner (OWNER) albo aktywnej Collaboration;
+    bez żadnego z nich wpis jest usuwany. Wywoływane przez sygnały
+    Collaboration w transakcji zapisu.
+    
+    Args:
+        animal_id: ID zwierzęcia
+        user_id: ID użytkownika
+    """
+    if Animal.all_objects.filter(id=animal_id, owner_id=user_id).exists():
+        level = 'OWNER'
+    else:
+        level = Collaboration.objects.filter(
+            animal_id=animal_id,
+            user_id=user_id,
+            is_active=True
+        ).order_by('id').values_list('permission', flat=True).first()
+    
+    if level is None:
+        AnimalAccess.objects.filter(animal_id=animal_id, user_id=user_id).delete()
+    else:
+        AnimalAccess.objects.update_or_create(
+            animal_id=animal_id,
+            user_id=user_id,
+            defaults={'level': level}
         )
+
+
+def rebuild_animal_access(animal_ids) -> int:
+    """
+    Odbuduj wszystkie wpisy AnimalAccess podanych zwierząt.
     
-    ShoppingListItem.objects.bulk_create(items)
+    Używane po zmianie właściciela zwierzęcia i przez komendę
+    rebuild_animal_access (porcjami ID).
     
-    # Odznacz is_completed jeśli była zaznaczona
-    if shopping_list.is_completed:
-        shopping_list.is_completed = False
-        shopping_list.save(update_fields=['is_completed', 'updated_at'])
+    Args:
+        animal_ids: ID zwierząt
     
-    return shopping_list
+    Returns:
+        int: Liczba zapisanych wpisów
+    """
+    animal_ids = list(animal_ids)
+    
+    with transaction.atomic():
+        levels = {}
+        for animal_id, user_id, permission in Collaboration.objects.filter(
+            animal_id__in=animal_ids,
+            is_active=True
+        ).order_by('id').values_list('animal_id', 'user_id', 'permission'):
+            levels.setdefault((animal_id, user_id), permission)
+        # Właściciel ma pierwszeństwo przed współpracą
+        for animal_id, owner_id in Animal.all_objects.filter(
+            id__in=animal_ids
+        ).values_list('id', 'owner_id'):
+            levels[(animal_id, owner_id)] = 'OWNER'
+        
+        AnimalAccess.objects.filter(animal_id__in=animal_ids).delete()
+        AnimalAccess.objects.bulk_create([
+            AnimalAccess(animal_id=animal_id, user_id=user_id, level=level)
+            for (animal_id, user_id), level in levels.items()
+        ])
+    
+    return len(levels)
 
 
-def get_accessible_animals(user) -> Q:
+def get_accessible_animals(user, access_map: Optional[AccessMap] = None) -> Q:
     """
     Zwróć Q object filtrujący zwierzęta dostępne dla użytkownika.
     
+    Z mapą dostępu żądania (access.get_access_map) filtr jest listą ID,
+    bez niej - JOIN-em z AnimalAccess po unikalnym indeksie (user, animal).
+    Żadna z form nie powiela wierszy, więc distinct() jest zbędne.
+    
     Args:
         user: Obiekt użytkownika
+        access_map: Mapa dostępu użytkownika wczytana dla żądania
     
     Returns:
         Q: Django Q object dla filtrowania
     """
-    return Q(owner=user) | Q(
-        collaborations__user=user,
-        collaborations__is_active=True
-    )
+    if access_map is not None:
+        return Q(id__in=access_map.animal_ids)
+    
+    return Q(accesses__user=user)
 
 
-def get_accessible_diets(user) -> Q:
+def get_accessible_diets(user, access_map: Optional[AccessMap] = None) -> Q:
     """
     Zwróć Q object filtrujący diety dostępne dla użytkownika.
     
+    Z mapą dostępu żądania (access.get_access_map) filtr jest listą ID
+    zwierząt, bez niej - podzapytaniem po indeksie (user, animal) projekcji
+    AnimalAccess (bez JOIN-a przez Animal), więc distinct() jest zbędne.
+    
     Args:
         user: Obiekt użytkownika
+        access_map: Mapa dostępu użytkownika wczytana dla żądania
     
     Returns:
         Q: Django Q object dla filtrowania
     """
-    return Q(animal__owner=user) | Q(
-        animal__collaborations__user=user,
-        animal__collaborations__is_active=True
-    )
+    if access_map is not None:
+        return Q(animal_id__in=access_map.animal_ids)
+    
+    return Q(animal_id__in=AnimalAccess.objects.filter(user=user).values('animal_id'))
 
 
 def validate_collaboration(animal: Animal, user) -> Dict:
@@ -367,141 +1086,131 @@ def create_collaboration(animal: Animal, user, permission: str = 'READ_ONLY') ->
     return collaboration
 
 
-def get_dashboard_stats(user) -> Dict:
+def get_dashboard_stats(user, access_map: Optional[AccessMap] = None) -> Dict:
     """
     Pobierz statystyki dla dashboardu użytkownika.
     
+    Liczba zapytań jest stała (niezależna od liczby zwierząt, diet i list):
+    liczniki to warunkowe agregaty Count(filter=Q(...)), "brak aktywnej
+    diety" to adnotacja Exists, a alerty używają select_related.
+    Dostępność jest filtrowana przez podzapytania id__in, więc JOIN-y
+    przez Collaboration nie mnożą wierszy i nie jest potrzebne distinct().
+    
     Args:
         user: Obiekt użytkownika
+        access_map: Mapa dostępu użytkownika wczytana dla żądania
     
     Returns:
         dict: Słownik ze statystykami, szybkimi akcjami i alertami
     """
-    from datetime import date, timedelta
     from django.db.models import Count
     
     today = date.today()
     week_from_now = today + timedelta(days=7)
+    week_ago = today - timedelta(days=7)
     
-    # Filtr dla dostępnych zwierząt
-    animals_filter = get_accessible_animals(user)
+    # Podzapytania ID dostępnych zasobów
+    accessible_animal_ids = Animal.all_objects.filter(
+        get_accessible_animals(user, access_map)
+    ).values('id')
     
-    # Filtr dla dostępnych diet
-    diets_filter = get_accessible_diets(user)
+    accessible_shopping_list_ids = ShoppingList.all_objects.filter(
+        diets__animal_id__in=accessible_animal_ids
+    ).values('id')
     
-    # 1. Statystyki
-    stats = {
-        # Liczba aktywnych zwierząt
-        'animals_count': Animal.objects.filter(
-            animals_filter,
-            is_active=True
-        ).distinct().count(),
-        
-        # Liczba aktywnych diet (obowiązujących dziś)
-        'active_diets_count': Diet.objects.filter(
-            diets_filter,
-            is_active=True,
-            start_date__lte=today
-        ).filter(
-            Q(end_date__isnull=True) | Q(end_date__gte=today)
-        ).distinct().count(),
-        
-        # Liczba diet wygasających w ciągu 7 dni
-        'expiring_diets_count': Diet.objects.filter(
-            diets_filter,
-            is_active=True,
-            end_date__isnull=False,
-            end_date__gte=today,
-            end_date__lte=week_from_now
-        ).distinct().count(),
-        
-        # Liczba aktywnych list zakupów
-        'active_shopping_lists_count': ShoppingList.objects.filter(
-            Q(created_by=user) | Q(diets__animal__owner=user) | Q(
-                diets__animal__collaborations__user=user,
-                diets__animal__collaborations__is_active=True
-            ),
-            is_active=True,
-            is_completed=False
-        ).distinct().count(),
-        
-        # Liczba ukończonych list zakupów w bieżącym miesiącu
-        'completed_shopping_lists_count': ShoppingList.objects.filter(
-            Q(created_by=user) | Q(diets__animal__owner=user) | Q(
-                diets__animal__collaborations__user=user,
-                diets__animal__collaborations__is_active=True
-            ),
-            is_active=True,
+    active_today = Q(start_date__lte=today) & (
+        Q(end_date__isnull=True) | Q(end_date__gte=today)
+    )
+    expiring_soon = Q(
+        end_date__isnull=False,
+        end_date__gte=today,
+        end_date__lte=week_from_now
+    )
+    
+    accessible_diets = Diet.objects.filter(
+        animal_id__in=accessible_animal_ids,
+        is_active=True
+    )
+    
+    accessible_shopping_lists = ShoppingList.objects.filter(
+        Q(created_by=user) | Q(id__in=accessible_shopping_list_ids),
+        is_active=True
+    )
+    
+    # 1. Statystyki (3 zapytania agregujące)
+    diet_stats = accessible_diets.aggregate(
+        active_diets_count=Count('id', filter=active_today),
+        expiring_diets_count=Count('id', filter=expiring_soon)
+    )
+    
+    shopping_list_stats = accessible_shopping_lists.aggregate(
+        active_shopping_lists_count=Count('id', filter=Q(is_completed=False)),
+        completed_shopping_lists_count=Count('id', filter=Q(
             is_completed=True,
             updated_at__year=today.year,
             updated_at__month=today.month
-        ).distinct().count(),
+        ))
+    )
+    
+    stats = {
+        'animals_count': Animal.objects.filter(
+            id__in=accessible_animal_ids,
+            is_active=True
+        ).count(),
+        **diet_stats,
+        **shopping_list_stats,
     }
     
-    # 2. Alerty - Zwierzęta bez aktywnej diety
-    animals_without_diet = []
-    all_animals = Animal.objects.filter(
-        animals_filter,
+    # 2. Alerty - Zwierzęta bez aktywnej diety (adnotacja Exists)
+    has_active_diet = Diet.objects.filter(
+        active_today,
+        animal_id=OuterRef('pk'),
         is_active=True
-    ).distinct()
+    )
     
-    for animal in all_animals:
-        has_active_diet = Diet.objects.filter(
-            animal=animal,
-            is_active=True,
-            start_date__lte=today
+    animals_without_diet = [
+        {
+            'id': animal.id,
+            'name': animal.name,
+            'species': animal.species.name
+        }
+        for animal in Animal.objects.filter(
+            id__in=accessible_animal_ids,
+            is_active=True
+        ).annotate(
+            has_active_diet=Exists(has_active_diet)
         ).filter(
-            Q(end_date__isnull=True) | Q(end_date__gte=today)
-        ).exists()
-        
-        if not has_active_diet:
-            animals_without_diet.append({
-                'id': animal.id,
-                'name': animal.name,
-                'species': animal.species.name
-            })
+            has_active_diet=False
+        ).select_related('species').order_by('name', 'id')
+    ]
     
     # 3. Alerty - Diety wygasające w ciągu 7 dni
-    expiring_diets = []
-    expiring_diets_qs = Diet.objects.filter(
-        diets_filter,
-        is_active=True,
-        end_date__isnull=False,
-        end_date__gte=today,
-        end_date__lte=week_from_now
-    ).select_related('animal', 'animal__species').distinct()
-    
-    for diet in expiring_diets_qs:
-        days_left = (diet.end_date - today).days
-        expiring_diets.append({
+    expiring_diets = [
+        {
             'id': diet.id,
             'animal_id': diet.animal.id,
             'animal_name': diet.animal.name,
             'end_date': diet.end_date.isoformat(),
-            'days_left': days_left
-        })
+            'days_left': (diet.end_date - today).days
+        }
+        for diet in accessible_diets.filter(
+            expiring_soon
+        ).select_related('animal').order_by('end_date', 'id')
+    ]
     
     # 4. Alerty - Niekompletne listy zakupów starsze niż 7 dni
-    week_ago = today - timedelta(days=7)
-    old_shopping_lists = []
-    old_lists_qs = ShoppingList.objects.filter(
-        Q(created_by=user) | Q(diets__animal__owner=user) | Q(
-            diets__animal__collaborations__user=user,
-            diets__animal__collaborations__is_active=True
-        ),
-        is_active=True,
-        is_completed=False,
-        created_at__date__lte=week_ago
-    ).distinct()
-    
-    for shopping_list in old_lists_qs:
-        days_old = (today - shopping_list.created_at.date()).days
-        old_shopping_lists.append({
+    old_shopping_lists = [
+        {
             'id': shopping_list.id,
             'title': shopping_list.title,
             'created_at': shopping_list.created_at.isoformat(),
-            'days_old': days_old
-        })
+            'days_old': (today - shopping_list.created_at.date()).days
+        }
+        for shopping_list in accessible_shopping_lists.filter(
+            is_completed=False,
+            created_at__date__lte=week_ago
+        ).order_by('created_at', 'id')
+    ]
     
     return {
         'stats': stats,
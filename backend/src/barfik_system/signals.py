@@ -1,29 +1,165 @@
 """Sygnały Django dla automatycznej aktualizacji danych."""
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
 from django.dispatch import receiver
-from .models import Ingredient
-from . import services
+from .models import (
+    Animal, AnimalType, Collaboration, Diet, Ingredient, IngredientCategory,
+    ShoppingList, ShoppingListItem, Unit
+)
+from . import services, caching
+from .dictionaries import invalidate_dictionaries
 
 
 @receiver(post_save, sender=Ingredient)
 def update_diet_total_on_ingredient_save(sender, instance, created, **kwargs):
     """
-    Po zapisaniu składnika zaktualizuj total_daily_mass diety.
+    Po zapisaniu składnika oznacz dietę do przeliczenia total_daily_mass.
     
-    Signal wywoływany po każdym save() składnika.
+    Przeliczenie odbywa się raz na transakcję, po commicie - również
+    przy soft delete (is_active=False), który zmienia sumę diety.
     """
-    # Sprawdź czy składnik jest aktywny
-    if instance.is_active:
-        # Przelicz total dla diety
-        services.recalculate_diet_total(instance.diet_id)
+    services.schedule_diet_recalculation(instance.diet_id)
 
 
 @receiver(post_delete, sender=Ingredient)
 def update_diet_total_on_ingredient_delete(sender, instance, **kwargs):
     """
-    Po usunięciu składnika zaktualizuj total_daily_mass diety.
+    Po usunięciu składnika oznacz dietę do przeliczenia total_daily_mass.
     
     Note: W systemie używamy soft delete, więc ten signal może nie być często używany.
     """
-    # Przelicz total dla diety
-    services.recalculate_diet_total(instance.diet_id)
+    services.schedule_diet_recalculation(instance.diet_id)
+
+
+@receiver(post_save, sender=Unit)
+@receiver(post_delete, sender=Unit)
+@receiver(post_save, sender=AnimalType)
+@receiver(post_delete, sender=AnimalType)
+@receiver(post_save, sender=IngredientCategory)
+@receiver(post_delete, sender=IngredientCategory)
+def invalidate_dictionary_snapshot(sender, **kwargs):
+    """
+    Po zmianie słownika unieważnij snapshot słowników procesu.
+    
+    Snapshot (wraz z tabelą konwersji jednostek) zostanie wczytany ponownie
+    przy następnym użyciu; znacznik wersji w bazie (DictionaryVersion)
+    unieważnia go również w innych procesach (dictionaries.get_dictionaries). Słowniki są zagnieżdżone w odpowiedziach wszystkich
+    użytkowników, więc zmieniany jest też znacznik globalny cache odpowiedzi.
+    """
+    invalidate_dictionaries()
+    caching.bump_global_generation()
+
+
+# Projekcja AnimalAccess - odbiorniki zarejestrowane przed unieważnianiem
+# cache, które odczytuje użytkowników zwierzęcia z AnimalAccess
+
+@receiver(post_save, sender=Animal)
+def sync_animal_access_on_animal_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Utrzymaj wpis OWNER właściciela w AnimalAccess.
+    
+    Soft delete (update_fields bez owner) nie zmienia projekcji - status
+    zwierzęcia czytany jest z Animal.is_active.
+    """
+    if update_fields is not None and 'owner' not in update_fields:
+        return
+    services.sync_owner_access(instance, created=created)
+
+
+@receiver(post_save, sender=Collaboration)
+@receiver(post_delete, sender=Collaboration)
+def sync_animal_access_on_collaboration_change(sender, instance, **kwargs):
+    """Przelicz wpis AnimalAccess współpracownika (również po soft delete)."""
+    services.refresh_animal_access(instance.animal_id, instance.user_id)
+
+
+@receiver(pre_save, sender=Animal)
+def remember_previous_owner(sender, instance, update_fields=None, **kwargs):
+    """
+    Zapamiętaj właściciela sprzed zapisu (_previous_owner_id).
+    
+    Po zmianie właściciela poprzedni nie ma już wpisu w AnimalAccess,
+    a jego cache listy zwierząt również musi zostać unieważniony.
+    """
+    instance._previous_owner_id = None
+    if (
+        not caching.is_enabled()
+        or instance._state.adding
+        or (update_fields is not None and 'owner' not in update_fields)
+    ):
+        return
+    instance._previous_owner_id = (
+        Animal.all_objects.filter(pk=instance.pk).values_list('owner_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Animal)
+@receiver(post_delete, sender=Animal)
+def invalidate_cache_on_animal_change(sender, instance, **kwargs):
+    """Unieważnij cache odpowiedzi właściciela (także poprzedniego) i współpracowników."""
+    caching.invalidate_for_animals(
+        [instance.id],
+        extra_user_ids=[instance.owner_id, getattr(instance, '_previous_owner_id', None)]
+    )
+
+
+@receiver(post_save, sender=Diet)
+@receiver(post_delete, sender=Diet)
+def invalidate_cache_on_diet_change(sender, instance, **kwargs):
+    """Unieważnij cache użytkowników z dostępem do zwierzęcia diety."""
+    caching.invalidate_for_animals([instance.animal_id])
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_cache_on_ingredient_change(sender, instance, **kwargs):
+    """Unieważnij cache użytkowników z dostępem do diety składnika."""
+    caching.invalidate_for_animals(
+        Diet.all_objects.filter(id=instance.diet_id).values('animal_id')
+    )
+
+
+@receiver(post_save, sender=Collaboration)
+@receiver(post_delete, sender=Collaboration)
+def invalidate_cache_on_collaboration_change(sender, instance, **kwargs):
+    """
+    Unieważnij cache użytkowników zwierzęcia oraz samego współpracownika.
+    
+    Współpracownik jest dodawany jawnie - po dezaktywacji współpracy nie
+    jest już zwracany przez zapytanie o dostęp.
+    """
+    caching.invalidate_for_animals([instance.animal_id], extra_user_ids=[instance.user_id])
+
+
+@receiver(post_save, sender=ShoppingList)
+@receiver(post_delete, sender=ShoppingList)
+def invalidate_cache_on_shopping_list_change(sender, instance, **kwargs):
+    """Unieważnij cache twórcy listy i użytkowników z dostępem do jej diet."""
+    caching.invalidate_for_shopping_lists([instance.id], extra_user_ids=[instance.created_by_id])
+
+
+@receiver(post_save, sender=ShoppingListItem)
+@receiver(post_delete, sender=ShoppingListItem)
+def invalidate_cache_on_shopping_list_item_change(sender, instance, **kwargs):
+    """Unieważnij cache użytkowników listy zakupów pozycji."""
+    caching.invalidate_for_shopping_lists([instance.shopping_list_id])
+
+
+@receiver(m2m_changed, sender=ShoppingList.diets.through)
+def invalidate_cache_on_shopping_list_diets_change(sender, instance, action, pk_set, **kwargs):
+    """
+    Unieważnij cache po zmianie diet listy zakupów.
+    
+    Przy usunięciu diet z listy unieważniany jest też cache użytkowników
+    zwierząt tych diet (lista przestaje być dla nich dostępna). Przy clear()
+    użytkownicy są zbierani przed usunięciem powiązań (pre_clear).
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    
+    if isinstance(instance, ShoppingList):
+        animal_ids = Diet.all_objects.filter(id__in=pk_set or ()).values_list('animal_id', flat=True)
+        caching.invalidate_for_shopping_lists([instance.id], extra_animal_ids=animal_ids)
+    else:
+        # Zmiana od strony diety (diet.shopping_lists)
+        shopping_list_ids = pk_set if pk_set is not None else instance.shopping_lists.values('id')
+        caching.invalidate_for_shopping_lists(shopping_list_ids, extra_animal_ids=[instance.animal_id])
@@ -2,12 +2,36 @@
 import pytest
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from barfik_system import dictionaries
 from barfik_system.models import (
     AnimalType, Unit, IngredientCategory,
     Animal, Diet, Ingredient
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Wyczyść cache i snapshot słowników między testami (ID powtarzają się po rollbacku)."""
+    cache.clear()
+    dictionaries._snapshot = None
+    yield
+    cache.clear()
+    dictionaries._snapshot = None
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """Włącz cache odpowiedzi na backendzie plikowym (wspólnym dla procesów)."""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }
+    }
+    settings.BARFIK_RESPONSE_CACHE_ENABLED = True
+
+
 @pytest.fixture
 def api_client():
     """Zwróć klienta API."""
@@ -0,0 +1,186 @@
+"""Testy cache odpowiedzi API per użytkownik."""
+import pytest
+from datetime import date
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from barfik_system import caching, checks, services
+from barfik_system.models import Collaboration, Diet
+
+
+def client_for(user):
+    """Zwróć klienta API uwierzytelnionego jako użytkownik."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('shared_cache')
+class TestResponseCache:
+    """Testy cache list i dashboardu."""
+
+    def test_repeated_list_is_served_from_cache(self, authenticated_client, diet, ingredient):
+        """Test że powtórzone zapytanie o listę nie odpytuje ponownie bazy."""
+        with CaptureQueriesContext(connection) as first:
+            first_response = authenticated_client.get('/api/diets/')
+        with CaptureQueriesContext(connection) as second:
+            second_response = authenticated_client.get('/api/diets/')
+
+        assert second_response.status_code == 200
+        assert second_response.data == first_response.data
+        assert len(second.captured_queries) < len(first.captured_queries)
+
+    def test_query_string_is_part_of_key(self, authenticated_client, animal, diet):
+        """Test że różne parametry zapytania nie współdzielą wpisu."""
+        assert len(authenticated_client.get('/api/diets/').data['results']) == 1
+        response = authenticated_client.get('/api/diets/', {'animal_id': animal.id + 1})
+        assert response.data['results'] == []
+
+    def test_ingredient_change_invalidates_diet_list(
+        self, authenticated_client, diet, ingredient, django_capture_on_commit_callbacks
+    ):
+        """Test że przeliczenie diety po zmianie składnika unieważnia cache listy diet."""
+        before = authenticated_client.get('/api/diets/').data['results'][0]['total_daily_mass']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ingredient.amount = 500
+            ingredient.save()
+
+        after = authenticated_client.get('/api/diets/').data['results'][0]['total_daily_mass']
+        assert after != before
+
+    def test_collaborator_change_invalidates_owner_cache(
+        self, authenticated_client, another_user, animal, diet
+    ):
+        """Test że zmiana wprowadzona przez współpracownika unieważnia cache właściciela."""
+        Collaboration.objects.create(animal=animal, user=another_user, permission='EDIT')
+        authenticated_client.get('/api/diets/')
+
+        response = client_for(another_user).patch(
+            f'/api/diets/{diet.id}/', {'description': 'Zmiana współpracownika'}, format='json'
+        )
+        assert response.status_code == 200
+
+        results = authenticated_client.get('/api/diets/').data['results']
+        assert results[0]['description'] == 'Zmiana współpracownika'
+
+    def test_new_collaboration_invalidates_collaborator_cache(self, another_user, animal):
+        """Test że nowa współpraca unieważnia cache listy zwierząt współpracownika."""
+        client = client_for(another_user)
+        assert client.get('/api/animals/').data['results'] == []
+
+        Collaboration.objects.create(animal=animal, user=another_user, permission='READ_ONLY')
+
+        results = client.get('/api/animals/').data['results']
+        assert [a['id'] for a in results] == [animal.id]
+
+    def test_owner_change_invalidates_previous_owner_cache(self, authenticated_client, another_user, animal):
+        """Test że przekazanie zwierzęcia unieważnia cache poprzedniego właściciela."""
+        assert [a['id'] for a in authenticated_client.get('/api/animals/').data['results']] == [animal.id]
+
+        animal.owner = another_user
+        animal.save()
+
+        assert authenticated_client.get('/api/animals/').data['results'] == []
+
+    def test_dictionary_change_invalidates_all_users(
+        self, authenticated_client, user, diet, ingredient, unit_gram
+    ):
+        """Test że zmiana jednostki unieważnia zapisane odpowiedzi użytkowników."""
+        services.generate_shopping_list(user, [diet.id], 7)
+        assert authenticated_client.get('/api/shopping-lists/').data['results'][0]['items'][0]['unit']['symbol'] == 'g'
+
+        unit_gram.symbol = 'gr'
+        unit_gram.save()
+
+        response = authenticated_client.get('/api/shopping-lists/')
+        assert response.data['results'][0]['items'][0]['unit']['symbol'] == 'gr'
+
+    def test_bulk_check_invalidates_shopping_list_cache(self, authenticated_client, user, diet, ingredient):
+        """Test że bulk_update pozycji (bez sygnałów) unieważnia cache list zakupów."""
+        shopping_list = services.generate_shopping_list(user, [diet.id], 7)
+        item = shopping_list.items.get()
+        assert authenticated_client.get('/api/shopping-lists/').data['results'][0]['items'][0]['is_checked'] is False
+
+        services.set_items_checked(shopping_list, {item.id: True})
+
+        response = authenticated_client.get('/api/shopping-lists/')
+        assert response.data['results'][0]['items'][0]['is_checked'] is True
+
+    def test_dashboard_is_invalidated_by_new_diet(self, authenticated_client, animal):
+        """Test że dodanie diety unieważnia cache dashboardu."""
+        assert authenticated_client.get('/api/dashboard/stats/').data['stats']['active_diets_count'] == 0
+
+        Diet.objects.create(animal=animal, start_date=date.today())
+
+        assert authenticated_client.get('/api/dashboard/stats/').data['stats']['active_diets_count'] == 1
+
+    def test_local_backend_disables_cache(self, settings, authenticated_client, diet):
+        """Test że przy LocMemCache (lokalnym dla procesu) cache nie jest używany."""
+        settings.CACHES = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        }
+        assert caching.is_enabled() is False
+        authenticated_client.get('/api/diets/')
+
+        with CaptureQueriesContext(connection) as second:
+            authenticated_client.get('/api/diets/')
+
+        assert any('barfik_system_diet' in q['sql'] for q in second.captured_queries)
+
+    def test_local_backend_check_warning(self, settings):
+        """Test ostrzeżenia manage.py check przy cache włączonym na LocMemCache."""
+        assert checks.check_response_cache_backend(None) == []
+
+        settings.CACHES = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        }
+        assert [w.id for w in checks.check_response_cache_backend(None)] == ['barfik_system.W001']
+
+    def test_cache_can_be_disabled(self, settings, authenticated_client, diet):
+        """Test wyłączenia cache ustawieniem BARFIK_RESPONSE_CACHE_ENABLED."""
+        settings.BARFIK_RESPONSE_CACHE_ENABLED = False
+        authenticated_client.get('/api/diets/')
+
+        with CaptureQueriesContext(connection) as second:
+            authenticated_client.get('/api/diets/')
+
+        assert any('barfik_system_diet' in q['sql'] for q in second.captured_queries)
+
+
+@pytest.mark.django_db
+class TestDisabledCache:
+    """Testy zapisu przy wyłączonym cache (domyślnie i na LocMemCache)."""
+
+    def test_check_item_does_not_run_invalidation(self, authenticated_client, user, diet, ingredient):
+        """Test że zaznaczenie pozycji nie odpytuje o użytkowników do unieważnienia."""
+        shopping_list = services.generate_shopping_list(user, [diet.id], 7)
+        item = shopping_list.items.get()
+
+        # Użytkownik, pozycja, UPDATE
+        with CaptureQueriesContext(connection) as context:
+            response = authenticated_client.post(
+                f'/api/shopping-lists/{shopping_list.id}/items/{item.id}/check/'
+            )
+
+        assert response.status_code == 200
+        assert len(context) == 3
+
+    def test_bulk_check_does_not_run_invalidation(self, authenticated_client, user, diet, ingredient):
+        """Test że zbiorcze zaznaczenie nie odpytuje o użytkowników do unieważnienia."""
+        shopping_list = services.generate_shopping_list(user, [diet.id], 7)
+        item = shopping_list.items.get()
+
+        # Użytkownik, lista, pozycje, UPDATE
+        with CaptureQueriesContext(connection) as context:
+            response = authenticated_client.patch(
+                f'/api/shopping-lists/{shopping_list.id}/items/',
+                {'items': [{'id': item.id, 'is_checked': True}]},
+                format='json'
+            )
+
+        assert response.status_code == 200
+        assert len(context) == 4
+        assert not any('barfik_system_animalaccess' in q['sql'] for q in context.captured_queries)
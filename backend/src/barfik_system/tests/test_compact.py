@@ -0,0 +1,135 @@
+"""Testy trybu kompaktowego odpowiedzi (słowniki w bloku included)."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from barfik_system.dictionaries import get_dictionaries
+from barfik_system.models import Ingredient
+
+
+def expand_references(data, included, references):
+    """Zastąp ID słowników obiektami z bloku included (ścieżka -> mapa)."""
+    objects = {
+        dictionary: {obj['id']: obj for obj in entries}
+        for dictionary, entries in included.items()
+    }
+    for path, dictionary in references.items():
+        *parents, name = path.split('.')
+        nodes = [data]
+        for parent in parents:
+            nodes = [
+                child for node in nodes
+                for child in (node[parent] if isinstance(node[parent], list) else [node[parent]])
+            ]
+        for node in nodes:
+            if node[name] is not None:
+                node[name] = objects[dictionary][node[name]]
+    return data
+
+
+@pytest.fixture
+def diet_ingredients(diet, ingredient, unit_gram, category_meat, category_veggies):
+    """Dieta z kilkoma składnikami współdzielącymi jednostkę i kategorie."""
+    Ingredient.objects.create(
+        diet=diet, name='Serca', category=category_meat, unit=unit_gram, amount='100.000'
+    )
+    Ingredient.objects.create(
+        diet=diet, name='Marchew', category=category_veggies, unit=unit_gram, amount='50.000'
+    )
+    Ingredient.objects.create(diet=diet, name='Olej', category=None, unit=unit_gram, amount='5.000')
+    return diet
+
+
+@pytest.fixture
+def shopping_list(user, diet_ingredients):
+    from barfik_system.services import generate_shopping_list
+    return generate_shopping_list(user=user, diet_ids=[diet_ingredients.id], days_count=7)
+
+
+@pytest.mark.django_db
+class TestCompactResponses:
+    """Testy odpowiedzi z ID słowników i blokiem included."""
+
+    def test_diet_detail_side_loads_dictionaries(self, authenticated_client, diet_ingredients, unit_gram):
+        """Test że jednostki i kategorie są zwracane raz w bloku included."""
+        full = authenticated_client.get(f'/api/diets/{diet_ingredients.id}/').json()
+        compact = authenticated_client.get(f'/api/diets/{diet_ingredients.id}/?compact=true').json()
+
+        assert {ingredient['unit'] for ingredient in compact['ingredients']} == {unit_gram.id}
+        assert [unit['id'] for unit in compact['included']['units']] == [unit_gram.id]
+        assert len(compact['included']['categories']) == 2
+
+        included = compact.pop('included')
+        assert expand_references(compact, included, {
+            'ingredients.unit': 'units',
+            'ingredients.category': 'categories',
+        }) == full
+
+    def test_accept_header_selects_compact_mode(self, authenticated_client, diet_ingredients):
+        """Test że tryb kompaktowy wybiera też parametr nagłówka Accept."""
+        response = authenticated_client.get(
+            f'/api/diets/{diet_ingredients.id}/', HTTP_ACCEPT='application/json; compact=true'
+        )
+
+        assert response.status_code == 200
+        assert 'included' in response.json()
+        assert isinstance(response.json()['ingredients'][0]['unit'], int)
+
+    def test_compact_diet_detail_does_not_join_dictionaries(self, authenticated_client, diet_ingredients):
+        """Test że tryb kompaktowy nie dołącza tabel słowników."""
+        get_dictionaries()
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(f'/api/diets/{diet_ingredients.id}/?compact=true')
+
+        assert response.status_code == 200
+        assert not any('barfik_system_unit' in query['sql'] for query in ctx.captured_queries)
+
+    @pytest.mark.parametrize('fast_list_enabled', [True, False])
+    def test_shopping_list_list_side_loads_units(
+        self, settings, authenticated_client, shopping_list, fast_list_enabled
+    ):
+        """Test że lista list zakupów w trybie kompaktowym daje te same dane."""
+        settings.BARFIK_FAST_LIST_ENABLED = fast_list_enabled
+
+        full = authenticated_client.get('/api/shopping-lists/').json()
+        compact = authenticated_client.get('/api/shopping-lists/?compact=true').json()
+
+        included = compact.pop('included')
+        assert list(included) == ['units']
+        assert expand_references(compact, included, {'results.items.unit': 'units'}) == full
+
+    def test_cached_list_keeps_included_block(self, shared_cache, authenticated_client, shopping_list):
+        """Test że odpowiedź z cache list zawiera blok included."""
+        first = authenticated_client.get('/api/shopping-lists/?compact=true')
+        with CaptureQueriesContext(connection) as ctx:
+            second = authenticated_client.get('/api/shopping-lists/?compact=true')
+
+        assert second.json() == first.json()
+        assert second.json()['included']['units']
+        assert len(ctx) <= 2
+
+    def test_fields_selection_applies_to_included(self, authenticated_client, shopping_list, unit_gram):
+        """Test że ?fields= wybiera pola obiektów included (ID zawsze obecne)."""
+        response = authenticated_client.get(
+            f'/api/shopping-lists/{shopping_list.id}/?compact=true&fields=id,items.unit.symbol'
+        )
+
+        assert response.json()['included'] == {'units': [{'id': unit_gram.id, 'symbol': 'g'}]}
+
+    def test_expanded_animal_side_loads_species(self, authenticated_client, diet, animal_type_dog):
+        """Test że gatunek rozwiniętego zwierzęcia trafia do included."""
+        response = authenticated_client.get(
+            f'/api/diets/{diet.id}/?compact=true&expand=animal&fields=id,animal'
+        )
+
+        assert response.json()['animal']['species'] == animal_type_dog.id
+        assert response.json()['included']['animal_types'][0]['name'] == animal_type_dog.name
+
+    def test_write_actions_return_nested_objects(self, authenticated_client, shopping_list):
+        """Test że akcje zapisu ignorują tryb kompaktowy."""
+        response = authenticated_client.patch(
+            f'/api/shopping-lists/{shopping_list.id}/?compact=true', {'title': 'Nowa'}, format='json'
+        )
+
+        assert response.status_code == 200
+        assert 'included' not in response.data
+        assert response.data['items'][0]['unit']['symbol'] == 'g'
@@ -0,0 +1,152 @@
+"""Testy snapshotu słowników procesu."""
+import pytest
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from barfik_system.dictionaries import VERSION_ID, get_dictionaries, refresh_dictionaries
+from barfik_system.models import AnimalType, DictionaryVersion, IngredientCategory, Unit
+from barfik_system.serializers import IngredientSerializer
+
+
+DICTIONARY_TABLES = (
+    Unit._meta.db_table,
+    IngredientCategory._meta.db_table,
+    AnimalType._meta.db_table,
+)
+
+
+def dictionary_queries(context):
+    """Zwróć zapytania odwołujące się do tabel słowników."""
+    return [
+        query['sql'] for query in context.captured_queries
+        if any(table in query['sql'] for table in DICTIONARY_TABLES)
+    ]
+
+
+@pytest.mark.django_db
+class TestDictionarySnapshot:
+    """Testy wczytywania i unieważniania snapshotu."""
+
+    def test_snapshot_is_loaded_once(self, unit_gram, category_meat, animal_type_dog, django_assert_num_queries):
+        """Test że kolejne wywołania nie wykonują zapytań."""
+        get_dictionaries()
+
+        with django_assert_num_queries(0):
+            snapshot = get_dictionaries(
+                unit_ids=[unit_gram.id],
+                animal_type_ids=[animal_type_dog.id],
+                category_ids=[category_meat.id]
+            )
+
+        assert snapshot.categories[category_meat.id].code == 'meat'
+        assert snapshot.animal_types[animal_type_dog.id].name == 'Pies'
+
+    def test_dictionary_change_invalidates_snapshot(self, category_meat):
+        """Test że zapis słownika unieważnia snapshot."""
+        get_dictionaries()
+
+        category_meat.name = 'Mięso surowe'
+        category_meat.save()
+
+        assert get_dictionaries().categories[category_meat.id].name == 'Mięso surowe'
+
+    def test_version_change_triggers_reload(self, animal_type_dog):
+        """Test że nowy znacznik wersji w bazie (zmiana w innym procesie) wymusza przeładowanie."""
+        get_dictionaries()
+
+        # update() nie wysyła sygnałów - symulacja zmiany w innym procesie
+        AnimalType.objects.filter(id=animal_type_dog.id).update(name='Pies domowy')
+        DictionaryVersion.objects.filter(pk=VERSION_ID).update(version=F('version') + 1)
+        assert get_dictionaries().animal_types[animal_type_dog.id].name == 'Pies'
+
+        refresh_dictionaries()
+
+        assert get_dictionaries().animal_types[animal_type_dog.id].name == 'Pies domowy'
+
+    def test_read_checks_version_after_interval(self, settings, authenticated_client, animal, animal_type_dog):
+        """Test że odczyt po BARFIK_DICTIONARY_CHECK_SECONDS porównuje znacznik wersji."""
+        settings.BARFIK_DICTIONARY_CHECK_SECONDS = 0
+        get_dictionaries()
+        AnimalType.objects.filter(id=animal_type_dog.id).update(name='Pies domowy')
+        DictionaryVersion.objects.filter(pk=VERSION_ID).update(version=F('version') + 1)
+
+        response = authenticated_client.get('/api/animals/')
+
+        assert response.data['results'][0]['species']['name'] == 'Pies domowy'
+
+    def test_unchanged_version_keeps_snapshot(self, unit_gram, django_assert_num_queries):
+        """Test że sprawdzenie aktualnego snapshotu to jedno zapytanie."""
+        snapshot = get_dictionaries()
+
+        with django_assert_num_queries(1):
+            assert get_dictionaries(verify=True) is snapshot
+
+    def test_reads_within_interval_do_not_query(self, unit_gram, django_assert_num_queries):
+        """Test że odczyty w BARFIK_DICTIONARY_CHECK_SECONDS nie sprawdzają znacznika."""
+        get_dictionaries()
+
+        with django_assert_num_queries(0):
+            get_dictionaries(unit_ids=[unit_gram.id])
+
+
+@pytest.mark.django_db
+class TestDictionaryValidation:
+    """Testy walidacji pól słownikowych bez zapytań."""
+
+    def test_create_ingredient_does_not_query_dictionaries(
+        self, authenticated_client, diet, unit_kilogram, category_meat
+    ):
+        """Test że po rozgrzaniu snapshotu dodanie składnika sprawdza tylko znacznik wersji."""
+        get_dictionaries()
+        data = {
+            'name': 'Wołowina',
+            'category_id': category_meat.id,
+            'cooking_method': 'raw',
+            'unit_id': unit_kilogram.id,
+            'amount': 2.5
+        }
+
+        with CaptureQueriesContext(connection) as context:
+            response = authenticated_client.post(
+                f'/api/diets/{diet.id}/ingredients/', data, format='json'
+            )
+
+        assert response.status_code == 201
+        assert response.data['category']['code'] == 'meat'
+        assert dictionary_queries(context) == []
+        assert diet.ingredients.get().amount_in_base_unit == 2500
+
+    def test_amount_uses_current_unit_factor(self, diet, unit_kilogram):
+        """Test że amount_in_base_unit nie korzysta z nieaktualnego snapshotu."""
+        get_dictionaries()
+        # update() nie wysyła sygnałów - zmiana w innym procesie
+        Unit.objects.filter(id=unit_kilogram.id).update(conversion_factor=2000)
+        DictionaryVersion.objects.filter(pk=VERSION_ID).update(version=F('version') + 1)
+
+        ingredient = diet.ingredients.create(name='Wołowina', unit=unit_kilogram, amount=1)
+
+        assert ingredient.amount_in_base_unit == 2000
+
+    def test_unknown_id_is_rejected(self, unit_gram):
+        """Test że nieznane ID słownika jest odrzucane."""
+        serializer = IngredientSerializer(data={
+            'name': 'Wołowina',
+            'cooking_method': 'raw',
+            'unit_id': unit_gram.id + 100,
+            'amount': 1
+        })
+
+        assert not serializer.is_valid()
+        assert serializer.errors['unit_id'][0].code == 'does_not_exist'
+
+    def test_boolean_is_rejected(self, unit_gram):
+        """Test że wartość logiczna nie jest traktowana jako ID."""
+        serializer = IngredientSerializer(data={
+            'name': 'Wołowina',
+            'cooking_method': 'raw',
+            'unit_id': True,
+            'amount': 1
+        })
+
+        assert not serializer.is_valid()
+        assert serializer.errors['unit_id'][0].code == 'incorrect_type'
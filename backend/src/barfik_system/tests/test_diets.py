@@ -1,8 +1,9 @@
 """Testy dla endpointów diet i składników."""
 import pytest
 from datetime import date
+from decimal import Decimal
 from rest_framework import status
-from barfik_system.models import Diet, Ingredient
+from barfik_system.models import Animal, Collaboration, Diet, Ingredient
 
 
 @pytest.mark.django_db
@@ -229,3 +230,409 @@ class TestIngredientCRUD:
         # Sprawdź soft delete
         ingredient.refresh_from_db()
         assert ingredient.is_active is False
+
+
+@pytest.mark.django_db
+class TestIngredientBulkSave:
+    """Testy zbiorczego zapisu składników diety."""
+    
+    def _payload(self, count, unit, category, offset=0):
+        return [
+            {
+                'name': f'Składnik {offset + i}',
+                'category_id': category.id,
+                'cooking_method': 'raw',
+                'unit_id': unit.id,
+                'amount': '0.5'
+            }
+            for i in range(count)
+        ]
+    
+    def test_bulk_replace_creates_updates_and_deletes(
+        self, authenticated_client, diet, ingredient, unit_gram, unit_kilogram,
+        category_meat, django_capture_on_commit_callbacks
+    ):
+        """Test że PUT tworzy nowe, aktualizuje istniejące i usuwa brakujące składniki."""
+        other = Ingredient.objects.create(
+            diet=diet, name='Do usunięcia', category=category_meat,
+            cooking_method='raw', unit=unit_gram, amount=100
+        )
+        data = {'ingredients': [
+            {
+                'id': ingredient.id,
+                'name': ingredient.name,
+                'category_id': category_meat.id,
+                'cooking_method': 'cooked',
+                'unit_id': unit_kilogram.id,
+                'amount': '1.5'
+            },
+            {
+                'name': 'Marchew',
+                'category_id': None,
+                'cooking_method': 'raw',
+                'unit_id': unit_gram.id,
+                'amount': '200'
+            },
+        ]}
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.put(
+                f'/api/diets/{diet.id}/ingredients/', data, format='json'
+            )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['name'] for item in response.data] == ['Marchew', ingredient.name]
+        
+        ingredient.refresh_from_db()
+        other.refresh_from_db()
+        assert ingredient.cooking_method == 'cooked'
+        assert ingredient.amount_in_base_unit == 1500
+        assert other.is_active is False
+        
+        diet.refresh_from_db()
+        assert diet.total_daily_mass == 1700
+    
+    def test_bulk_upsert_keeps_other_ingredients(
+        self, authenticated_client, diet, ingredient, unit_gram, category_meat
+    ):
+        """Test że PATCH nie usuwa składników spoza listy."""
+        response = authenticated_client.patch(
+            f'/api/diets/{diet.id}/ingredients/',
+            {'ingredients': self._payload(2, unit_gram, category_meat)},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 3
+        ingredient.refresh_from_db()
+        assert ingredient.is_active is True
+    
+    def test_bulk_save_query_count_does_not_depend_on_size(
+        self, authenticated_client, diet, ingredient, unit_gram, category_meat
+    ):
+        """Test że liczba zapytań nie zależy od liczby składników."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        from barfik_system.dictionaries import get_dictionaries
+        
+        # Jednorazowe wczytanie snapshotu słowników nie wchodzi do porównania;
+        # istniejący składnik sprawia, że oba wywołania coś zastępują
+        get_dictionaries()
+        url = f'/api/diets/{diet.id}/ingredients/'
+        with CaptureQueriesContext(connection) as small:
+            authenticated_client.put(
+                url, {'ingredients': self._payload(2, unit_gram, category_meat)}, format='json'
+            )
+        with CaptureQueriesContext(connection) as large:
+            response = authenticated_client.put(
+                url, {'ingredients': self._payload(20, unit_gram, category_meat, offset=2)}, format='json'
+            )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 20
+        assert len(large) == len(small)
+    
+    def test_bulk_save_rejects_unknown_references(
+        self, authenticated_client, diet, another_user, animal_type_dog, unit_gram, category_meat
+    ):
+        """Test odrzucenia nieznanych jednostek, kategorii i cudzych składników."""
+        url = f'/api/diets/{diet.id}/ingredients/'
+        payload = self._payload(1, unit_gram, category_meat)
+        
+        payload[0]['unit_id'] = 99999
+        response = authenticated_client.put(url, {'ingredients': payload}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
+        payload = self._payload(1, unit_gram, category_meat)
+        payload[0]['category_id'] = 99999
+        response = authenticated_client.put(url, {'ingredients': payload}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
+        foreign_animal = Animal.objects.create(owner=another_user, species=animal_type_dog, name='Obcy')
+        foreign_diet = Diet.objects.create(animal=foreign_animal, start_date=date(2025, 1, 1))
+        foreign = Ingredient.objects.create(
+            diet=foreign_diet, name='Obcy', category=category_meat,
+            cooking_method='raw', unit=unit_gram, amount=100
+        )
+        payload = self._payload(1, unit_gram, category_meat)
+        payload[0]['id'] = foreign.id
+        response = authenticated_client.put(url, {'ingredients': payload}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
+        foreign.refresh_from_db()
+        assert foreign.name == 'Obcy'
+        assert not Ingredient.objects.filter(diet=diet).exists()
+    
+    def test_read_only_collaborator_cannot_bulk_save(
+        self, api_client, diet, another_user, unit_gram, category_meat
+    ):
+        """Test że współpracownik READ_ONLY nie może zapisywać zbiorczo."""
+        from rest_framework_simplejwt.tokens import RefreshToken
+        
+        Collaboration.objects.create(animal=diet.animal, user=another_user, permission='READ_ONLY')
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(another_user).access_token}'
+        )
+        
+        response = api_client.put(
+            f'/api/diets/{diet.id}/ingredients/',
+            {'ingredients': self._payload(1, unit_gram, category_meat)},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestDietClone:
+    """Testy klonowania diety."""
+    
+    def test_clone_copies_ingredients_and_total(
+        self, authenticated_client, diet, ingredient, unit_kilogram, category_meat
+    ):
+        """Test że klon ma kopię aktywnych składników i ustawiony total."""
+        Ingredient.objects.create(
+            diet=diet, name='Wątróbka', category=category_meat,
+            cooking_method='raw', unit=unit_kilogram, amount='0.25'
+        )
+        Ingredient.objects.create(
+            diet=diet, name='Usunięty', category=category_meat,
+            cooking_method='raw', unit=unit_kilogram, amount='1', is_active=False
+        )
+        
+        response = authenticated_client.post(
+            f'/api/diets/{diet.id}/clone/',
+            {'start_date': '2025-02-01', 'end_date': '2025-02-28'},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        clone = Diet.objects.get(id=response.data['id'])
+        assert clone.animal_id == diet.animal_id
+        assert clone.start_date == date(2025, 2, 1)
+        assert clone.description == diet.description
+        
+        copied = {i.name: i for i in clone.ingredients.all()}
+        assert set(copied) == {ingredient.name, 'Wątróbka'}
+        assert copied['Wątróbka'].amount_in_base_unit == 250
+        assert copied[ingredient.name].amount == ingredient.amount
+        assert clone.total_daily_mass == ingredient.amount_in_base_unit + 250
+        assert len(response.data['ingredients']) == 2
+        
+        # Źródło bez zmian
+        assert diet.ingredients.filter(is_active=True).count() == 2
+    
+    def test_clone_scales_amounts(self, authenticated_client, diet, unit_kilogram, category_meat):
+        """Test skalowania ilości przy klonowaniu."""
+        Ingredient.objects.create(
+            diet=diet, name='Wołowina', category=category_meat,
+            cooking_method='raw', unit=unit_kilogram, amount='0.333'
+        )
+        
+        response = authenticated_client.post(
+            f'/api/diets/{diet.id}/clone/',
+            {'start_date': '2025-02-01', 'scale': '1.5'},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        copied = Ingredient.objects.get(diet_id=response.data['id'])
+        assert copied.amount == Decimal('0.500')
+        assert copied.amount_in_base_unit == Decimal('500')
+        assert Diet.objects.get(id=response.data['id']).total_daily_mass == Decimal('500')
+    
+    def test_clone_to_other_animal(
+        self, authenticated_client, user, diet, ingredient, animal_type_cat
+    ):
+        """Test klonowania diety dla innego zwierzęcia użytkownika."""
+        cat = Animal.objects.create(owner=user, species=animal_type_cat, name='Mruczek')
+        
+        response = authenticated_client.post(
+            f'/api/diets/{diet.id}/clone/',
+            {'start_date': '2025-02-01', 'animal_id': cat.id},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['animal'] == cat.id
+        assert Ingredient.objects.filter(diet__animal=cat).count() == 1
+    
+    def test_clone_to_foreign_animal_forbidden(
+        self, authenticated_client, diet, another_user, animal_type_cat
+    ):
+        """Test że nie można sklonować diety dla cudzego zwierzęcia."""
+        foreign = Animal.objects.create(owner=another_user, species=animal_type_cat, name='Obcy')
+        
+        response = authenticated_client.post(
+            f'/api/diets/{diet.id}/clone/',
+            {'start_date': '2025-02-01', 'animal_id': foreign.id},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not Diet.objects.filter(animal=foreign).exists()
+    
+    def test_clone_does_not_fire_ingredient_signals(
+        self, authenticated_client, diet, ingredient, unit_gram, category_meat
+    ):
+        """Test że klonowanie kopiuje składniki bez Ingredient.save() i sygnałów."""
+        from django.db.models.signals import post_save
+        
+        saved = []
+        
+        def receiver(sender, instance, **kwargs):
+            saved.append(instance)
+        
+        for i in range(5):
+            Ingredient.objects.create(
+                diet=diet, name=f'Składnik {i}', category=category_meat,
+                cooking_method='raw', unit=unit_gram, amount=10
+            )
+        
+        post_save.connect(receiver, sender=Ingredient)
+        try:
+            response = authenticated_client.post(
+                f'/api/diets/{diet.id}/clone/', {'start_date': '2025-02-01'}, format='json'
+            )
+        finally:
+            post_save.disconnect(receiver, sender=Ingredient)
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        assert saved == []
+        assert len(response.data['ingredients']) == 6
+
+
+@pytest.mark.django_db
+class TestDietComposition:
+    """Testy składu diety (kategoria x metoda obróbki)."""
+    
+    @pytest.fixture
+    def composed_diet(self, diet, unit_gram, unit_kilogram, category_meat, category_veggies):
+        """Dieta: 600 g mięsa surowego, 200 g mięsa gotowanego, 200 g warzyw."""
+        for name, category, method, unit, amount in (
+            ('Wołowina', category_meat, 'raw', unit_kilogram, '0.4'),
+            ('Kurczak', category_meat, 'raw', unit_gram, '200'),
+            ('Indyk', category_meat, 'cooked', unit_gram, '200'),
+            ('Marchew', category_veggies, 'raw', unit_gram, '200'),
+        ):
+            Ingredient.objects.create(
+                diet=diet, name=name, category=category,
+                cooking_method=method, unit=unit, amount=amount
+            )
+        return diet
+    
+    def test_composition_groups_by_category_and_method(self, authenticated_client, composed_diet):
+        """Test sum i udziałów procentowych liczonych w bazie."""
+        response = authenticated_client.get(f'/api/diets/{composed_diet.id}/composition/')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['diet_id'] == composed_diet.id
+        rows = [
+            (row['category_code'], row['cooking_method'], row['amount_in_base_unit'], row['percentage'])
+            for row in response.data['composition']
+        ]
+        assert rows == [
+            ('meat', 'raw', '600.000', '60.00'),
+            ('meat', 'cooked', '200.000', '20.00'),
+            ('veggies', 'raw', '200.000', '20.00'),
+        ]
+    
+    def test_composition_cache_invalidated_by_ingredient_change(
+        self, authenticated_client, composed_diet, unit_gram, category_veggies,
+        django_capture_on_commit_callbacks
+    ):
+        """Test że zmiana składników unieważnia cache składu."""
+        url = f'/api/diets/{composed_diet.id}/composition/'
+        assert len(authenticated_client.get(url).data['composition']) == 3
+        
+        with django_capture_on_commit_callbacks(execute=True):
+            Ingredient.objects.create(
+                diet=composed_diet, name='Brokuł', category=category_veggies,
+                cooking_method='cooked', unit=unit_gram, amount='1000'
+            )
+        
+        rows = authenticated_client.get(url).data['composition']
+        assert rows[0]['category_code'] == 'veggies'
+        assert rows[0]['percentage'] == '50.00'
+        assert len(rows) == 4
+    
+    def test_composition_is_cached(self, shared_cache, authenticated_client, composed_diet):
+        """Test że powtórne zapytanie nie liczy składu ponownie."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        url = f'/api/diets/{composed_diet.id}/composition/'
+        authenticated_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_client.get(url)
+        
+        assert not any('barfik_system_ingredient' in q['sql'] for q in queries.captured_queries)
+    
+    def test_bulk_composition_skips_inaccessible_diets(
+        self, authenticated_client, composed_diet, animal, another_user, animal_type_cat
+    ):
+        """Test składu wielu diet z pominięciem cudzych."""
+        empty = Diet.objects.create(animal=animal, start_date=date(2025, 2, 1))
+        foreign_animal = Animal.objects.create(owner=another_user, species=animal_type_cat, name='Obcy')
+        foreign = Diet.objects.create(animal=foreign_animal, start_date=date(2025, 1, 1))
+        
+        response = authenticated_client.get(
+            '/api/diets/composition/',
+            {'ids': f'{empty.id},{composed_diet.id},{foreign.id}'}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [entry['diet_id'] for entry in response.data] == [empty.id, composed_diet.id]
+        assert response.data[0]['composition'] == []
+        assert len(response.data[1]['composition']) == 3
+    
+    def test_bulk_composition_requires_valid_ids(self, authenticated_client):
+        """Test walidacji parametru ids."""
+        assert authenticated_client.get('/api/diets/composition/').status_code == 400
+        response = authenticated_client.get('/api/diets/composition/', {'ids': 'a,b'})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestAnnotatedFields:
+    """Testy pól serializera liczonych z adnotacji querysetu."""
+    
+    def test_list_counts_active_ingredients(self, authenticated_client, diet, ingredient, unit_gram):
+        """Test że ingredients_count pomija nieaktywne składniki."""
+        Ingredient.objects.create(
+            diet=diet, name='Usunięty', cooking_method='raw',
+            unit=unit_gram, amount=10, is_active=False
+        )
+        
+        response = authenticated_client.get('/api/diets/')
+        
+        assert response.data['results'][0]['ingredients_count'] == 1
+    
+    def test_list_count_query_has_no_join(self, settings, authenticated_client, diet, ingredient):
+        """Test że adnotacja nie komplikuje zapytania COUNT paginacji."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        settings.BARFIK_RESPONSE_CACHE_ENABLED = False
+        with CaptureQueriesContext(connection) as context:
+            authenticated_client.get('/api/diets/')
+        
+        count_sql = next(q['sql'] for q in context.captured_queries if 'COUNT(*)' in q['sql'])
+        assert 'barfik_system_ingredient' not in count_sql
+        assert 'GROUP BY' not in count_sql
+    
+    def test_unannotated_instance_falls_back_to_query(self, diet, ingredient):
+        """Test że obiekt bez adnotacji (np. utworzony) ma policzoną wartość."""
+        from barfik_system.serializers import DietListSerializer
+        
+        assert DietListSerializer(diet).data['ingredients_count'] == 1
+    
+    def test_serializer_annotations_are_collected(self):
+        """Test zbierania adnotacji z pól serializera."""
+        from barfik_system.serializers import (
+            DietDetailSerializer, DietListSerializer, get_serializer_annotations
+        )
+        
+        assert list(get_serializer_annotations(DietListSerializer)) == ['ingredients_count']
+        assert get_serializer_annotations(DietDetailSerializer) == {}
@@ -0,0 +1,93 @@
+"""Testy strumieniowego eksportu list zakupów i diet."""
+import csv
+import io
+import json
+import pytest
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from barfik_system.services import generate_shopping_list
+
+
+def read_stream(response):
+    """Złóż zawartość StreamingHttpResponse w tekst."""
+    return b''.join(response.streaming_content).decode('utf-8')
+
+
+@pytest.mark.django_db
+class TestShoppingListExport:
+    """Testy eksportu list zakupów."""
+    
+    def test_export_single_list_as_csv(self, authenticated_client, user, diet, ingredient):
+        """Test eksportu jednej listy do CSV."""
+        shopping_list = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=2)
+        
+        response = authenticated_client.get(f'/api/shopping-lists/{shopping_list.id}/export/')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response, StreamingHttpResponse)
+        assert response['Content-Type'].startswith('text/csv')
+        assert f'lista-zakupow-{shopping_list.id}.csv' in response['Content-Disposition']
+        
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert len(rows) == 1
+        assert rows[0]['ingredient_name'] == 'Wołowina'
+        assert rows[0]['total_amount'] == '600.000'
+        assert rows[0]['unit'] == 'g'
+    
+    def test_export_all_lists_as_ndjson(self, authenticated_client, user, diet, ingredient):
+        """Test eksportu wszystkich list użytkownika do NDJSON."""
+        first = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        second = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=3)
+        
+        response = authenticated_client.get('/api/shopping-lists/export/?export_format=ndjson')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/x-ndjson'
+        
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['shopping_list_id'] for row in rows] == [first.id, second.id]
+        assert rows[1]['total_amount'] == '900.000'
+        assert rows[1]['is_checked'] is False
+    
+    def test_export_rejects_unknown_format(self, authenticated_client, user, diet):
+        """Test że nieobsługiwany format zwraca 400."""
+        response = authenticated_client.get('/api/shopping-lists/export/?export_format=xml')
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_export_excludes_other_users_lists(self, authenticated_client, another_user, diet, ingredient):
+        """Test że eksport zbiorczy obejmuje tylko listy użytkownika."""
+        generate_shopping_list(user=another_user, diet_ids=[diet.id], days_count=1)
+        
+        response = authenticated_client.get('/api/shopping-lists/export/?export_format=ndjson')
+        
+        assert read_stream(response) == ''
+
+
+@pytest.mark.django_db
+class TestDietExport:
+    """Testy eksportu diety."""
+    
+    def test_export_diet_as_csv(self, authenticated_client, diet, ingredient):
+        """Test eksportu diety ze składnikami do CSV."""
+        response = authenticated_client.get(f'/api/diets/{diet.id}/export/')
+        
+        assert response.status_code == status.HTTP_200_OK
+        
+        rows = list(csv.DictReader(io.StringIO(read_stream(response))))
+        assert len(rows) == 1
+        assert rows[0]['animal_name'] == 'Rex'
+        assert rows[0]['name'] == 'Wołowina'
+        assert rows[0]['category'] == 'Mięso'
+        assert rows[0]['amount_in_base_unit'] == '300.000'
+    
+    def test_export_diet_requires_access(self, api_client, another_user, diet, ingredient):
+        """Test że eksport diety wymaga dostępu do zwierzęcia."""
+        from rest_framework_simplejwt.tokens import RefreshToken
+        
+        refresh = RefreshToken.for_user(another_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        response = api_client.get(f'/api/diets/{diet.id}/export/')
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,146 @@
+"""Testy szybkiej serializacji list z values() (FastListMixin)."""
+import pytest
+from datetime import date, timedelta
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from barfik_system.models import Animal, Collaboration, Diet, Ingredient, ShoppingList, ShoppingListItem
+from barfik_system.serializers import AnimalListSerializer, ValuesListSerializer
+
+
+@pytest.fixture
+def fast_list_data(user, another_user, animal, diet, ingredient, animal_type_cat, unit_kilogram, category_veggies):
+    """Zwierzęta własne i udostępnione, diety, składniki i listy zakupów."""
+    shared = Animal.objects.create(owner=another_user, species=animal_type_cat, name='Mruczek', weight_kg=4.25)
+    Collaboration.objects.create(animal=shared, user=user, permission='READ_ONLY')
+    Animal.objects.create(owner=user, species=animal_type_cat, name='Usunięty', is_active=False)
+
+    shared_diet = Diet.objects.create(
+        animal=shared,
+        start_date=date.today() - timedelta(days=3),
+        end_date=date.today() + timedelta(days=4),
+        description='Dieta udostępniona'
+    )
+    Ingredient.objects.create(
+        diet=shared_diet, name='Marchew', category=category_veggies,
+        unit=unit_kilogram, amount='0.125'
+    )
+    inactive_diet = Diet.objects.create(animal=animal, start_date=date.today(), is_active=False)
+
+    shopping_list = ShoppingList.objects.create(created_by=user, days_count=7, title='Tydzień')
+    shopping_list.diets.set([diet, shared_diet, inactive_diet])
+    ShoppingListItem.objects.create(
+        shopping_list=shopping_list, ingredient_name='Wołowina',
+        category=ingredient.category.name, unit=ingredient.unit, total_amount='2100.000'
+    )
+    ShoppingListItem.objects.create(
+        shopping_list=shopping_list, ingredient_name='Marchew', category='Warzywa',
+        unit=unit_kilogram, total_amount='0.875', is_checked=True
+    )
+    ShoppingListItem.objects.create(
+        shopping_list=shopping_list, ingredient_name='Usunięta',
+        unit=unit_kilogram, total_amount='1.000', is_active=False
+    )
+    ShoppingList.objects.create(created_by=user, days_count=3)
+
+
+@pytest.mark.django_db
+class TestFastLists:
+    """Testy zgodności szybkich list z serializerami modeli."""
+
+    @pytest.mark.parametrize('path', [
+        '/api/animals/',
+        '/api/animals/?active=true&ordering=name',
+        '/api/animals/?search=Mru',
+        '/api/diets/',
+        '/api/diets/?active=true',
+        '/api/shopping-lists/',
+    ])
+    def test_response_is_identical_to_model_serializer(
+        self, settings, authenticated_client, fast_list_data, path
+    ):
+        """Test że szybka lista zwraca bajtowo ten sam JSON co ModelSerializer."""
+        settings.BARFIK_RESPONSE_CACHE_ENABLED = False
+
+        settings.BARFIK_FAST_LIST_ENABLED = False
+        expected = authenticated_client.get(path)
+        settings.BARFIK_FAST_LIST_ENABLED = True
+        response = authenticated_client.get(path)
+
+        assert response.status_code == expected.status_code == 200
+        assert expected.data['count'] > 0
+        assert response.content == expected.content
+
+    @pytest.mark.parametrize('fast_list_enabled', [True, False])
+    def test_shopping_list_items_have_explicit_order(
+        self, settings, authenticated_client, fast_list_data, unit_kilogram, fast_list_enabled
+    ):
+        """Test że obie ścieżki zwracają pozycje i diety w kolejności DISPLAY_ORDERING/DIETS_ORDERING."""
+        settings.BARFIK_FAST_LIST_ENABLED = fast_list_enabled
+        shopping_list = ShoppingList.objects.get(title='Tydzień')
+        # Dodana jako ostatnia, ale pierwsza według kategorii
+        ShoppingListItem.objects.create(
+            shopping_list=shopping_list, ingredient_name='Jabłko', category='Inne',
+            unit=unit_kilogram, total_amount='1.000'
+        )
+
+        response = authenticated_client.get('/api/shopping-lists/')
+        result = next(row for row in response.data['results'] if row['id'] == shopping_list.id)
+
+        assert [item['ingredient_name'] for item in result['items']] == ['Jabłko', 'Wołowina', 'Marchew']
+        start_dates = [diet['start_date'] for diet in result['diets_info']]
+        assert start_dates == sorted(start_dates)
+
+    def test_species_is_served_from_dictionary_snapshot(
+        self, settings, authenticated_client, django_assert_num_queries, fast_list_data
+    ):
+        """Test że gatunki nie są dołączane JOIN-em ani osobnym zapytaniem."""
+        settings.BARFIK_RESPONSE_CACHE_ENABLED = False
+        authenticated_client.get('/api/animals/')
+
+        # Użytkownik, mapa dostępu, COUNT, strona
+        with django_assert_num_queries(4) as queries:
+            response = authenticated_client.get('/api/animals/')
+
+        assert response.status_code == 200
+        assert 'barfik_system_animaltype' not in queries.captured_queries[-1]['sql']
+
+    def test_unsupported_field_requires_configuration(self):
+        """Test że pole zagnieżdżone bez dictionary_fields jest błędem konfiguracji."""
+        class BrokenSerializer(ValuesListSerializer):
+            serializer_class = AnimalListSerializer
+
+        with pytest.raises(ImproperlyConfigured):
+            BrokenSerializer()
+
+    def test_values_queryset_selects_only_declared_columns(self):
+        """Test że values() pobiera tylko kolumny potrzebne odpowiedzi."""
+        class NamesSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = Animal
+                fields = ['id', 'name', 'owner']
+
+        class NamesValuesSerializer(ValuesListSerializer):
+            serializer_class = NamesSerializer
+
+        serializer = NamesValuesSerializer()
+
+        assert serializer.columns == ['id', 'name', 'owner']
+        assert serializer.values(Animal.objects.all()).query.values_select == ('id', 'name', 'owner')
+
+    def test_benchmark_command_rolls_back(self, user):
+        """Test że benchmark serializerów list daje zgodny JSON i wycofuje dane."""
+        from io import StringIO
+        from django.core.management import call_command
+
+        stdout = StringIO()
+        call_command(
+            'benchmark_list_serializers',
+            '--animals', '3', '--diets', '1', '--shopping-lists', '2', '--items', '2',
+            '--repeat', '1',
+            stdout=stdout
+        )
+
+        assert 'wierszy/s' in stdout.getvalue()
+        assert 'inny JSON' not in stdout.getvalue()
+        assert not ShoppingList.objects.exists()
+        assert Animal.all_objects.count() == 0
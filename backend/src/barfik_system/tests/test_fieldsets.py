@@ -0,0 +1,137 @@
+"""Testy parametrów ?fields= i ?expand=."""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from barfik_system.fieldsets import parse_field_paths
+
+
+def test_parse_field_paths():
+    """Test że ścieżki z kropkami dają drzewo pól."""
+    assert parse_field_paths('id, ingredients.name,ingredients.unit.symbol,,') == {
+        'id': {},
+        'ingredients': {'name': {}, 'unit': {'symbol': {}}},
+    }
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+    """Testy wyboru pól odpowiedzi."""
+
+    @pytest.fixture(autouse=True)
+    def disable_response_cache(self, settings):
+        settings.BARFIK_RESPONSE_CACHE_ENABLED = False
+
+    @pytest.mark.parametrize('fast_list_enabled', [True, False])
+    def test_animal_list_returns_selected_fields(
+        self, settings, authenticated_client, animal, fast_list_enabled
+    ):
+        """Test że lista zwierząt zwraca tylko wybrane pola (szybka i zwykła ścieżka)."""
+        settings.BARFIK_FAST_LIST_ENABLED = fast_list_enabled
+
+        response = authenticated_client.get('/api/animals/?fields=id,name,species.name')
+
+        assert response.status_code == 200
+        assert response.json()['results'] == [
+            {'id': animal.id, 'species': {'name': 'Pies'}, 'name': 'Rex'}
+        ]
+
+    def test_diet_detail_selects_nested_fields(self, authenticated_client, diet, ingredient):
+        """Test że pola zagnieżdżone wybierane są ścieżką z kropkami."""
+        response = authenticated_client.get(
+            f'/api/diets/{diet.id}/?fields=id,start_date,ingredients.name,ingredients.unit.symbol'
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            'id': diet.id,
+            'start_date': '2025-01-01',
+            'ingredients': [{'name': 'Wołowina', 'unit': {'symbol': 'g'}}],
+        }
+
+    def test_diet_detail_reads_only_selected_columns(self, authenticated_client, diet, ingredient):
+        """Test że zapytania pobierają tylko kolumny wybranych pól."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(
+                f'/api/diets/{diet.id}/?fields=id,ingredients.name'
+            )
+
+        assert response.json() == {'id': diet.id, 'ingredients': [{'name': 'Wołowina'}]}
+        ingredient_queries = [
+            query['sql'] for query in ctx.captured_queries
+            if query['sql'].startswith('SELECT "barfik_system_ingredient"."id"')
+        ]
+        assert len(ingredient_queries) == 1
+        assert '"barfik_system_ingredient"."amount"' not in ingredient_queries[0]
+        assert 'barfik_system_unit' not in ingredient_queries[0]
+
+    def test_unselected_relation_is_not_prefetched(self, authenticated_client, diet, ingredient):
+        """Test że relacje spoza ?fields= nie są prefetchowane."""
+        with CaptureQueriesContext(connection) as full:
+            authenticated_client.get(f'/api/diets/{diet.id}/')
+        with CaptureQueriesContext(connection) as sparse:
+            response = authenticated_client.get(f'/api/diets/{diet.id}/?fields=id,description')
+
+        assert response.json() == {'id': diet.id, 'description': diet.description}
+        assert len(sparse) == len(full) - 1
+        assert not any('barfik_system_ingredient' in query['sql'] for query in sparse.captured_queries)
+
+    def test_unknown_fields_are_ignored(self, authenticated_client, animal):
+        """Test że nieznane pola są pomijane."""
+        response = authenticated_client.get(f'/api/animals/{animal.id}/?fields=id,unknown')
+
+        assert response.status_code == 200
+        assert response.json() == {'id': animal.id}
+
+    def test_write_actions_return_full_response(self, authenticated_client, animal):
+        """Test że akcje zapisu ignorują ?fields=."""
+        response = authenticated_client.patch(
+            f'/api/animals/{animal.id}/?fields=id', {'name': 'Burek'}, format='json'
+        )
+
+        assert response.status_code == 200
+        assert response.data['name'] == 'Burek'
+        assert 'species' in response.data
+
+
+@pytest.mark.django_db
+class TestExpand:
+    """Testy rozwijania relacji."""
+
+    @pytest.fixture(autouse=True)
+    def disable_response_cache(self, settings):
+        settings.BARFIK_RESPONSE_CACHE_ENABLED = False
+
+    def test_relation_is_id_without_expand(self, authenticated_client, diet):
+        """Test że bez ?expand= relacja zwracana jest jako ID."""
+        response = authenticated_client.get(f'/api/diets/{diet.id}/?fields=id,animal')
+
+        assert response.json() == {'id': diet.id, 'animal': diet.animal_id}
+
+    def test_diet_list_expands_animal(self, authenticated_client, diet, animal):
+        """Test że ?expand=animal zwraca zwierzę jako obiekt bez dodatkowych zapytań."""
+        with CaptureQueriesContext(connection) as ids:
+            authenticated_client.get('/api/diets/?fields=id,animal')
+        with CaptureQueriesContext(connection) as expanded:
+            response = authenticated_client.get('/api/diets/?fields=id,animal.name&expand=animal')
+
+        assert response.status_code == 200
+        assert response.json()['results'] == [{'id': diet.id, 'animal': {'name': animal.name}}]
+        assert len(expanded) == len(ids)
+
+    def test_animal_expands_owner(self, authenticated_client, animal, user):
+        """Test że ?expand=owner zwraca właściciela jako obiekt."""
+        response = authenticated_client.get(f'/api/animals/{animal.id}/?fields=id,owner&expand=owner')
+
+        assert response.json() == {
+            'id': animal.id,
+            'owner': {
+                'id': user.id, 'email': user.email, 'first_name': user.first_name,
+                'last_name': user.last_name, 'username': user.username,
+            },
+        }
+
+    def test_non_expandable_field_is_ignored(self, authenticated_client, animal):
+        """Test że pola spoza expandable_fields nie są rozwijane."""
+        response = authenticated_client.get(f'/api/animals/{animal.id}/?fields=id,owner&expand=unknown')
+
+        assert response.json() == {'id': animal.id, 'owner': animal.owner_id}
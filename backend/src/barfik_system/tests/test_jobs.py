@@ -0,0 +1,245 @@
+"""Testy kolejki zadań w tle i asynchronicznego generowania list zakupów."""
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import OperationalError
+from django.utils import timezone
+from rest_framework import status
+from barfik_system import jobs, services
+from barfik_system.management.commands.run_workers import work_loop
+from barfik_system.models import Job, ShoppingList
+
+
+@pytest.mark.django_db
+class TestJobQueue:
+    """Testy rezerwowania i wykonywania zadań."""
+    
+    def test_enqueue_rejects_unknown_kind(self, user):
+        """Test że nieznany typ zadania jest odrzucany."""
+        with pytest.raises(ValueError):
+            jobs.enqueue_job(user, 'unknown_job')
+    
+    def test_claim_marks_job_as_running(self, user, diet):
+        """Test że rezerwacja ustawia status RUNNING i zwiększa attempts."""
+        job = jobs.enqueue_job(
+            user,
+            'generate_shopping_list',
+            {'diet_ids': [diet.id], 'days_count': 1}
+        )
+        
+        claimed = jobs.claim_next_job('worker-1')
+        
+        assert claimed.id == job.id
+        assert claimed.status == 'RUNNING'
+        assert claimed.attempts == 1
+        assert claimed.worker == 'worker-1'
+        
+        # Zadanie nie może zostać zarezerwowane drugi raz
+        assert jobs.claim_next_job('worker-2') is None
+    
+    def test_expired_lease_is_reclaimed(self, user, diet):
+        """Test że zadanie porzucone przez worker jest rezerwowane ponownie po dzierżawie."""
+        job = jobs.enqueue_job(
+            user,
+            'generate_shopping_list',
+            {'diet_ids': [diet.id], 'days_count': 1}
+        )
+        jobs.claim_next_job('worker-1')
+        assert jobs.claim_next_job('worker-2') is None
+        
+        Job.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(hours=1))
+        claimed = jobs.claim_next_job('worker-2')
+        
+        assert claimed.id == job.id
+        assert claimed.worker == 'worker-2'
+        assert claimed.attempts == 2
+    
+    def test_job_fails_after_max_attempts(self, settings, user, diet):
+        """Test że porzucone zadanie po limicie prób jest oznaczane jako FAILED."""
+        settings.BARFIK_JOB_MAX_ATTEMPTS = 2
+        job = jobs.enqueue_job(
+            user,
+            'generate_shopping_list',
+            {'diet_ids': [diet.id], 'days_count': 1}
+        )
+        Job.objects.filter(id=job.id).update(
+            status='RUNNING',
+            attempts=2,
+            started_at=timezone.now() - timedelta(hours=1)
+        )
+        
+        assert jobs.claim_next_job('worker-1') is None
+        
+        job.refresh_from_db()
+        assert job.status == 'FAILED'
+        assert 'limit prób' in job.error
+        assert job.finished_at is not None
+    
+    def test_stale_worker_does_not_overwrite_reclaimed_job(self, user, diet, ingredient):
+        """Test że worker z wygasłą dzierżawą nie nadpisuje zadania przejętego przez inny."""
+        jobs.enqueue_job(
+            user,
+            'generate_shopping_list',
+            {'diet_ids': [diet.id], 'days_count': 1}
+        )
+        stale = jobs.claim_next_job('worker-1')
+        Job.objects.filter(id=stale.id).update(started_at=timezone.now() - timedelta(hours=1))
+        jobs.claim_next_job('worker-2')
+        
+        jobs.run_job(stale)
+        
+        stale.refresh_from_db()
+        assert stale.status == 'RUNNING'
+        assert stale.worker == 'worker-2'
+    
+    def test_run_next_job_generates_shopping_list(self, user, diet, ingredient):
+        """Test że worker generuje listę i zapisuje jej ID w wyniku."""
+        jobs.enqueue_job(
+            user,
+            'generate_shopping_list',
+            {'diet_ids': [diet.id], 'days_count': 2, 'title': 'W tle'}
+        )
+        
+        job = jobs.run_next_job('worker-1')
+        
+        assert job.status == 'SUCCEEDED'
+        shopping_list = ShoppingList.objects.get(id=job.result['shopping_list_id'])
+        assert shopping_list.title == 'W tle'
+        assert shopping_list.created_by == user
+        assert shopping_list.items.count() == 1
+    
+    def test_failed_job_stores_error(self, user):
+        """Test że wyjątek handlera oznacza zadanie jako FAILED."""
+        jobs.enqueue_job(
+            user,
+            'generate_shopping_list',
+            {'diet_ids': [], 'days_count': 1}
+        )
+        
+        job = jobs.run_next_job('worker-1')
+        
+        assert job.status == 'FAILED'
+        assert 'Nie znaleziono aktywnych diet' in job.error
+        assert job.finished_at is not None
+    
+    def test_run_workers_once_drains_queue(self, user, diet):
+        """Test że komenda run_workers --once przetwarza oczekujące zadania."""
+        for _ in range(2):
+            jobs.enqueue_job(
+                user,
+                'generate_shopping_list',
+                {'diet_ids': [diet.id], 'days_count': 1}
+            )
+        
+        call_command('run_workers', '--once', stdout=StringIO())
+        
+        assert Job.objects.filter(status='SUCCEEDED').count() == 2
+    
+    def test_worker_survives_database_error(self, monkeypatch, user, diet, ingredient):
+        """Test że błąd bazy danych nie kończy pętli workera."""
+        jobs.enqueue_job(
+            user,
+            'generate_shopping_list',
+            {'diet_ids': [diet.id], 'days_count': 1}
+        )
+        run_next_job = jobs.run_next_job
+        calls = iter([
+            OperationalError('server closed the connection unexpectedly'),
+            run_next_job,
+            KeyboardInterrupt(),
+        ])
+        
+        def flaky_run_next_job(worker):
+            step = next(calls)
+            if isinstance(step, BaseException):
+                raise step
+            return step(worker)
+        
+        monkeypatch.setattr(jobs, 'run_next_job', flaky_run_next_job)
+        
+        assert work_loop('worker-1', poll_interval=0, once=False) == 1
+        assert Job.objects.get().status == 'SUCCEEDED'
+    
+    def test_job_fails_when_diet_access_was_revoked(self, user, another_user, animal, diet, ingredient):
+        """Test że zadanie współpracownika, któremu odebrano dostęp, nie tworzy listy."""
+        collaboration = services.create_collaboration(animal, another_user, 'EDIT')
+        jobs.enqueue_job(
+            another_user,
+            'generate_shopping_list',
+            {'diet_ids': [diet.id], 'days_count': 1}
+        )
+        collaboration.is_active = False
+        collaboration.save()
+        
+        job = jobs.run_next_job('worker-1')
+        
+        assert job.status == 'FAILED'
+        assert 'Brak dostępu' in job.error
+        assert not ShoppingList.objects.filter(created_by=another_user).exists()
+    
+    def test_regenerate_job_rejects_foreign_list(self, user, another_user, diet, ingredient):
+        """Test że przeliczenie listy innego użytkownika kończy się błędem."""
+        shopping_list = services.generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        jobs.enqueue_job(
+            another_user,
+            'regenerate_shopping_list',
+            {'shopping_list_id': shopping_list.id}
+        )
+        
+        job = jobs.run_next_job('worker-1')
+        
+        assert job.status == 'FAILED'
+        assert 'Nie znaleziono listy zakupów' in job.error
+
+
+@pytest.mark.django_db
+class TestAsyncShoppingListApi:
+    """Testy endpointów 202 + polling."""
+    
+    def test_async_create_returns_202_with_job(self, authenticated_client, diet, ingredient):
+        """Test że async=true zwraca 202 i nie tworzy listy od razu."""
+        response = authenticated_client.post(
+            '/api/shopping-lists/?async=true',
+            {'diets': [diet.id], 'days_count': 7},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == 'PENDING'
+        assert response['Location'].endswith(f"/api/jobs/{response.data['id']}/")
+        assert ShoppingList.objects.count() == 0
+    
+    def test_job_status_endpoint_reports_result(self, authenticated_client, diet, ingredient):
+        """Test że po wykonaniu zadania endpoint statusu zwraca wynik."""
+        response = authenticated_client.post(
+            '/api/shopping-lists/?async=true',
+            {'diets': [diet.id], 'days_count': 7},
+            format='json'
+        )
+        job_id = response.data['id']
+        
+        jobs.run_next_job('worker-1')
+        
+        response = authenticated_client.get(f'/api/jobs/{job_id}/')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['status'] == 'SUCCEEDED'
+        assert ShoppingList.objects.filter(id=response.data['result']['shopping_list_id']).exists()
+    
+    def test_user_cannot_see_other_users_jobs(self, api_client, user, another_user, diet):
+        """Test że zadania innych użytkowników są niewidoczne."""
+        from rest_framework_simplejwt.tokens import RefreshToken
+        
+        job = jobs.enqueue_job(
+            user,
+            'generate_shopping_list',
+            {'diet_ids': [diet.id], 'days_count': 1}
+        )
+        
+        refresh = RefreshToken.for_user(another_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        response = api_client.get(f'/api/jobs/{job.id}/')
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
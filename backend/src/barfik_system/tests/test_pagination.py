@@ -0,0 +1,126 @@
+"""Testy paginacji kursorowej (?pagination=cursor)."""
+import pytest
+from datetime import date, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from barfik_system.models import Animal, Diet, ShoppingList
+from barfik_system.pagination import KeysetCursorPagination
+
+
+def walk(client, url):
+    """Przejdź po linkach next; zwróć odpowiedzi kolejnych stron."""
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append(response.json())
+        url = pages[-1]['next']
+    return pages
+
+
+@pytest.fixture
+def cursor_data(user, animal, animal_type_cat):
+    """Zwierzęta aktywne i usunięte z powtarzającymi się datami utworzenia i rozpoczęcia diet."""
+    animals = [animal] + [
+        Animal.objects.create(owner=user, species=animal_type_cat, name=f'Kot {index}', is_active=index % 3 != 0)
+        for index in range(6)
+    ]
+    created_at = timezone.now() - timedelta(days=1)
+    Animal.all_objects.filter(id__in=[item.id for item in animals[:4]]).update(created_at=created_at)
+
+    for index, item in enumerate(animals):
+        Diet.objects.create(animal=item, start_date=date(2026, 1, 1) + timedelta(days=index % 2))
+        Diet.objects.create(animal=item, start_date=date(2026, 1, 1), is_active=index % 2 == 0)
+    for index in range(5):
+        ShoppingList.objects.create(created_by=user, days_count=index + 1)
+    return animals
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    """Testy paginacji po kluczu sortowania widoku."""
+
+    @pytest.fixture(autouse=True)
+    def small_pages(self, settings, monkeypatch):
+        settings.BARFIK_RESPONSE_CACHE_ENABLED = False
+        monkeypatch.setattr(KeysetCursorPagination, 'page_size', 2)
+
+    @pytest.mark.parametrize('fast_list_enabled', [True, False])
+    @pytest.mark.parametrize('path, queryset, ordering', [
+        ('/api/animals/', Animal.all_objects, ('-is_active', '-created_at', 'id')),
+        ('/api/diets/', Diet.all_objects, ('-is_active', '-start_date', 'id')),
+        ('/api/shopping-lists/', ShoppingList.objects, ('-created_at', 'id')),
+    ])
+    def test_pages_cover_all_rows_in_key_order(
+        self, settings, authenticated_client, cursor_data, fast_list_enabled, path, queryset, ordering
+    ):
+        """Test że kolejne strony zwracają wszystkie wiersze w kolejności klucza."""
+        settings.BARFIK_FAST_LIST_ENABLED = fast_list_enabled
+
+        pages = walk(authenticated_client, f'{path}?pagination=cursor')
+
+        ids = [row['id'] for page in pages for row in page['results']]
+        assert ids == list(queryset.order_by(*ordering).values_list('id', flat=True))
+        assert all(len(page['results']) == 2 for page in pages[:-1])
+        assert 'count' not in pages[0]
+
+    def test_previous_link_returns_previous_page(self, authenticated_client, cursor_data):
+        """Test że link previous wraca do poprzedniej strony."""
+        pages = walk(authenticated_client, '/api/diets/?pagination=cursor')
+
+        assert pages[0]['previous'] is None
+        for previous, page in zip(pages, pages[1:]):
+            response = authenticated_client.get(page['previous'])
+            assert response.json()['results'] == previous['results']
+            assert response.json()['next'] is not None
+
+    def test_page_does_not_count_rows(self, authenticated_client, cursor_data):
+        """Test że strona kursorowa nie wykonuje COUNT(*) ani OFFSET."""
+        second = authenticated_client.get('/api/animals/?pagination=cursor').json()['next']
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = authenticated_client.get(second)
+
+        assert response.status_code == 200
+        sql = ' '.join(query['sql'] for query in ctx.captured_queries)
+        assert 'COUNT(' not in sql
+        assert 'OFFSET' not in sql
+
+    def test_key_columns_are_loaded_with_sparse_fields(self, authenticated_client, cursor_data):
+        """Test że klucz kursora jest pobierany także przy ?fields=."""
+        pages = walk(authenticated_client, '/api/animals/?pagination=cursor&fields=name')
+
+        assert sum(len(page['results']) for page in pages) == len(cursor_data)
+        assert pages[0]['results'][0] == {'name': pages[0]['results'][0]['name']}
+
+    def test_page_number_pagination_is_default(self, authenticated_client, cursor_data):
+        """Test że bez ?pagination=cursor lista ma paginację numerami stron."""
+        response = authenticated_client.get('/api/animals/')
+
+        assert response.json()['count'] == len(cursor_data)
+
+    @pytest.mark.parametrize('cursor', ['zzz', 'eyJwIjogWzFdfQ==', 'eyJwIjogW251bGwsIG51bGwsIG51bGxdfQ=='])
+    def test_invalid_cursor_returns_404(self, authenticated_client, cursor_data, cursor):
+        """Test że niepoprawny kursor daje 404 jak CursorPagination DRF."""
+        response = authenticated_client.get(f'/api/animals/?pagination=cursor&cursor={cursor}')
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_benchmark_command_rolls_back():
+    """Test że benchmark paginacji porównuje te same wiersze i wycofuje dane."""
+    from io import StringIO
+    from django.core.management import call_command
+
+    stdout = StringIO()
+    call_command(
+        'benchmark_pagination',
+        '--animals', '12', '--diets', '1', '--page-size', '5', '--repeat', '1',
+        stdout=stdout
+    )
+
+    assert 'kursor' in stdout.getvalue()
+    assert '✗' not in stdout.getvalue()
+    assert not Animal.all_objects.exists()
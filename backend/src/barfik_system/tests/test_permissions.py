@@ -1,11 +1,12 @@
 """Testy jednostkowe dla uprawnień (permissions)."""
 import pytest
 from unittest.mock import Mock
-from barfik_system.models import Animal, Diet, Ingredient, Collaboration
+from barfik_system.models import Animal, AnimalAccess, Diet, Ingredient, Collaboration
 from barfik_system.permissions import (
     AnimalAccessMixin,
     AnimalResourcePermission
 )
+from barfik_system.access import get_access_map, load_access_map
 
 
 @pytest.mark.django_db
@@ -434,3 +435,135 @@ class TestPermissionEdgeCases:
         
         # Właściciel nadal ma dostęp (OWNER)
         assert permission == 'OWNER'
+
+
+@pytest.mark.django_db
+class TestAccessMap:
+    """Testy mapy dostępu wczytywanej raz na żądanie."""
+    
+    def test_map_is_loaded_with_one_query(
+        self, user, another_user, animal, animal_type_dog, django_assert_num_queries
+    ):
+        """Test że zwierzęta własne i udostępnione są wczytywane jednym zapytaniem."""
+        shared = Animal.objects.create(owner=another_user, species=animal_type_dog, name='Burek')
+        Collaboration.objects.create(animal=shared, user=user, permission='EDIT')
+        deleted = Animal.objects.create(owner=user, species=animal_type_dog, name='Usunięty', is_active=False)
+        
+        with django_assert_num_queries(1):
+            access_map = load_access_map(user)
+        
+        assert access_map.level(animal.id) == 'OWNER'
+        assert access_map.level(shared.id) == 'EDIT'
+        assert access_map.level(deleted.id) == 'OWNER'
+        assert not access_map.is_active(deleted.id)
+        assert access_map.animal_ids == sorted([animal.id, shared.id, deleted.id])
+    
+    def test_inactive_collaboration_is_ignored(self, another_user, animal):
+        """Test że nieaktywna współpraca nie daje dostępu."""
+        Collaboration.objects.create(
+            animal=animal, user=another_user, permission='EDIT', is_active=False
+        )
+        
+        assert load_access_map(another_user).level(animal.id) is None
+    
+    def test_map_is_cached_on_request(self, user, animal, django_assert_num_queries):
+        """Test że kolejne sprawdzenia w tym samym żądaniu nie wykonują zapytań."""
+        request = Mock()
+        request.user = user
+        get_access_map(request)
+        
+        with django_assert_num_queries(0):
+            assert get_access_map(request).level(animal.id) == 'OWNER'
+    
+    def test_collaborator_diet_detail_checks_access_once(
+        self, another_user, animal, diet
+    ):
+        """Test że szczegóły diety współpracownika sprawdzają dostęp jednym zapytaniem."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+        
+        Collaboration.objects.create(animal=animal, user=another_user, permission='READ_ONLY')
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(another_user).access_token}'
+        )
+        
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'/api/diets/{diet.id}/')
+        
+        assert response.status_code == 200
+        access_queries = [
+            query for query in context.captured_queries
+            if AnimalAccess._meta.db_table in query['sql']
+        ]
+        assert len(access_queries) == 1
+        assert not any(
+            Collaboration._meta.db_table in query['sql'] for query in context.captured_queries
+        )
+
+
+@pytest.mark.django_db
+class TestAnimalAccessProjection:
+    """Testy synchronizacji projekcji AnimalAccess."""
+    
+    def levels(self, animal):
+        """Zwróć {user_id: level} dla zwierzęcia."""
+        return dict(AnimalAccess.objects.filter(animal=animal).values_list('user_id', 'level'))
+    
+    def test_new_animal_grants_owner_access(self, user, animal):
+        """Test że utworzenie zwierzęcia dodaje wpis OWNER."""
+        assert self.levels(animal) == {user.id: 'OWNER'}
+    
+    def test_collaboration_lifecycle(self, user, another_user, animal):
+        """Test że zmiany i soft delete współpracy aktualizują projekcję."""
+        collaboration = Collaboration.objects.create(
+            animal=animal, user=another_user, permission='READ_ONLY'
+        )
+        assert self.levels(animal)[another_user.id] == 'READ_ONLY'
+        
+        collaboration.permission = 'EDIT'
+        collaboration.save()
+        assert self.levels(animal)[another_user.id] == 'EDIT'
+        
+        collaboration.is_active = False
+        collaboration.save(update_fields=['is_active', 'updated_at'])
+        assert self.levels(animal) == {user.id: 'OWNER'}
+    
+    def test_inactive_duplicate_keeps_active_collaboration(self, another_user, animal):
+        """Test że dodanie nieaktywnej współpracy nie usuwa aktywnej."""
+        Collaboration.objects.create(animal=animal, user=another_user, permission='READ_ONLY')
+        Collaboration.objects.create(
+            animal=animal, user=another_user, permission='EDIT', is_active=False
+        )
+        
+        assert self.levels(animal)[another_user.id] == 'READ_ONLY'
+    
+    def test_animal_soft_delete_keeps_entries(self, user, animal):
+        """Test że soft delete zwierzęcia nie zmienia projekcji."""
+        animal.is_active = False
+        animal.save(update_fields=['is_active', 'updated_at'])
+        
+        assert self.levels(animal) == {user.id: 'OWNER'}
+    
+    def test_owner_change_rebuilds_entries(self, user, another_user, animal):
+        """Test że zmiana właściciela przenosi wpis OWNER."""
+        animal.owner = another_user
+        animal.save()
+        
+        assert self.levels(animal) == {another_user.id: 'OWNER'}
+    
+    def test_rebuild_command_restores_projection(self, user, another_user, animal, animal_type_cat):
+        """Test że komenda rebuild_animal_access odbudowuje projekcję porcjami."""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        cat = Animal.objects.create(owner=another_user, species=animal_type_cat, name='Mruczek')
+        Collaboration.objects.create(animal=cat, user=user, permission='EDIT')
+        AnimalAccess.objects.all().delete()
+        
+        call_command('rebuild_animal_access', '--chunk-size', '1', stdout=StringIO())
+        
+        assert self.levels(animal) == {user.id: 'OWNER'}
+        assert self.levels(cat) == {another_user.id: 'OWNER', user.id: 'EDIT'}
@@ -0,0 +1,170 @@
+"""
+Testy budżetu zapytań SQL endpointów odczytu.
+
+Każdy endpoint jest wywoływany na małym zbiorze danych i ponownie po jego
+rozszerzeniu. Liczba zapytań nie może zależeć od liczby wierszy (N+1) ani
+przekraczać budżetu zadeklarowanego w atrybucie query_budget viewsetu.
+
+query_budget to słownik {akcja: maksymalna liczba zapytań SQL akcji};
+endpoint z listy ENDPOINTS musi mieć w nim wpis.
+"""
+import pytest
+from datetime import date, timedelta
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from barfik_system import views
+from barfik_system.dictionaries import get_dictionaries
+from barfik_system.models import (
+    Animal, Collaboration, Diet, Ingredient, Job,
+    ShoppingList, ShoppingListItem
+)
+
+
+# (nazwa, viewset, akcja, ścieżka na podstawie danych kotwicy)
+ENDPOINTS = [
+    ('users-me', views.UserViewSet, 'me', lambda d: '/api/users/me/'),
+    ('dashboard', views.DashboardViewSet, 'stats', lambda d: '/api/dashboard/stats/'),
+    ('animal-types-list', views.AnimalTypeViewSet, 'list', lambda d: '/api/animal-types/'),
+    ('animal-types-detail', views.AnimalTypeViewSet, 'retrieve',
+     lambda d: f'/api/animal-types/{d["animal"].species_id}/'),
+    ('units-list', views.UnitViewSet, 'list', lambda d: '/api/units/'),
+    ('units-detail', views.UnitViewSet, 'retrieve', lambda d: f'/api/units/{d["unit"].id}/'),
+    ('categories-list', views.IngredientCategoryViewSet, 'list', lambda d: '/api/ingredient-categories/'),
+    ('categories-detail', views.IngredientCategoryViewSet, 'retrieve',
+     lambda d: f'/api/ingredient-categories/{d["category"].id}/'),
+    ('animals-list', views.AnimalViewSet, 'list', lambda d: '/api/animals/'),
+    ('animals-detail', views.AnimalViewSet, 'retrieve', lambda d: f'/api/animals/{d["animal"].id}/'),
+    ('collaborations-list', views.CollaborationViewSet, 'list',
+     lambda d: f'/api/animals/{d["animal"].id}/collaborations/'),
+    ('collaborations-detail', views.CollaborationViewSet, 'retrieve',
+     lambda d: f'/api/animals/{d["animal"].id}/collaborations/{d["collaboration"].id}/'),
+    ('diets-list', views.DietViewSet, 'list', lambda d: '/api/diets/'),
+    ('diets-detail', views.DietViewSet, 'retrieve', lambda d: f'/api/diets/{d["diet"].id}/'),
+    ('ingredients-list', views.IngredientViewSet, 'list',
+     lambda d: f'/api/diets/{d["diet"].id}/ingredients/'),
+    ('ingredients-detail', views.IngredientViewSet, 'retrieve',
+     lambda d: f'/api/diets/{d["diet"].id}/ingredients/{d["ingredient"].id}/'),
+    ('shopping-lists-list', views.ShoppingListViewSet, 'list', lambda d: '/api/shopping-lists/'),
+    ('shopping-lists-detail', views.ShoppingListViewSet, 'retrieve',
+     lambda d: f'/api/shopping-lists/{d["shopping_list"].id}/'),
+    ('items-list', views.ShoppingListItemViewSet, 'list',
+     lambda d: f'/api/shopping-lists/{d["shopping_list"].id}/items/'),
+    ('items-detail', views.ShoppingListItemViewSet, 'retrieve',
+     lambda d: f'/api/shopping-lists/{d["shopping_list"].id}/items/{d["item"].id}/'),
+    ('jobs-list', views.JobViewSet, 'list', lambda d: '/api/jobs/'),
+    ('jobs-detail', views.JobViewSet, 'retrieve', lambda d: f'/api/jobs/{d["job"].id}/'),
+]
+
+
+def add_batch(anchor, index):
+    """
+    Dodaj porcję danych powiązanych z obiektami kotwicy.
+
+    Każda porcja zwiększa liczbę wierszy na każdym poziomie zagnieżdżenia:
+    zwierzęta (własne i udostępnione), diety, składniki, współpracownicy,
+    listy zakupów z dietami i pozycjami oraz zadania w tle.
+    """
+    user = anchor['user']
+    # Bez hasła - haszowanie spowalniałoby budowę danych
+    other = User.objects.create(
+        username=f'budget{index}@example.com',
+        email=f'budget{index}@example.com'
+    )
+    today = date.today()
+
+    own_animal = Animal.objects.create(owner=user, species=anchor['species'], name=f'Własne {index}')
+    shared_animal = Animal.objects.create(owner=other, species=anchor['species'], name=f'Udostępnione {index}')
+    Collaboration.objects.create(animal=shared_animal, user=user, permission='EDIT')
+    Collaboration.objects.create(animal=anchor['animal'], user=other, permission='READ_ONLY')
+
+    diets = [anchor['diet']]
+    for animal in (own_animal, shared_animal, anchor['animal']):
+        diet = Diet.objects.create(
+            animal=animal,
+            start_date=today - timedelta(days=1),
+            end_date=today + timedelta(days=3)
+        )
+        diets.append(diet)
+
+    for diet in diets:
+        Ingredient.objects.create(
+            diet=diet,
+            name=f'Składnik {index}',
+            category=anchor['category'],
+            unit=anchor['unit'],
+            amount=100
+        )
+
+    shopping_list = ShoppingList.objects.create(created_by=user, days_count=7)
+    shopping_list.diets.set(diets[1:])
+    anchor['shopping_list'].diets.add(*diets[1:])
+    for target in (shopping_list, anchor['shopping_list']):
+        ShoppingListItem.objects.create(
+            shopping_list=target,
+            ingredient_name=f'Pozycja {index}',
+            category=anchor['category'].name,
+            unit=anchor['unit'],
+            total_amount=700
+        )
+
+    Job.objects.create(created_by=user, kind='generate_shopping_list')
+
+
+@pytest.fixture
+def anchor(user, animal, diet, ingredient, unit_gram, category_meat, another_user):
+    """Obiekty, do których odwołują się endpointy szczegółów."""
+    shopping_list = ShoppingList.objects.create(created_by=user, days_count=7)
+    shopping_list.diets.add(diet)
+    item = ShoppingListItem.objects.create(
+        shopping_list=shopping_list,
+        ingredient_name=ingredient.name,
+        category=category_meat.name,
+        unit=unit_gram,
+        total_amount=700
+    )
+    return {
+        'user': user,
+        'species': animal.species,
+        'animal': animal,
+        'diet': diet,
+        'ingredient': ingredient,
+        'unit': unit_gram,
+        'category': category_meat,
+        'collaboration': Collaboration.objects.create(animal=animal, user=another_user),
+        'shopping_list': shopping_list,
+        'item': item,
+        'job': Job.objects.create(created_by=user, kind='generate_shopping_list'),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'view_class, action, build_path',
+    [
+        pytest.param(*endpoint[1:], id=endpoint[0])
+        for endpoint in ENDPOINTS
+    ]
+)
+def test_query_budget(settings, authenticated_client, anchor, view_class, action, build_path):
+    """Test że liczba zapytań endpointu jest stała i mieści się w budżecie."""
+    # Cache odpowiedzi ukryłby zapytania przy powtórnym wywołaniu
+    settings.BARFIK_RESPONSE_CACHE_ENABLED = False
+    budget = view_class.query_budget[action]
+    path = build_path(anchor)
+
+    add_batch(anchor, 0)
+    # Snapshot słowników wczytywany jest raz na proces, nie w mierzonym żądaniu
+    get_dictionaries()
+    with CaptureQueriesContext(connection) as small:
+        response = authenticated_client.get(path)
+    assert response.status_code == 200
+
+    for index in range(1, 3):
+        add_batch(anchor, index)
+    with CaptureQueriesContext(connection) as large:
+        response = authenticated_client.get(path)
+    assert response.status_code == 200
+
+    assert len(large) == len(small), 'Liczba zapytań zależy od liczby wierszy (N+1)'
+    assert len(large) <= budget, f'Przekroczony budżet zapytań: {len(large)} > {budget}'
@@ -0,0 +1,142 @@
+"""Testy renderera i parsera JSON na orjson."""
+import io
+import uuid
+import pytest
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from barfik_system.renderers import ORJSONParser, ORJSONRenderer
+
+
+PAYLOADS = [
+    pytest.param({'id': 1, 'name': 'Reksio', 'weight_kg': '12.50', 'note': None}, id='basic'),
+    pytest.param({'total_amount': Decimal('2100.000'), 'factor': Decimal('0.001')}, id='decimal'),
+    pytest.param({
+        'created_at': datetime(2026, 3, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'updated_at': datetime(2026, 3, 1, 12, 30, 15, tzinfo=dt_timezone(timedelta(hours=1))),
+        'naive': datetime(2026, 3, 1, 12, 30),
+        'start_date': date(2026, 3, 1),
+        'at': time(8, 15, 30, 500000),
+        'duration': timedelta(hours=2),
+    }, id='dates'),
+    pytest.param({'id': uuid.UUID('12345678-1234-5678-1234-567812345678')}, id='uuid'),
+    pytest.param({'message': gettext_lazy('This field is required.')}, id='lazy-string'),
+    pytest.param({'name': 'Żółć "cytat" \\ / \n\t\x01 \u2028 \u2029 \U0001f415'}, id='unicode'),
+    pytest.param([1, -2, 2 ** 63 - 1, 1.5, 0.1, -0.0, True, False, None, [], {}], id='numbers'),
+    pytest.param({'big': 2 ** 70}, id='long-integer'),
+    pytest.param({'small': 1e-7, 'large': 1.5e300, 'decimal': Decimal('1E+20')}, id='exponent'),
+    pytest.param([0.00001, -0.000012345, 0.0001], id='small-float'),
+    pytest.param({'quote': '„cytat”', 'ellipsis': '…'}, id='general-punctuation'),
+    pytest.param({1: 'klucz int', 'a': (1, 2)}, id='non-str-keys'),
+]
+
+
+class TestORJSONRenderer:
+    """Testy zgodności ORJSONRenderer z JSONRenderer."""
+
+    @pytest.mark.parametrize('data', PAYLOADS)
+    def test_output_is_byte_identical(self, data):
+        """Test że wynik jest bajtowo identyczny ze standardowym rendererem."""
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    @pytest.mark.parametrize('accepted_media_type', [
+        'application/json; indent=4',
+        'application/json; indent=0',
+    ])
+    def test_indent_is_byte_identical(self, accepted_media_type):
+        """Test że wcięcia z nagłówka Accept są obsługiwane jak w JSONRenderer."""
+        data = {'id': 1, 'items': [{'amount': '1.000'}]}
+
+        assert (
+            ORJSONRenderer().render(data, accepted_media_type)
+            == JSONRenderer().render(data, accepted_media_type)
+        )
+
+    def test_none_renders_empty_body(self):
+        """Test że brak danych daje pustą treść."""
+        assert ORJSONRenderer().render(None) == b''
+
+
+class TestORJSONParser:
+    """Testy zgodności ORJSONParser z JSONParser."""
+
+    @pytest.mark.parametrize('body', [
+        b'{"name": "\\u017b\\u00f3\\u0142\\u0107", "amount": "100.000", "ids": [1, 2, 3]}',
+        '{"name": "Żółć", "amount": 1.5e-7, "flag": true, "empty": null}'.encode(),
+        b'{"id": 123456789012345678901234567890, "a": 1, "a": 2}',
+        b'[1.0000000000000002, -0, 18446744073709551616]',
+    ])
+    def test_result_is_identical(self, body):
+        """Test że wynik parsowania jest taki sam jak standardowego parsera."""
+        expected = JSONParser().parse(io.BytesIO(body))
+        result = ORJSONParser().parse(io.BytesIO(body))
+
+        assert result == expected
+        assert [type(value) for value in result] == [type(value) for value in expected]
+
+    @pytest.mark.parametrize('body', [b'{"a": ', b'{"a": NaN}', b'', '\ufeff{}'.encode()])
+    def test_invalid_body_raises_same_parse_error(self, body):
+        """Test że błędy składni dają ten sam komunikat ParseError."""
+        with pytest.raises(ParseError) as expected:
+            JSONParser().parse(io.BytesIO(body))
+        with pytest.raises(ParseError) as error:
+            ORJSONParser().parse(io.BytesIO(body))
+
+        assert str(error.value.detail) == str(expected.value.detail)
+
+
+@pytest.mark.django_db
+class TestORJSONApi:
+    """Testy renderera i parsera w odpowiedziach API."""
+
+    def test_diet_and_shopping_list_responses_are_identical(
+        self, settings, authenticated_client, user, diet, ingredient
+    ):
+        """Test że odpowiedzi API są identyczne jak ze standardowego renderera."""
+        from barfik_system.services import generate_shopping_list
+
+        settings.BARFIK_RESPONSE_CACHE_ENABLED = False
+        shopping_list = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=7)
+
+        for path in (
+            f'/api/diets/{diet.id}/',
+            '/api/diets/',
+            f'/api/shopping-lists/{shopping_list.id}/',
+            '/api/dashboard/stats/',
+        ):
+            response = authenticated_client.get(path)
+
+            assert response.status_code == 200
+            assert isinstance(response.accepted_renderer, ORJSONRenderer)
+            assert response.content == JSONRenderer().render(response.data)
+
+    def test_request_body_is_parsed(self, authenticated_client, animal_type_dog):
+        """Test że treść żądania jest parsowana przez ORJSONParser."""
+        response = authenticated_client.post(
+            '/api/animals/',
+            '{"species_id": %d, "name": "Żółw", "weight_kg": "3.25"}' % animal_type_dog.id,
+            content_type='application/json'
+        )
+
+        assert response.status_code == 201
+        assert response.data['name'] == 'Żółw'
+
+    def test_benchmark_command_rolls_back(self):
+        """Test że benchmark JSON daje zgodne bajty i wycofuje dane."""
+        from io import StringIO
+        from django.core.management import call_command
+        from barfik_system.models import Diet
+
+        stdout = StringIO()
+        call_command(
+            'benchmark_json',
+            '--diets', '2', '--ingredients', '2', '--items', '3', '--repeat', '1',
+            stdout=stdout
+        )
+
+        assert 'kodowanie' in stdout.getvalue()
+        assert '✗' not in stdout.getvalue()
+        assert not Diet.all_objects.exists()
@@ -6,11 +6,14 @@ from barfik_system.models import (
     Diet, Ingredient, ShoppingList, ShoppingListItem,
     Collaboration, Animal
 )
+from barfik_system.units import get_conversion_table
 from barfik_system.services import (
     recalculate_diet_total,
+    recalculate_diet_totals,
     create_ingredient,
     update_ingredient,
     delete_ingredient,
+    aggregate_ingredients,
     generate_shopping_list,
     regenerate_shopping_list,
     get_accessible_animals,
@@ -96,24 +99,124 @@ class TestRecalculateDietTotal:
         total = recalculate_diet_total(99999)
         assert total == Decimal('0')
 
+    def test_recalculates_many_diets_with_one_update(self, diet, animal, unit_gram, category_meat):
+        """Test że recalculate_diet_totals przelicza wiele diet jednym UPDATE."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        empty_diet = Diet.objects.create(
+            animal=animal,
+            start_date=date(2025, 2, 1),
+            total_daily_mass=Decimal('999')
+        )
+        Ingredient.objects.create(
+            diet=diet,
+            name='Wołowina',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=Decimal('500')
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            updated = recalculate_diet_totals([diet.id, empty_diet.id])
+
+        assert updated == 2
+        diet_updates = [
+            q for q in queries.captured_queries
+            if q['sql'].startswith('UPDATE "barfik_system_diet"')
+        ]
+        assert len(diet_updates) == 1
+
+        diet.refresh_from_db()
+        empty_diet.refresh_from_db()
+        assert diet.total_daily_mass == Decimal('500')
+        assert empty_diet.total_daily_mass == Decimal('0')
+
+
+@pytest.mark.django_db
+class TestDeferredDietRecalculation:
+    """Testy przeliczania total_daily_mass raz na transakcję."""
+
+    def test_recalculation_waits_for_commit(
+        self, diet, unit_gram, category_meat, django_capture_on_commit_callbacks
+    ):
+        """Test że zapis składnika nie przelicza diety przed commitem."""
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            Ingredient.objects.create(
+                diet=diet,
+                name='Wołowina',
+                category=category_meat,
+                cooking_method='raw',
+                unit=unit_gram,
+                amount=Decimal('500')
+            )
+            diet.refresh_from_db()
+            assert diet.total_daily_mass == Decimal('0')
+
+        for callback in callbacks:
+            callback()
+
+        diet.refresh_from_db()
+        assert diet.total_daily_mass == Decimal('500')
+
+    def test_transaction_recalculates_each_diet_once(
+        self, diet, animal, unit_gram, category_meat, django_capture_on_commit_callbacks
+    ):
+        """Test że wiele zmian składników w transakcji daje jedno przeliczenie."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        other_diet = Diet.objects.create(animal=animal, start_date=date(2025, 2, 1))
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            for target, amount in ((diet, '100'), (diet, '200'), (other_diet, '300')):
+                ingredient = create_ingredient(
+                    diet_id=target.id,
+                    name=f'Składnik {amount}',
+                    category=category_meat,
+                    cooking_method='raw',
+                    unit=unit_gram,
+                    amount=Decimal(amount)
+                )
+            update_ingredient(ingredient.id, amount=Decimal('400'))
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+
+        diet_updates = [
+            q for q in queries.captured_queries
+            if q['sql'].startswith('UPDATE "barfik_system_diet"')
+        ]
+        assert len(diet_updates) == 1
+
+        diet.refresh_from_db()
+        other_diet.refresh_from_db()
+        assert diet.total_daily_mass == Decimal('300')
+        assert other_diet.total_daily_mass == Decimal('400')
+
 
 @pytest.mark.django_db
 class TestIngredientServices:
     """Testy serwisów związanych ze składnikami."""
     
-    def test_create_ingredient_updates_diet_total(self, diet, unit_gram, category_meat):
-        """Test że create_ingredient aktualizuje total_daily_mass."""
+    def test_create_ingredient_updates_diet_total(
+        self, diet, unit_gram, category_meat, django_capture_on_commit_callbacks
+    ):
+        """Test że create_ingredient aktualizuje total_daily_mass (po commicie)."""
         diet.total_daily_mass = Decimal('0')
         diet.save()
         
-        ingredient = create_ingredient(
-            diet_id=diet.id,
-            name='Wołowina',
-            category=category_meat,
-            cooking_method='raw',
-            unit=unit_gram,
-            amount=Decimal('600')
-        )
+        with django_capture_on_commit_callbacks(execute=True):
+            ingredient = create_ingredient(
+                diet_id=diet.id,
+                name='Wołowina',
+                category=category_meat,
+                cooking_method='raw',
+                unit=unit_gram,
+                amount=Decimal('600')
+            )
         
         assert ingredient.id is not None
         
@@ -121,7 +224,7 @@ class TestIngredientServices:
         assert diet.total_daily_mass == Decimal('600')
     
     def test_update_ingredient_recalculates_diet_total(
-        self, diet, unit_gram, category_meat
+        self, diet, unit_gram, category_meat, django_capture_on_commit_callbacks
     ):
         """Test że update_ingredient przelicza total_daily_mass."""
         ingredient = Ingredient.objects.create(
@@ -138,7 +241,8 @@ class TestIngredientServices:
         assert diet.total_daily_mass == Decimal('400')
         
         # Zaktualizuj składnik
-        updated = update_ingredient(ingredient.id, amount=Decimal('800'))
+        with django_capture_on_commit_callbacks(execute=True):
+            updated = update_ingredient(ingredient.id, amount=Decimal('800'))
         
         assert updated.amount == Decimal('800')
         
@@ -146,7 +250,7 @@ class TestIngredientServices:
         assert diet.total_daily_mass == Decimal('800')
     
     def test_delete_ingredient_recalculates_diet_total(
-        self, diet, unit_gram, category_meat
+        self, diet, unit_gram, category_meat, django_capture_on_commit_callbacks
     ):
         """Test że delete_ingredient (soft delete) przelicza total."""
         ingredient1 = Ingredient.objects.create(
@@ -172,7 +276,8 @@ class TestIngredientServices:
         assert diet.total_daily_mass == Decimal('800')
         
         # Usuń składnik1
-        delete_ingredient(ingredient1.id)
+        with django_capture_on_commit_callbacks(execute=True):
+            delete_ingredient(ingredient1.id)
         
         diet.refresh_from_db()
         assert diet.total_daily_mass == Decimal('300')  # Tylko składnik2
@@ -363,6 +468,140 @@ class TestShoppingListGeneration:
         assert shopping_list.title == 'Lista zakupów (5 dni)'
 
 
+@pytest.mark.django_db
+class TestAggregateIngredients:
+    """Testy silnika agregacji składników po stronie bazy."""
+    
+    def test_aggregates_trimmed_case_insensitive_names(
+        self, diet, unit_gram, category_meat
+    ):
+        """Test że nazwy są normalizowane (trim + lower) przed grupowaniem."""
+        Ingredient.objects.create(
+            diet=diet,
+            name='Marchewka',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=Decimal('100')
+        )
+        
+        Ingredient.objects.create(
+            diet=diet,
+            name='  marchewka ',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=Decimal('50')
+        )
+        
+        aggregated = aggregate_ingredients([diet.id], days_count=2)
+        
+        assert len(aggregated) == 1
+        assert aggregated[0]['total_amount'] == Decimal('300')
+        assert aggregated[0]['unit_id'] == unit_gram.id
+        assert aggregated[0]['category'] == category_meat.name
+    
+    def test_uses_empty_category_when_missing(self, diet, unit_gram):
+        """Test że brak kategorii daje pusty string."""
+        Ingredient.objects.create(
+            diet=diet,
+            name='Olej',
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=Decimal('10')
+        )
+        
+        aggregated = aggregate_ingredients([diet.id], days_count=1)
+        
+        assert aggregated[0]['category'] == ''
+    
+    def test_query_count_is_constant(
+        self, diet, unit_gram, category_meat, django_assert_num_queries
+    ):
+        """Test że agregacja wykonuje stałą liczbę zapytań niezależnie od liczby składników."""
+        for i in range(10):
+            Ingredient.objects.create(
+                diet=diet,
+                name=f'Składnik {i}',
+                category=category_meat,
+                cooking_method='raw',
+                unit=unit_gram,
+                amount=Decimal('10')
+            )
+        
+        # Tabela konwersji ze snapshotu słowników - zapytanie agregujące i znacznik wersji
+        get_conversion_table()
+        
+        with django_assert_num_queries(2):
+            aggregated = aggregate_ingredients([diet.id], days_count=1)
+        
+        assert len(aggregated) == 10
+    
+    def test_mixed_units_of_same_dimension_are_converted(
+        self, diet, unit_gram, unit_kilogram, category_meat
+    ):
+        """Test że gramy i kilogramy są sumowane i prezentowane w jednej jednostce."""
+        Ingredient.objects.create(
+            diet=diet,
+            name='Wołowina',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=Decimal('500')
+        )
+        
+        Ingredient.objects.create(
+            diet=diet,
+            name='wołowina',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_kilogram,
+            amount=Decimal('1')
+        )
+        
+        aggregated = aggregate_ingredients([diet.id], days_count=2)
+        
+        assert len(aggregated) == 1
+        assert aggregated[0]['unit_id'] == unit_kilogram.id
+        assert aggregated[0]['total_amount'] == Decimal('3.000')
+    
+    def test_different_dimensions_are_not_merged(
+        self, diet, unit_gram, category_meat
+    ):
+        """Test że ta sama nazwa w różnych wymiarach daje osobne pozycje."""
+        from barfik_system.models import Unit
+        
+        unit_ml = Unit.objects.create(
+            name='mililitr',
+            symbol='ml',
+            conversion_factor=Decimal('1'),
+            dimension='volume'
+        )
+        
+        Ingredient.objects.create(
+            diet=diet,
+            name='Kefir',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=Decimal('100')
+        )
+        
+        Ingredient.objects.create(
+            diet=diet,
+            name='Kefir',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_ml,
+            amount=Decimal('50')
+        )
+        
+        aggregated = aggregate_ingredients([diet.id], days_count=1)
+        
+        totals = {row['unit_id']: row['total_amount'] for row in aggregated}
+        assert totals == {unit_gram.id: Decimal('100'), unit_ml.id: Decimal('50')}
+
+
 @pytest.mark.django_db
 class TestRegenerateShoppingList:
     """Testy regenerowania listy zakupów."""
@@ -426,6 +665,117 @@ class TestRegenerateShoppingList:
         regenerated = regenerate_shopping_list(shopping_list.id)
         
         assert regenerated.is_completed is False
+    
+    def test_incremental_regenerate_applies_only_differences(
+        self, user, diet, unit_gram, category_meat
+    ):
+        """Test że tryb przyrostowy aktualizuje, dodaje i usuwa tylko różnice."""
+        kept = Ingredient.objects.create(
+            diet=diet,
+            name='Wołowina',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=Decimal('300')
+        )
+        removed = Ingredient.objects.create(
+            diet=diet,
+            name='Kurczak',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=Decimal('200')
+        )
+        
+        shopping_list = generate_shopping_list(
+            user=user,
+            diet_ids=[diet.id],
+            days_count=2
+        )
+        
+        beef_item = shopping_list.items.get(ingredient_name='Wołowina')
+        chicken_item = shopping_list.items.get(ingredient_name='Kurczak')
+        beef_item.is_checked = True
+        beef_item.save()
+        
+        # Zmień ilość, usuń jeden składnik i dodaj nowy
+        kept.amount = Decimal('400')
+        kept.save()
+        removed.is_active = False
+        removed.save()
+        Ingredient.objects.create(
+            diet=diet,
+            name='Marchewka',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=Decimal('50')
+        )
+        
+        regenerate_shopping_list(shopping_list.id, incremental=True)
+        
+        beef_item.refresh_from_db()
+        assert beef_item.is_active is True
+        assert beef_item.is_checked is True
+        assert beef_item.total_amount == Decimal('800')
+        
+        chicken_item.refresh_from_db()
+        assert chicken_item.is_active is False
+        
+        names = set(shopping_list.items.values_list('ingredient_name', flat=True))
+        assert names == {'Wołowina', 'Marchewka'}
+        assert ShoppingListItem.all_objects.filter(
+            shopping_list=shopping_list
+        ).count() == 3
+    
+    def test_incremental_regenerate_retires_duplicate_items(
+        self, user, diet, unit_gram, unit_kilogram, ingredient
+    ):
+        """Test że dwa aktywne wiersze jednego składnika (g i kg) scalają się w jeden."""
+        shopping_list = generate_shopping_list(
+            user=user,
+            diet_ids=[diet.id],
+            days_count=1
+        )
+        kept = shopping_list.items.get()
+        kept.is_checked = True
+        kept.save()
+        duplicate = ShoppingListItem.objects.create(
+            shopping_list=shopping_list,
+            ingredient_name=kept.ingredient_name.upper(),
+            category=kept.category,
+            unit=unit_kilogram,
+            total_amount=Decimal('1')
+        )
+        
+        regenerate_shopping_list(shopping_list.id, incremental=True)
+        
+        kept.refresh_from_db()
+        assert kept.is_active is True
+        assert kept.total_amount == Decimal('300')
+        # Część ilości z duplikatu nie była kupiona
+        assert kept.is_checked is False
+        
+        duplicate.refresh_from_db()
+        assert duplicate.is_active is False
+        assert list(shopping_list.items.values_list('id', flat=True)) == [kept.id]
+    
+    def test_incremental_regenerate_keeps_completed_without_changes(
+        self, user, diet, ingredient
+    ):
+        """Test że lista bez zmian pozostaje ukończona w trybie przyrostowym."""
+        shopping_list = generate_shopping_list(
+            user=user,
+            diet_ids=[diet.id],
+            days_count=1
+        )
+        
+        shopping_list.is_completed = True
+        shopping_list.save()
+        
+        regenerated = regenerate_shopping_list(shopping_list.id, incremental=True)
+        
+        assert regenerated.is_completed is True
 
 
 @pytest.mark.django_db
@@ -582,6 +932,44 @@ class TestAccessibleResourcesFilters:
         diets = Diet.objects.filter(q_filter).distinct()
         
         assert diet in diets
+    
+    def test_filters_do_not_duplicate_rows_without_distinct(
+        self, user, animal, diet, django_user_model
+    ):
+        """Test że wielu współpracowników nie powiela wierszy (bez distinct())."""
+        for index in range(3):
+            Collaboration.objects.create(
+                animal=animal,
+                user=django_user_model.objects.create(username=f'wspolpracownik{index}'),
+                permission='READ_ONLY'
+            )
+        
+        animals = Animal.objects.filter(get_accessible_animals(user))
+        diets = Diet.objects.filter(get_accessible_diets(user))
+        
+        assert animals.count() == 1
+        assert diets.count() == 1
+        assert 'DISTINCT' not in str(animals.query)
+        assert 'barfik_system_collaboration' not in str(animals.query)
+        assert 'barfik_system_collaboration' not in str(diets.query)
+    
+    def test_benchmark_command_rolls_back(self, user):
+        """Test że benchmark filtrów dostępu daje zgodne wyniki i wycofuje dane."""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        animals_before = Animal.all_objects.count()
+        stdout = StringIO()
+        
+        call_command(
+            'benchmark_access_filters',
+            '--animals', '3', '--collaborators', '2', '--diets', '1', '--repeat', '1',
+            stdout=stdout
+        )
+        
+        assert 'EXISTS' in stdout.getvalue()
+        assert 'inny wynik' not in stdout.getvalue()
+        assert Animal.all_objects.count() == animals_before
 
 
 @pytest.mark.django_db
@@ -685,3 +1073,47 @@ class TestDashboardStats:
         
         # Powinno liczyć współdzielone zwierzę
         assert stats['stats']['animals_count'] == 1
+    
+    def test_dashboard_query_count_does_not_grow_with_animals(
+        self, user, another_user, animal_type_dog
+    ):
+        """Test że liczba zapytań dashboardu nie zależy od liczby zwierząt."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        def create_animals(count):
+            for i in range(count):
+                animal = Animal.objects.create(
+                    owner=user,
+                    species=animal_type_dog,
+                    name=f'Zwierzę {i}'
+                )
+                Diet.objects.create(
+                    animal=animal,
+                    start_date=date.today() - timedelta(days=1),
+                    end_date=date.today() + timedelta(days=3)
+                )
+                shared = Animal.objects.create(
+                    owner=another_user,
+                    species=animal_type_dog,
+                    name=f'Współdzielone {i}'
+                )
+                Collaboration.objects.create(
+                    animal=shared,
+                    user=user,
+                    permission='READ_ONLY'
+                )
+        
+        create_animals(1)
+        with CaptureQueriesContext(connection) as small:
+            get_dashboard_stats(user)
+        
+        create_animals(10)
+        with CaptureQueriesContext(connection) as large:
+            stats = get_dashboard_stats(user)
+        
+        assert len(large) == len(small)
+        assert stats['stats']['animals_count'] == 22
+        assert stats['stats']['active_diets_count'] == 11
+        assert len(stats['alerts']['animals_without_diet']) == 11
+        assert len(stats['alerts']['expiring_diets']) == 11
@@ -1,8 +1,8 @@
 """Testy dla list zakupów."""
 import pytest
-from datetime import date
+from datetime import date, timedelta
 from rest_framework import status
-from barfik_system.models import Diet, Ingredient, ShoppingList
+from barfik_system.models import Diet, Ingredient, ShoppingList, ShoppingListItem
 
 
 @pytest.mark.django_db
@@ -145,6 +145,77 @@ class TestShoppingListGeneration:
         shopping_list.refresh_from_db()
         assert shopping_list.is_completed is True
     
+    def test_update_returns_regenerated_list(self, authenticated_client, user, diet, ingredient):
+        """Test że zmiana days_count zwraca przeliczone pozycje i diety ze zwierzętami."""
+        from barfik_system.services import generate_shopping_list
+        
+        shopping_list = generate_shopping_list(
+            user=user,
+            diet_ids=[diet.id],
+            days_count=7
+        )
+        
+        response = authenticated_client.patch(
+            f'/api/shopping-lists/{shopping_list.id}/',
+            {'days_count': 14},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert float(response.data['items'][0]['total_amount']) == float(ingredient.amount) * 14
+        assert response.data['diets_info'] == [{
+            'id': diet.id,
+            'animal_name': diet.animal.name,
+            'start_date': diet.start_date,
+            'end_date': diet.end_date
+        }]
+    
+    def test_update_fetches_list_once(
+        self, authenticated_client, django_assert_num_queries, user, diet, ingredient
+    ):
+        """Test że update bez przeliczenia pobiera listę raz i serializuje ją z prefetch."""
+        from barfik_system.services import generate_shopping_list
+        
+        shopping_list = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=7)
+        
+        # user, lista + 2 prefetch (diety, pozycje), UPDATE
+        with django_assert_num_queries(5):
+            response = authenticated_client.patch(
+                f'/api/shopping-lists/{shopping_list.id}/',
+                {'title': 'Nowy tytuł'},
+                format='json'
+            )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['title'] == 'Nowy tytuł'
+        assert [info['id'] for info in response.data['diets_info']] == [diet.id]
+        assert len(response.data['items']) == 1
+    
+    def test_serialization_uses_prefetched_diets(
+        self, django_assert_num_queries, user, animal, diet, ingredient
+    ):
+        """Test że serializacja listy z planem prefetch nie wykonuje zapytań."""
+        from barfik_system.serializers import ShoppingListSerializer
+        from barfik_system.services import generate_shopping_list, get_shopping_list_for_output
+        
+        diets = [diet] + [
+            Diet.objects.create(animal=animal, start_date=date.today())
+            for _ in range(3)
+        ]
+        shopping_list = generate_shopping_list(
+            user=user,
+            diet_ids=[d.id for d in diets],
+            days_count=7
+        )
+        Diet.objects.filter(id=diets[-1].id).update(is_active=False)
+        
+        shopping_list = get_shopping_list_for_output(shopping_list.id)
+        with django_assert_num_queries(0):
+            data = ShoppingListSerializer(shopping_list).data
+        
+        assert [info['id'] for info in data['diets_info']] == [d.id for d in diets[:-1]]
+        assert {info['animal_name'] for info in data['diets_info']} == {animal.name}
+    
     def test_check_shopping_list_item(self, authenticated_client, user, diet, ingredient):
         """Test zaznaczania pozycji jako kupionej."""
         from barfik_system.services import generate_shopping_list
@@ -169,6 +240,211 @@ class TestShoppingListGeneration:
         item.refresh_from_db()
         assert item.is_checked is True
 
+    
+    def test_bulk_check_shopping_list_items(
+        self, authenticated_client, user, diet, ingredient, unit_gram, category_meat
+    ):
+        """Test zbiorczego zaznaczania pozycji."""
+        from barfik_system.services import generate_shopping_list
+        
+        Ingredient.objects.create(
+            diet=diet,
+            name='Kurczak',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=200.0
+        )
+        
+        shopping_list = generate_shopping_list(
+            user=user,
+            diet_ids=[diet.id],
+            days_count=1
+        )
+        beef = shopping_list.items.get(ingredient_name='Wołowina')
+        chicken = shopping_list.items.get(ingredient_name='Kurczak')
+        
+        response = authenticated_client.patch(
+            f'/api/shopping-lists/{shopping_list.id}/items/',
+            {'items': [
+                {'id': beef.id, 'is_checked': True},
+                {'id': chicken.id, 'is_checked': False},  # bez zmian
+            ]},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['id'] for row in response.data] == [beef.id]
+        assert response.data[0]['is_checked'] is True
+        
+        beef.refresh_from_db()
+        chicken.refresh_from_db()
+        assert beef.is_checked is True
+        assert chicken.is_checked is False
+    
+    def test_bulk_check_rejects_foreign_items(self, authenticated_client, user, diet, ingredient):
+        """Test że pozycje z innej listy są odrzucane."""
+        from barfik_system.services import generate_shopping_list
+        
+        first = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        second = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        foreign_item = second.items.first()
+        
+        response = authenticated_client.patch(
+            f'/api/shopping-lists/{first.id}/items/',
+            {'items': [{'id': foreign_item.id, 'is_checked': True}]},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        foreign_item.refresh_from_db()
+        assert foreign_item.is_checked is False
+
+@pytest.mark.django_db
+class TestShoppingListChanges:
+    """Testy synchronizacji delta (?since=)."""
+    
+    def test_changes_without_since_returns_full_state(self, authenticated_client, user, diet, ingredient):
+        """Test że bez since zwracany jest pełny stan aktywnych pozycji."""
+        from barfik_system.services import generate_shopping_list
+        
+        shopping_list = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        
+        response = authenticated_client.get(f'/api/shopping-lists/{shopping_list.id}/changes/')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response.data['version'], int)
+        assert [row['id'] for row in response.data['shopping_lists']] == [shopping_list.id]
+        assert len(response.data['items']) == 1
+    
+    def test_changes_since_version_returns_only_changed_items(
+        self, settings, authenticated_client, user, diet, ingredient, unit_gram, category_meat
+    ):
+        """Test że po version zwracane są tylko zmienione pozycje i tombstones."""
+        from barfik_system.services import generate_shopping_list
+        
+        settings.BARFIK_SYNC_OVERLAP_SECONDS = 0
+        
+        Ingredient.objects.create(
+            diet=diet,
+            name='Kurczak',
+            category=category_meat,
+            cooking_method='raw',
+            unit=unit_gram,
+            amount=200.0
+        )
+        shopping_list = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        
+        version = authenticated_client.get(
+            f'/api/shopping-lists/{shopping_list.id}/changes/'
+        ).data['version']
+        
+        beef = shopping_list.items.get(ingredient_name='Wołowina')
+        chicken = shopping_list.items.get(ingredient_name='Kurczak')
+        beef.is_checked = True
+        beef.save()
+        chicken.is_active = False
+        chicken.save()
+        
+        response = authenticated_client.get(
+            f'/api/shopping-lists/{shopping_list.id}/changes/?since={version}'
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['shopping_lists'] == []
+        changed = {row['id']: row for row in response.data['items']}
+        assert set(changed) == {beef.id, chicken.id}
+        assert changed[beef.id]['is_checked'] is True
+        assert changed[chicken.id]['is_active'] is False
+        
+        # Kolejna synchronizacja bez zmian jest pusta
+        response = authenticated_client.get(
+            f"/api/shopping-lists/{shopping_list.id}/changes/?since={response.data['version']}"
+        )
+        assert response.data['items'] == []
+    
+    def test_changes_across_lists_include_deleted_lists(
+        self, settings, authenticated_client, user, diet, ingredient
+    ):
+        """Test że zbiorczy strumień zmian zawiera usunięte listy."""
+        from barfik_system.services import generate_shopping_list
+        
+        settings.BARFIK_SYNC_OVERLAP_SECONDS = 0
+        
+        first = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        second = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=2)
+        
+        version = authenticated_client.get('/api/shopping-lists/changes/').data['version']
+        
+        authenticated_client.delete(f'/api/shopping-lists/{first.id}/')
+        
+        response = authenticated_client.get(f'/api/shopping-lists/changes/?since={version}')
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['id'] for row in response.data['shopping_lists']] == [first.id]
+        assert response.data['shopping_lists'][0]['is_active'] is False
+        assert second.id not in [row['shopping_list'] for row in response.data['items']]
+    
+    def test_changes_resend_overlap_window(self, authenticated_client, user, diet, ingredient):
+        """Test że pozycja ze znacznikiem sprzed version (późny commit) nie jest pomijana."""
+        from barfik_system.services import generate_shopping_list
+        
+        shopping_list = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        version = authenticated_client.get(
+            f'/api/shopping-lists/{shopping_list.id}/changes/'
+        ).data['version']
+        
+        # Transakcja ustawiła updated_at przed odczytem, a zatwierdziła zmianę po nim
+        item = shopping_list.items.get()
+        ShoppingListItem.objects.filter(id=item.id).update(
+            is_checked=True,
+            updated_at=item.updated_at - timedelta(seconds=1)
+        )
+        
+        response = authenticated_client.get(
+            f'/api/shopping-lists/{shopping_list.id}/changes/?since={version}'
+        )
+        
+        assert [(row['id'], row['is_checked']) for row in response.data['items']] == [(item.id, True)]
+    
+    def test_changes_of_deleted_list_return_tombstone(self, authenticated_client, user, diet, ingredient):
+        """Test że lista usunięta po since zwraca tombstone zamiast 404."""
+        from barfik_system.services import generate_shopping_list
+        
+        shopping_list = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        version = authenticated_client.get(
+            f'/api/shopping-lists/{shopping_list.id}/changes/'
+        ).data['version']
+        
+        authenticated_client.delete(f'/api/shopping-lists/{shopping_list.id}/')
+        
+        response = authenticated_client.get(
+            f'/api/shopping-lists/{shopping_list.id}/changes/?since={version}'
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [(row['id'], row['is_active']) for row in response.data['shopping_lists']] == [
+            (shopping_list.id, False)
+        ]
+    
+    def test_changes_of_foreign_list_return_404(self, api_client, user, another_user, diet, ingredient):
+        """Test że zmiany cudzej listy nie są dostępne."""
+        from barfik_system.services import generate_shopping_list
+        from rest_framework_simplejwt.tokens import RefreshToken
+        
+        shopping_list = generate_shopping_list(user=user, diet_ids=[diet.id], days_count=1)
+        refresh = RefreshToken.for_user(another_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        response = api_client.get(f'/api/shopping-lists/{shopping_list.id}/changes/')
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    
+    def test_changes_rejects_invalid_since(self, authenticated_client, user, diet):
+        """Test że niepoprawne since zwraca 400."""
+        response = authenticated_client.get('/api/shopping-lists/changes/?since=wczoraj')
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 @pytest.mark.django_db
 class TestShoppingListPermissions:
@@ -196,3 +472,29 @@ class TestShoppingListPermissions:
         
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data['results']) == 0  # Nie widzi listy user
+
+    
+    def test_user_cannot_bulk_check_other_users_list(
+        self, api_client, user, another_user, diet, ingredient
+    ):
+        """Test że zbiorcze zaznaczanie sprawdza uprawnienia do listy."""
+        from barfik_system.services import generate_shopping_list
+        from rest_framework_simplejwt.tokens import RefreshToken
+        
+        shopping_list = generate_shopping_list(
+            user=user,
+            diet_ids=[diet.id],
+            days_count=1
+        )
+        item = shopping_list.items.first()
+        
+        refresh = RefreshToken.for_user(another_user)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        
+        response = api_client.patch(
+            f'/api/shopping-lists/{shopping_list.id}/items/',
+            {'items': [{'id': item.id, 'is_checked': True}]},
+            format='json'
+        )
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
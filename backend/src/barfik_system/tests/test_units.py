@@ -0,0 +1,86 @@
+"""Testy tabeli konwersji jednostek."""
+import pytest
+from decimal import Decimal
+from django.db.models import F
+from barfik_system.dictionaries import VERSION_ID
+from barfik_system.models import DictionaryVersion, Unit
+from barfik_system.units import (
+    UnitConversionTable,
+    get_conversion_table,
+)
+
+
+def make_table():
+    """Zbuduj tabelę bez bazy danych."""
+    return UnitConversionTable([
+        {'id': 1, 'symbol': 'g', 'dimension': 'mass', 'conversion_factor': Decimal('1')},
+        {'id': 2, 'symbol': 'kg', 'dimension': 'mass', 'conversion_factor': Decimal('1000')},
+        {'id': 3, 'symbol': 'ml', 'dimension': 'volume', 'conversion_factor': Decimal('1')},
+    ])
+
+
+class TestUnitConversionTable:
+    """Testy macierzy konwersji."""
+    
+    def test_convert_within_dimension(self):
+        """Test przeliczania między jednostkami tego samego wymiaru."""
+        table = make_table()
+        
+        assert table.convert(Decimal('2.5'), 2, 1) == Decimal('2500.000')
+        assert table.convert(Decimal('250'), 1, 2) == Decimal('0.250')
+    
+    def test_convert_across_dimensions_raises(self):
+        """Test że konwersja między wymiarami jest odrzucana."""
+        with pytest.raises(ValueError):
+            make_table().convert(Decimal('1'), 1, 3)
+    
+    def test_choose_display_unit_is_deterministic(self):
+        """Test że wybierana jest największa użyta jednostka."""
+        table = make_table()
+        
+        assert table.choose_display_unit({1, 2}) == 2
+        assert table.choose_display_unit([2, 1]) == 2
+        assert table.choose_display_unit({1}) == 1
+
+
+@pytest.mark.django_db
+class TestConversionTableSnapshot:
+    """Testy tabeli ze snapshotu słowników sprawdzanego ze znacznikiem wersji."""
+    
+    def test_table_checks_only_version(self, unit_gram, django_assert_num_queries):
+        """Test że kolejne wywołania wykonują tylko zapytanie o znacznik wersji."""
+        get_conversion_table()
+        
+        with django_assert_num_queries(1):
+            table = get_conversion_table([unit_gram.id])
+        
+        assert table.dimension(unit_gram.id) == 'mass'
+    
+    def test_table_is_refreshed_after_unit_change(self, unit_gram):
+        """Test że zapis Unit unieważnia tabelę."""
+        get_conversion_table()
+        
+        unit_gram.conversion_factor = Decimal('2')
+        unit_gram.save()
+        
+        assert get_conversion_table().factor(unit_gram.id) == Decimal('2')
+    
+    def test_table_reflects_change_from_other_process(self, unit_gram):
+        """Test że nowy znacznik wersji (zmiana w innym procesie) wymusza przeładowanie."""
+        get_conversion_table()
+        
+        Unit.objects.filter(id=unit_gram.id).update(conversion_factor=Decimal('2'))
+        DictionaryVersion.objects.filter(pk=VERSION_ID).update(version=F('version') + 1)
+        
+        assert get_conversion_table().factor(unit_gram.id) == Decimal('2')
+    
+    def test_unknown_unit_triggers_reload(self, unit_gram):
+        """Test że nieznana jednostka (np. z innego procesu) wymusza przeładowanie."""
+        get_conversion_table()
+        
+        # bulk_create nie wysyła sygnałów - symulacja zmiany w innym procesie
+        unit_ounce, = Unit.objects.bulk_create([
+            Unit(name='uncja', symbol='oz', conversion_factor=Decimal('28.349523'))
+        ])
+        
+        assert unit_ounce.id in get_conversion_table([unit_ounce.id])
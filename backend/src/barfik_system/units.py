@@ -0,0 +1,83 @@
+"""Tabela konwersji jednostek (część snapshotu słowników procesu)."""
+from decimal import Decimal
+from typing import Dict, Iterable
+
+# Precyzja pól ilości (DecimalField decimal_places=3)
+AMOUNT_QUANTUM = Decimal('0.001')
+
+
+class UnitConversionTable:
+    """
+    Niezmienny snapshot słownika jednostek z macierzą konwersji.
+
+    Konwersja między jednostkami jest możliwa tylko w obrębie jednego
+    wymiaru (mass/volume/count) i sprowadza się do stosunku ich
+    conversion_factor względem jednostki bazowej.
+    """
+
+    def __init__(self, units: Iterable[Dict]):
+        self._units = {unit['id']: unit for unit in units}
+        self._matrix = {
+            source_id: {
+                target_id: source['conversion_factor'] / target['conversion_factor']
+                for target_id, target in self._units.items()
+                if target['dimension'] == source['dimension']
+            }
+            for source_id, source in self._units.items()
+        }
+
+    def __contains__(self, unit_id) -> bool:
+        return unit_id in self._units
+
+    def dimension(self, unit_id: int) -> str:
+        """Wymiar jednostki (mass/volume/count)."""
+        return self._units[unit_id]['dimension']
+
+    def factor(self, unit_id: int) -> Decimal:
+        """Mnożnik do jednostki bazowej."""
+        return self._units[unit_id]['conversion_factor']
+
+    def convert(self, amount: Decimal, from_unit_id: int, to_unit_id: int) -> Decimal:
+        """
+        Przelicz ilość między jednostkami tego samego wymiaru.
+
+        Raises:
+            ValueError: Jeśli jednostki mają różne wymiary
+        """
+        try:
+            ratio = self._matrix[from_unit_id][to_unit_id]
+        except KeyError:
+            raise ValueError(
+                f'Nie można przeliczyć jednostki {from_unit_id} na {to_unit_id}.'
+            )
+        return (amount * ratio).quantize(AMOUNT_QUANTUM)
+
+    def from_base(self, amount_in_base_unit: Decimal, unit_id: int) -> Decimal:
+        """Przelicz ilość w jednostce bazowej na podaną jednostkę."""
+        return (amount_in_base_unit / self.factor(unit_id)).quantize(AMOUNT_QUANTUM)
+
+    def choose_display_unit(self, unit_ids: Iterable[int]) -> int:
+        """
+        Wybierz deterministycznie jednostkę do prezentacji sumy.
+
+        Spośród użytych jednostek (jednego wymiaru) wybierana jest największa;
+        przy równym mnożniku decyduje niższe ID.
+        """
+        return min(unit_ids, key=lambda unit_id: (-self.factor(unit_id), unit_id))
+
+
+def get_conversion_table(required_unit_ids: Iterable[int] = ()) -> UnitConversionTable:
+    """
+    Zwróć tabelę konwersji ze snapshotu słowników procesu (dictionaries.py).
+
+    Tabela służy do wartości zapisywanych w bazie (amount_in_base_unit, sumy
+    list zakupów), więc snapshot jest zawsze porównywany ze znacznikiem
+    wersji w bazie (jedno zapytanie). Jeśli któraś z wymaganych jednostek
+    nie jest znana (np. dodana w innym procesie), snapshot jest wczytywany
+    ponownie.
+
+    Args:
+        required_unit_ids: ID jednostek, które muszą być w tabeli
+    """
+    from .dictionaries import get_dictionaries
+    return get_dictionaries(unit_ids=required_unit_ids, verify=True).conversion_table
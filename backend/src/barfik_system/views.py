@@ -1,32 +1,330 @@
 """Widoki DRF dla aplikacji Barfik."""
+from datetime import date
 from rest_framework import viewsets, status, filters
+from rest_framework import serializers as drf_serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Q, Prefetch
+from django.shortcuts import get_object_or_404
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q, Prefetch, prefetch_related_objects
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 
 from .models import (
     AnimalType, Unit, IngredientCategory, Animal, Diet,
-    Ingredient, Collaboration, ShoppingList, ShoppingListItem
+    Ingredient, Collaboration, ShoppingList, ShoppingListItem, Job
 )
 from .serializers import (
     UserSerializer, UserRegistrationSerializer,
     AnimalTypeSerializer, UnitSerializer, IngredientCategorySerializer,
     AnimalListSerializer, AnimalDetailSerializer, AnimalCreateSerializer,
-    DietListSerializer, DietDetailSerializer, DietCreateSerializer,
-    IngredientSerializer, CollaborationSerializer,
+    DietListSerializer, DietDetailSerializer, DietCreateSerializer, DietCloneSerializer,
+    DietCompositionSerializer, DietCompositionQuerySerializer,
+    IngredientSerializer, IngredientBulkSerializer, CollaborationSerializer,
     ShoppingListSerializer, ShoppingListCreateSerializer,
-    ShoppingListItemSerializer, DashboardSerializer
+    ShoppingListItemSerializer, ShoppingListItemBulkCheckSerializer,
+    ShoppingListChangesQuerySerializer, ShoppingListChangesSerializer,
+    DashboardSerializer, JobSerializer, AnnotatedFieldMixin, IncludedDictionaries,
+    get_serializer_annotations,
+    AnimalListValuesSerializer, DietListValuesSerializer, ShoppingListValuesSerializer
 )
 from .permissions import (
     IsOwnerOrCollaborator, IsOwnerOnly, IsOwnerOrReadOnly,
     CanAccessAnimal, IsShoppingListOwner
 )
-from . import services
+from .access import get_access_map
+from .compact import COMPACT_PARAMETER, INCLUDED_KEY, is_compact_request
+from .pagination import PAGINATION_PARAMETER, CURSOR_PAGINATION, KeysetCursorPagination, is_cursor_request
+from .fieldsets import (
+    FIELDS_PARAMETER, EXPAND_PARAMETER,
+    get_expanded_paths, get_sparse_request, has_sparse_parameters
+)
+from . import services, jobs, exports, caching
+
+
+EXPORT_FORMAT_PARAMETER = OpenApiParameter(
+    'export_format', OpenApiTypes.STR, enum=list(exports.EXPORT_FORMATS),
+    description='Format eksportu (domyślnie csv)'
+)
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        FIELDS_PARAMETER, OpenApiTypes.STR,
+        description='Zwracane pola rozdzielone przecinkami, zagnieżdżone przez kropkę (np. id,ingredients.name)'
+    ),
+    OpenApiParameter(
+        EXPAND_PARAMETER, OpenApiTypes.STR,
+        description='Pola zwracane jako obiekty zamiast ID (np. animal, owner)'
+    ),
+]
+COMPACT_PARAMETER_SCHEMA = OpenApiParameter(
+    COMPACT_PARAMETER, OpenApiTypes.BOOL,
+    description=(
+        'Tryb kompaktowy: jednostki, kategorie i gatunki jako ID, obiekty raz '
+        'w bloku included (także Accept: application/json; compact=true)'
+    )
+)
+CURSOR_PAGINATION_PARAMETERS = [
+    OpenApiParameter(
+        PAGINATION_PARAMETER, OpenApiTypes.STR, enum=[CURSOR_PAGINATION],
+        description=(
+            'Paginacja kursorowa: odpowiedź bez count, kolejne strony z linków '
+            'next/previous (stały koszt strony niezależnie od głębokości)'
+        )
+    ),
+    OpenApiParameter(
+        KeysetCursorPagination.cursor_query_param, OpenApiTypes.STR,
+        description='Kursor strony z linku next/previous (z pagination=cursor)'
+    ),
+]
+EXPORT_RESPONSES = {
+    (200, 'text/csv'): OpenApiTypes.STR,
+    (200, 'application/x-ndjson'): OpenApiTypes.STR,
+}
+
+
+def stream_export_response(request, queryset, columns, filename):
+    """Zwróć strumieniowy eksport w formacie z parametru export_format."""
+    export_format = request.query_params.get('export_format', 'csv').lower()
+    try:
+        return exports.stream_export(queryset, columns, export_format, filename)
+    except ValueError as e:
+        raise drf_serializers.ValidationError({'export_format': [str(e)]})
+
+
+def _select_related_paths(select_related, prefix=''):
+    """Ścieżki z drzewa query.select_related, np. ['diet__animal', 'unit']."""
+    paths = []
+    for name, children in select_related.items():
+        path = f'{prefix}{name}'
+        paths.extend(_select_related_paths(children, f'{path}__') if children else [path])
+    return paths
+
+
+def trim_queryset(queryset, fields, required=(), trim_select_related=False):
+    """
+    Ogranicz queryset do pól serializera wybranych przez ?fields=.
+
+    Relacje spoza odpowiedzi nie są prefetchowane, querysety Prefetch są
+    przycinane rekurencyjnie do pól zagnieżdżonego serializera, a kolumny
+    modelu ograniczane przez only(). Pole metody (source='*') lub własność
+    modelu wyłącza przycinanie na swoim poziomie.
+
+    Args:
+        queryset: Queryset widoku lub Prefetch
+        fields: Pola serializera (serializer.fields)
+        required: Kolumny pobierane zawsze (np. klucz do rodzica w Prefetch)
+        trim_select_related: Usuń select_related pól spoza odpowiedzi
+            (poziom główny zachowuje je dla klas uprawnień)
+    """
+    model = queryset.model
+    sources = {}
+    for field in fields.values():
+        if not field.write_only:
+            sources.setdefault(field.source.split('.')[0], field)
+    if '*' in sources:
+        return queryset
+
+    columns = {model._meta.pk.name, *required}
+    for source, field in sources.items():
+        if isinstance(field, AnnotatedFieldMixin):
+            continue
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return queryset
+        if model_field.concrete and not model_field.many_to_many:
+            columns.add(source)
+        elif not model_field.is_relation:
+            return queryset
+
+    lookups = []
+    for lookup in queryset._prefetch_related_lookups:
+        through = lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+        field = sources.get(through.split('__')[0])
+        if field is None:
+            continue
+        if (
+            isinstance(lookup, Prefetch)
+            and lookup.queryset is not None
+            and '__' not in through
+            and isinstance(field, drf_serializers.ListSerializer)
+        ):
+            relation = model._meta.get_field(through)
+            lookup = Prefetch(
+                through,
+                queryset=trim_queryset(
+                    lookup.queryset,
+                    field.child.fields,
+                    required=(relation.field.name,) if relation.one_to_many else (),
+                    trim_select_related=True
+                ),
+                to_attr=lookup.to_attr
+            )
+        lookups.append(lookup)
+    queryset = queryset.prefetch_related(None).prefetch_related(*lookups)
+
+    select_related = queryset.query.select_related
+    if isinstance(select_related, dict):
+        if trim_select_related:
+            paths = [
+                path for path in _select_related_paths(select_related)
+                if path.split('__')[0] in columns
+            ]
+            # select_related() bez argumentów dołączyłby wszystkie klucze obce
+            queryset = queryset.select_related(None)
+            if paths:
+                queryset = queryset.select_related(*paths)
+        else:
+            columns.update(select_related)
+    return queryset.only(*columns)
+
+
+class SparseFieldsQuerysetMixin:
+    """
+    Queryset akcji list i retrieve dopasowany do ?fields= i ?expand=.
+
+    Pola serializera wybiera SparseFieldsMixin; tu queryset jest przycinany
+    do tych pól (trim_queryset), a rozwinięte pola dostają select_related
+    z expandable_fields serializera.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        request = get_sparse_request({'request': self.request, 'view': self})
+        if request is None or not has_sparse_parameters(request):
+            return queryset
+
+        serializer = self.get_serializer()
+        expanded = get_expanded_paths(request)
+        for name, (_, select_related) in getattr(serializer, 'expandable_fields', {}).items():
+            if name in expanded and name in serializer.fields and select_related:
+                queryset = queryset.select_related(*select_related)
+        return trim_queryset(queryset, serializer.fields)
+
+
+class CompactResponseMixin:
+    """
+    Tryb kompaktowy (compact.py) dla akcji z compact_actions.
+
+    Kontekst serializera dostaje IncludedDictionaries, a odpowiedź blok
+    included. Blok jest częścią danych odpowiedzi, więc trafia też do cache
+    list (UserCachedListMixin).
+    """
+    compact_actions = ('list', 'retrieve')
+
+    def is_compact(self) -> bool:
+        """Czy bieżące żądanie jest w trybie kompaktowym."""
+        return self.action in self.compact_actions and is_compact_request(self.request)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.is_compact():
+            if not hasattr(self, 'included_dictionaries'):
+                self.included_dictionaries = IncludedDictionaries()
+            context[INCLUDED_KEY] = self.included_dictionaries
+        return context
+
+    def get_included(self) -> dict:
+        """Blok included dla obiektów zserializowanych w tym żądaniu."""
+        included = getattr(self, 'included_dictionaries', None)
+        return included.render() if included is not None else {}
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.is_compact():
+            response.data[INCLUDED_KEY] = self.get_included()
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if self.is_compact():
+            response.data[INCLUDED_KEY] = self.get_included()
+        return response
+
+
+class CursorPaginationMixin:
+    """
+    Paginacja kursorowa akcji list na żądanie klienta (?pagination=cursor).
+
+    Klucz stronicowania to cursor_ordering widoku - ostatnie pole musi być
+    unikalne, a indeks modelu powinien odpowiadać kluczowi.
+    """
+    cursor_ordering = ()
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            request = getattr(self, 'request', None)
+            if request is not None and self.action == 'list' and is_cursor_request(request):
+                self._paginator = KeysetCursorPagination()
+        return super().paginator
+
+
+class UserCachedListMixin:
+    """
+    Cache akcji list per użytkownik (caching.cached_user_response).
+
+    Wpis jest unieważniany przez zmianę generacji użytkownika przy każdej
+    zmianie danych, do których ma dostęp.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return caching.cached_user_response(
+            request,
+            f'{self.basename}-list',
+            lambda: super(UserCachedListMixin, self).list(request, *args, **kwargs)
+        )
+
+
+class SerializerAnnotationsMixin:
+    """
+    Nakłada na queryset adnotacje pól AnnotatedFieldMixin serializera akcji.
+
+    Dzięki temu pola liczone (np. liczniki) są pobierane w zapytaniu listy,
+    a nie osobnym zapytaniem na każdy wiersz.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        annotations = get_serializer_annotations(
+            self.get_serializer_class(),
+            context=self.get_serializer_context()
+        )
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+
+class FastListMixin:
+    """
+    Akcja list przez ValuesListSerializer (values_serializer_class).
+
+    Wiersze strony są pobierane przez values() i serializowane bez instancji
+    modeli; odpowiedź ma ten sam kształt co serializer akcji, który nadal
+    opisuje schemat OpenAPI. Wyłączane ustawieniem BARFIK_FAST_LIST_ENABLED.
+    """
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        # Rozwinięte pola (?expand=) serializuje zwykły serializer
+        if (
+            not getattr(settings, 'BARFIK_FAST_LIST_ENABLED', True)
+            or request.query_params.get(EXPAND_PARAMETER)
+        ):
+            return super().list(request, *args, **kwargs)
+
+        serializer = self.values_serializer_class(context=self.get_serializer_context())
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
 
 
 # Auth Views
@@ -58,6 +356,7 @@ class RegisterView(viewsets.GenericViewSet):
 class UserViewSet(viewsets.GenericViewSet):
     """Zarządzanie profilem użytkownika."""
     permission_classes = [IsAuthenticated]
+    query_budget = {'me': 1}
     serializer_class = UserSerializer
     
     @extend_schema(
@@ -126,6 +425,7 @@ class UserViewSet(viewsets.GenericViewSet):
 class DashboardViewSet(viewsets.GenericViewSet):
     """Dashboard z statystykami i alertami."""
     permission_classes = [IsAuthenticated]
+    query_budget = {'stats': 8}
     serializer_class = DashboardSerializer
     
     @extend_schema(
@@ -135,22 +435,35 @@ class DashboardViewSet(viewsets.GenericViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Zwróć statystyki i alerty dashboardu."""
-        dashboard_data = services.get_dashboard_stats(request.user)
-        serializer = self.get_serializer(dashboard_data)
-        return Response(serializer.data)
+        def compute():
+            dashboard_data = services.get_dashboard_stats(request.user, get_access_map(request))
+            serializer = self.get_serializer(dashboard_data)
+            return Response(serializer.data)
+        
+        # Alerty zależą od bieżącej daty - dzień jest częścią klucza
+        return caching.cached_user_response(
+            request, f'dashboard-stats:{date.today().isoformat()}', compute
+        )
 
 
 # Dictionary ViewSets
 
 @extend_schema_view(
-    list=extend_schema(tags=['animal-types'], description='Lista gatunków zwierząt'),
-    retrieve=extend_schema(tags=['animal-types'], description='Szczegóły gatunku'),
+    list=extend_schema(
+        tags=['animal-types'], description='Lista gatunków zwierząt',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
+    retrieve=extend_schema(
+        tags=['animal-types'], description='Szczegóły gatunku',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
 )
-class AnimalTypeViewSet(viewsets.ReadOnlyModelViewSet):
+class AnimalTypeViewSet(SparseFieldsQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     """Słownik gatunków zwierząt (tylko odczyt)."""
     queryset = AnimalType.objects.all()
     serializer_class = AnimalTypeSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 2}
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name', 'created_at']
@@ -158,14 +471,21 @@ class AnimalTypeViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 @extend_schema_view(
-    list=extend_schema(tags=['units'], description='Lista jednostek miar'),
-    retrieve=extend_schema(tags=['units'], description='Szczegóły jednostki'),
+    list=extend_schema(
+        tags=['units'], description='Lista jednostek miar',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
+    retrieve=extend_schema(
+        tags=['units'], description='Szczegóły jednostki',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
 )
-class UnitViewSet(viewsets.ReadOnlyModelViewSet):
+class UnitViewSet(SparseFieldsQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     """Słownik jednostek miar (tylko odczyt)."""
     queryset = Unit.objects.all()
     serializer_class = UnitSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 2}
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'symbol']
     ordering_fields = ['name', 'symbol']
@@ -173,14 +493,21 @@ class UnitViewSet(viewsets.ReadOnlyModelViewSet):
 
 
 @extend_schema_view(
-    list=extend_schema(tags=['ingredient-categories'], description='Lista kategorii składników'),
-    retrieve=extend_schema(tags=['ingredient-categories'], description='Szczegóły kategorii'),
+    list=extend_schema(
+        tags=['ingredient-categories'], description='Lista kategorii składników',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
+    retrieve=extend_schema(
+        tags=['ingredient-categories'], description='Szczegóły kategorii',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
 )
-class IngredientCategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientCategoryViewSet(SparseFieldsQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     """Słownik kategorii składników (tylko odczyt)."""
     queryset = IngredientCategory.objects.all()
     serializer_class = IngredientCategorySerializer
     permission_classes = [IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 2}
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'code']
     ordering_fields = ['name', 'code']
@@ -197,17 +524,29 @@ class IngredientCategoryViewSet(viewsets.ReadOnlyModelViewSet):
             OpenApiParameter('search', OpenApiTypes.STR, description='Szukaj po nazwie'),
             OpenApiParameter('species_id', OpenApiTypes.INT, description='Filtruj po gatunku'),
             OpenApiParameter('active', OpenApiTypes.BOOL, description='Filtruj po statusie (true=aktywne, false=usunięte, brak=wszystkie)'),
+            *SPARSE_FIELDS_PARAMETERS,
+            *CURSOR_PAGINATION_PARAMETERS,
         ]
     ),
-    retrieve=extend_schema(tags=['animals'], description='Szczegóły zwierzęcia'),
+    retrieve=extend_schema(
+        tags=['animals'], description='Szczegóły zwierzęcia',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
     create=extend_schema(tags=['animals'], description='Dodaj nowe zwierzę'),
     update=extend_schema(tags=['animals'], description='Zaktualizuj zwierzę'),
     partial_update=extend_schema(tags=['animals'], description='Zaktualizuj zwierzę (częściowo)'),
     destroy=extend_schema(tags=['animals'], description='Usuń zwierzę (soft delete)'),
 )
-class AnimalViewSet(viewsets.ModelViewSet):
+class AnimalViewSet(
+    UserCachedListMixin, FastListMixin, CursorPaginationMixin, SparseFieldsQuerysetMixin,
+    viewsets.ModelViewSet
+):
     """CRUD dla zwierząt."""
     permission_classes = [IsAuthenticated, IsOwnerOrCollaborator]
+    query_budget = {'list': 4, 'retrieve': 3}
+    values_serializer_class = AnimalListValuesSerializer
+    # Klucz ?pagination=cursor (indeks w Meta modelu)
+    cursor_ordering = ('-is_active', '-created_at', 'id')
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name', 'created_at', 'weight_kg']
@@ -220,8 +559,8 @@ class AnimalViewSet(viewsets.ModelViewSet):
         base_manager = Animal.all_objects if active is None else Animal.objects
         
         queryset = base_manager.filter(
-            services.get_accessible_animals(self.request.user)
-        ).select_related('species', 'owner').distinct()
+            services.get_accessible_animals(self.request.user, get_access_map(self.request))
+        ).select_related('species', 'owner')
         
         # Filtrowanie po species_id
         species_id = self.request.query_params.get('species_id')
@@ -258,17 +597,23 @@ class AnimalViewSet(viewsets.ModelViewSet):
 @extend_schema_view(
     list=extend_schema(
         tags=['collaborations'],
-        description='Lista współpracowników dla zwierzęcia'
+        description='Lista współpracowników dla zwierzęcia',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
+    retrieve=extend_schema(
+        tags=['collaborations'], description='Szczegóły współpracy',
+        parameters=SPARSE_FIELDS_PARAMETERS
     ),
     create=extend_schema(tags=['collaborations'], description='Dodaj współpracownika'),
     update=extend_schema(tags=['collaborations'], description='Zaktualizuj uprawnienia'),
     partial_update=extend_schema(tags=['collaborations'], description='Zaktualizuj uprawnienia (częściowo)'),
     destroy=extend_schema(tags=['collaborations'], description='Usuń współpracę'),
 )
-class CollaborationViewSet(viewsets.ModelViewSet):
+class CollaborationViewSet(SparseFieldsQuerysetMixin, viewsets.ModelViewSet):
     """Zarządzanie współpracownikami zwierzęcia."""
     serializer_class = CollaborationSerializer
     permission_classes = [IsAuthenticated, IsOwnerOnly]
+    query_budget = {'list': 3, 'retrieve': 3}
     filter_backends = [filters.OrderingFilter]
     ordering = ['-created_at']
     
@@ -296,7 +641,6 @@ class CollaborationViewSet(viewsets.ModelViewSet):
         try:
             services.create_collaboration(animal, user, permission)
         except ValueError as e:
-            from rest_framework import serializers as drf_serializers
             raise drf_serializers.ValidationError(str(e))
     
     def perform_destroy(self, instance):
@@ -314,17 +658,29 @@ class CollaborationViewSet(viewsets.ModelViewSet):
             OpenApiParameter('active', OpenApiTypes.BOOL, description='Filtruj po statusie aktywności'),
             OpenApiParameter('start_date__gte', OpenApiTypes.DATE, description='Data rozpoczęcia od'),
             OpenApiParameter('end_date__lte', OpenApiTypes.DATE, description='Data zakończenia do'),
+            *SPARSE_FIELDS_PARAMETERS,
+            COMPACT_PARAMETER_SCHEMA,
+            *CURSOR_PAGINATION_PARAMETERS,
         ]
     ),
-    retrieve=extend_schema(tags=['diets'], description='Szczegóły diety ze składnikami'),
+    retrieve=extend_schema(
+        tags=['diets'], description='Szczegóły diety ze składnikami',
+        parameters=[*SPARSE_FIELDS_PARAMETERS, COMPACT_PARAMETER_SCHEMA]
+    ),
     create=extend_schema(tags=['diets'], description='Dodaj nową dietę'),
     update=extend_schema(tags=['diets'], description='Zaktualizuj dietę'),
     partial_update=extend_schema(tags=['diets'], description='Zaktualizuj dietę (częściowo)'),
     destroy=extend_schema(tags=['diets'], description='Usuń dietę (soft delete)'),
 )
-class DietViewSet(viewsets.ModelViewSet):
+class DietViewSet(
+    UserCachedListMixin, FastListMixin, CompactResponseMixin, CursorPaginationMixin,
+    SparseFieldsQuerysetMixin, SerializerAnnotationsMixin,  viewsets.ModelViewSet):
     """CRUD dla diet."""
     permission_classes = [IsAuthenticated, CanAccessAnimal, IsOwnerOrCollaborator]
+    query_budget = {'list': 4, 'retrieve': 4}
+    values_serializer_class = DietListValuesSerializer
+    # Klucz ?pagination=cursor (indeks w Meta modelu)
+    cursor_ordering = ('-is_active', '-start_date', 'id')
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['start_date', 'end_date', 'created_at']
     ordering = ['-start_date']
@@ -336,13 +692,17 @@ class DietViewSet(viewsets.ModelViewSet):
         base_manager = Diet.all_objects if active is None else Diet.objects
         
         queryset = base_manager.filter(
-            services.get_accessible_diets(self.request.user)
-        ).select_related('animal').prefetch_related(
-            Prefetch(
-                'ingredients',
-                queryset=Ingredient.objects.filter(is_active=True).select_related('unit', 'category')
-            )
-        ).distinct()
+            services.get_accessible_diets(self.request.user, get_access_map(self.request))
+        ).select_related('animal')
+        
+        # Lista (licznik z adnotacji), eksport i skład nie używają
+        # prefetchowanych składników
+        if self.action not in ('list', 'export', 'composition', 'composition_bulk'):
+            ingredients = Ingredient.objects.filter(is_active=True)
+            # Tryb kompaktowy bierze jednostki i kategorie ze snapshotu słowników
+            if not self.is_compact():
+                ingredients = ingredients.select_related('unit', 'category')
+            queryset = queryset.prefetch_related(Prefetch('ingredients', queryset=ingredients))
         
         # Filtrowanie
         animal_id = self.request.query_params.get('animal_id')
@@ -378,6 +738,97 @@ class DietViewSet(viewsets.ModelViewSet):
         """Soft delete diety."""
         instance.is_active = False
         instance.save(update_fields=['is_active', 'updated_at'])
+    
+    @extend_schema(
+        tags=['diets'],
+        description='Eksport diety ze składnikami (strumieniowo, CSV lub NDJSON)',
+        parameters=[EXPORT_FORMAT_PARAMETER],
+        responses=EXPORT_RESPONSES
+    )
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Strumieniowy eksport składników diety."""
+        diet = self.get_object()
+        return stream_export_response(
+            request,
+            exports.diet_ingredients_for_export(diet.id),
+            exports.DIET_INGREDIENT_COLUMNS,
+            f'dieta-{diet.id}'
+        )
+    
+    @extend_schema(
+        tags=['diets'],
+        description=(
+            'Sklonuj dietę ze składnikami na nowy okres (opcjonalnie ze skalowaniem '
+            'ilości i dla innego zwierzęcia). Składniki kopiowane są po stronie bazy.'
+        ),
+        request=DietCloneSerializer,
+        responses={201: DietDetailSerializer}
+    )
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        """Utwórz kopię diety ze składnikami."""
+        source = self.get_object()
+        
+        input_serializer = DietCloneSerializer(data=request.data)
+        input_serializer.is_valid(raise_exception=True)
+        
+        diet = services.clone_diet(source, **input_serializer.validated_data)
+        
+        serializer = DietDetailSerializer(
+            self.get_queryset().get(id=diet.id),
+            context=self.get_serializer_context()
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    @extend_schema(
+        tags=['diets'],
+        description=(
+            'Skład diety: suma amount_in_base_unit i udział procentowy '
+            'w podziale na kategorię i metodę obróbki (liczone w bazie, cache).'
+        ),
+        responses={200: DietCompositionSerializer}
+    )
+    @action(detail=True, methods=['get'])
+    def composition(self, request, pk=None):
+        """Zwróć skład jednej diety."""
+        diet = self.get_object()
+        compositions = services.get_diet_compositions([diet])
+        return Response(DietCompositionSerializer({
+            'diet_id': diet.id,
+            'composition': compositions[diet.id]
+        }).data)
+    
+    @extend_schema(
+        tags=['diets'],
+        operation_id='diets_composition_bulk',
+        description='Skład wielu diet (?ids=1,2,3); niedostępne diety są pomijane.',
+        parameters=[
+            OpenApiParameter('ids', OpenApiTypes.STR, required=True, description='ID diet rozdzielone przecinkami'),
+        ],
+        responses={200: DietCompositionSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'], url_path='composition')
+    def composition_bulk(self, request):
+        """Zwróć skład wielu diet dostępnych dla użytkownika."""
+        query = DietCompositionQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        
+        diets = list(
+            self.get_queryset().filter(
+                id__in=query.validated_data['ids']
+            ).select_related(None).only('id', 'updated_at')
+        )
+        compositions = services.get_diet_compositions(diets)
+        
+        return Response(DietCompositionSerializer(
+            [
+                {'diet_id': diet_id, 'composition': compositions[diet_id]}
+                for diet_id in query.validated_data['ids']
+                if diet_id in compositions
+            ],
+            many=True
+        ).data)
 
 
 @extend_schema_view(
@@ -388,18 +839,23 @@ class DietViewSet(viewsets.ModelViewSet):
             OpenApiParameter('category_id', OpenApiTypes.INT, description='Filtruj po kategorii'),
             OpenApiParameter('cooking_method', OpenApiTypes.STR, description='Filtruj po metodzie (raw/cooked)'),
             OpenApiParameter('search', OpenApiTypes.STR, description='Szukaj po nazwie'),
+            *SPARSE_FIELDS_PARAMETERS,
         ]
     ),
-    retrieve=extend_schema(tags=['ingredients'], description='Szczegóły składnika'),
+    retrieve=extend_schema(
+        tags=['ingredients'], description='Szczegóły składnika',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
     create=extend_schema(tags=['ingredients'], description='Dodaj składnik do diety'),
     update=extend_schema(tags=['ingredients'], description='Zaktualizuj składnik'),
     partial_update=extend_schema(tags=['ingredients'], description='Zaktualizuj składnik (częściowo)'),
     destroy=extend_schema(tags=['ingredients'], description='Usuń składnik (soft delete)'),
 )
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(SparseFieldsQuerysetMixin, viewsets.ModelViewSet):
     """CRUD dla składników diet."""
     serializer_class = IngredientSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrCollaborator]
+    query_budget = {'list': 3, 'retrieve': 3}
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name', 'amount', 'created_at']
@@ -434,7 +890,7 @@ class IngredientViewSet(viewsets.ModelViewSet):
         Sprawdź uprawnienia do obiektu.
         Dla akcji CREATE, sprawdzamy uprawnienia do diety (obiektu nadrzędnego).
         """
-        if self.action == 'create':
+        if self.action == 'create' and not isinstance(obj, Diet):
             # Sprawdź uprawnienia do diety zamiast składnika
             diet = self.get_diet_for_permission_check()
             super().check_object_permissions(request, diet)
@@ -469,6 +925,57 @@ class IngredientViewSet(viewsets.ModelViewSet):
     def perform_destroy(self, instance):
         """Soft delete składnika używając serwisu."""
         services.delete_ingredient(instance.id)
+    
+    def _bulk_save(self, request, diet_id, replace):
+        """Zapisz zbiorczo składniki diety (wspólna logika PUT/PATCH)."""
+        input_serializer = IngredientBulkSerializer(data=request.data)
+        input_serializer.is_valid(raise_exception=True)
+        
+        diet = get_object_or_404(
+            Diet.objects.select_related('animal__owner'),
+            id=diet_id
+        )
+        self.check_object_permissions(request, diet)
+        
+        try:
+            ingredients = services.bulk_save_ingredients(
+                diet,
+                input_serializer.validated_data['ingredients'],
+                replace=replace
+            )
+        except ValueError as e:
+            raise drf_serializers.ValidationError({'ingredients': [str(e)]})
+        
+        serializer = self.get_serializer(ingredients, many=True)
+        return Response(serializer.data)
+    
+    @extend_schema(
+        tags=['ingredients'],
+        description=(
+            'Zastąp składniki diety pełną listą: pozycje z id są aktualizowane, '
+            'bez id tworzone, a aktywne składniki spoza listy usuwane (soft delete).'
+        ),
+        operation_id='diets_ingredients_bulk_replace',
+        request=IngredientBulkSerializer,
+        responses={200: IngredientSerializer(many=True)}
+    )
+    def bulk_replace(self, request, diet_id=None):
+        """Zastąp wszystkie składniki diety w jednym żądaniu."""
+        return self._bulk_save(request, diet_id, replace=True)
+    
+    @extend_schema(
+        tags=['ingredients'],
+        description=(
+            'Zbiorczo dodaj/zaktualizuj składniki diety: pozycje z id są '
+            'aktualizowane, bez id tworzone; pozostałe składniki bez zmian.'
+        ),
+        operation_id='diets_ingredients_bulk_upsert',
+        request=IngredientBulkSerializer,
+        responses={200: IngredientSerializer(many=True)}
+    )
+    def bulk_upsert(self, request, diet_id=None):
+        """Dodaj lub zaktualizuj wiele składników diety w jednym żądaniu."""
+        return self._bulk_save(request, diet_id, replace=False)
 
 
 @extend_schema_view(
@@ -477,17 +984,29 @@ class IngredientViewSet(viewsets.ModelViewSet):
         description='Lista zakupów użytkownika',
         parameters=[
             OpenApiParameter('is_completed', OpenApiTypes.BOOL, description='Filtruj po statusie'),
+            *SPARSE_FIELDS_PARAMETERS,
+            COMPACT_PARAMETER_SCHEMA,
+            *CURSOR_PAGINATION_PARAMETERS,
         ]
     ),
-    retrieve=extend_schema(tags=['shopping-lists'], description='Szczegóły listy zakupów'),
-    create=extend_schema(tags=['shopping-lists'], description='Wygeneruj nową listę zakupów'),
+    retrieve=extend_schema(
+        tags=['shopping-lists'], description='Szczegóły listy zakupów',
+        parameters=[*SPARSE_FIELDS_PARAMETERS, COMPACT_PARAMETER_SCHEMA]
+    ),
     update=extend_schema(tags=['shopping-lists'], description='Zaktualizuj listę zakupów'),
     partial_update=extend_schema(tags=['shopping-lists'], description='Zaktualizuj listę zakupów (częściowo)'),
     destroy=extend_schema(tags=['shopping-lists'], description='Usuń listę zakupów'),
 )
-class ShoppingListViewSet(viewsets.ModelViewSet):
+class ShoppingListViewSet(
+    UserCachedListMixin, FastListMixin, CompactResponseMixin, CursorPaginationMixin,
+    SparseFieldsQuerysetMixin, viewsets.ModelViewSet
+):
     """CRUD dla list zakupów."""
     permission_classes = [IsAuthenticated, IsShoppingListOwner]
+    query_budget = {'list': 5, 'retrieve': 4}
+    values_serializer_class = ShoppingListValuesSerializer
+    # Klucz ?pagination=cursor (indeks w Meta modelu)
+    cursor_ordering = ('-created_at', 'id')
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at', 'is_completed']
     ordering = ['-created_at']
@@ -497,14 +1016,14 @@ class ShoppingListViewSet(viewsets.ModelViewSet):
         queryset = ShoppingList.objects.filter(
             created_by=self.request.user,
             is_active=True
-        ).prefetch_related(
-            'diets',
-            Prefetch(
-                'items',
-                queryset=ShoppingListItem.objects.filter(is_active=True).select_related('unit')
-            )
         )
         
+        # Eksport i synchronizacja delta czytają pozycje osobno - bez prefetch
+        if self.action not in ('export', 'changes'):
+            queryset = queryset.prefetch_related(
+                *services.get_shopping_list_prefetches(with_units=not self.is_compact())
+            )
+        
         # Filtrowanie
         is_completed = self.request.query_params.get('is_completed')
         if is_completed is not None:
@@ -528,14 +1047,45 @@ class ShoppingListViewSet(viewsets.ModelViewSet):
         )
         return shopping_list
     
+    @extend_schema(
+        tags=['shopping-lists'],
+        description=(
+            'Wygeneruj nową listę zakupów. Z parametrem async=true generowanie '
+            'trafia do kolejki zadań w tle i zwracany jest 202 ze statusem zadania.'
+        ),
+        parameters=[
+            OpenApiParameter('async', OpenApiTypes.BOOL, description='Generuj w tle (202 + /api/jobs/{id}/)'),
+        ],
+        responses={201: ShoppingListSerializer, 202: JobSerializer}
+    )
     def create(self, request, *args, **kwargs):
         """Override create dla zwrócenia pełnego obiektu."""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        
+        # Tryb asynchroniczny - zleć generowanie workerom (manage.py run_workers)
+        if request.query_params.get('async', '').lower() == 'true':
+            job = jobs.enqueue_job(
+                request.user,
+                'generate_shopping_list',
+                {
+                    'diet_ids': [diet.id for diet in serializer.validated_data['diets']],
+                    'days_count': serializer.validated_data['days_count'],
+                    'title': serializer.validated_data.get('title', '')
+                }
+            )
+            return Response(
+                JobSerializer(job).data,
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Location': reverse('job-detail', kwargs={'pk': job.id}, request=request)}
+            )
+        
         shopping_list = self.perform_create(serializer)
         
-        # Zwróć pełny obiekt
-        output_serializer = ShoppingListSerializer(shopping_list)
+        # Zwróć pełny obiekt - pobrany ponownie z planem prefetch
+        output_serializer = ShoppingListSerializer(
+            services.get_shopping_list_for_output(shopping_list.id)
+        )
         return Response(
             output_serializer.data,
             status=status.HTTP_201_CREATED
@@ -543,18 +1093,39 @@ class ShoppingListViewSet(viewsets.ModelViewSet):
     
     def perform_update(self, serializer):
         """Jeśli zmieniono diety lub days_count, przelicz listę."""
-        instance = self.get_object()
+        # serializer.instance pochodzi z get_object() w update() - z prefetch diet
+        instance = serializer.instance
         old_days = instance.days_count
-        old_diets = set(instance.diets.values_list('id', flat=True))
+        old_diets = {diet.id for diet in instance.diets.all()}
         
         instance = serializer.save()
         
         # Sprawdź czy zmieniły się diety lub days_count
         new_days = instance.days_count
-        new_diets = set(instance.diets.values_list('id', flat=True))
+        if 'diets' in serializer.validated_data:
+            new_diets = {diet.id for diet in serializer.validated_data['diets']}
+        else:
+            new_diets = old_diets
         
         if old_days != new_days or old_diets != new_diets:
-            services.regenerate_shopping_list(instance.id)
+            services.regenerate_shopping_list(instance.id, incremental=True)
+            return True
+        return False
+    
+    def update(self, request, *args, **kwargs):
+        """Override update - lista pobierana raz, po przeliczeniu odświeżany tylko prefetch."""
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        
+        regenerated = self.perform_update(serializer)
+        if regenerated or 'diets' in serializer.validated_data:
+            # Zapis diet (set) lub przeliczenie pozycji unieważnia prefetch - ponów tylko jego zapytania
+            instance._prefetched_objects_cache = {}
+            prefetch_related_objects([instance], *services.get_shopping_list_prefetches())
+        
+        return Response(ShoppingListSerializer(instance).data)
     
     @extend_schema(
         tags=['shopping-lists'],
@@ -592,18 +1163,111 @@ class ShoppingListViewSet(viewsets.ModelViewSet):
         """Soft delete listy zakupów."""
         instance.is_active = False
         instance.save(update_fields=['is_active', 'updated_at'])
+    
+    def _changes_response(self, request, shopping_list_id=None):
+        """Zbuduj odpowiedź synchronizacji delta."""
+        query = ShoppingListChangesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        
+        changes = services.get_shopping_list_changes(
+            request.user,
+            since=query.validated_data.get('since'),
+            shopping_list_id=shopping_list_id
+        )
+        return Response(ShoppingListChangesSerializer(changes).data)
+    
+    @extend_schema(
+        tags=['shopping-lists'],
+        description=(
+            'Zmiany listy i jej pozycji od ?since= (version lub ISO 8601). '
+            'Usunięte pozycje i lista usunięta po since zwracane są z is_active=false. '
+            'Rekordy z okna nakładania przed since mogą się powtórzyć - klient deduplikuje je po id.'
+        ),
+        parameters=[
+            OpenApiParameter('since', OpenApiTypes.STR, description='version z poprzedniej odpowiedzi lub data ISO 8601'),
+        ],
+        responses={200: ShoppingListChangesSerializer}
+    )
+    @action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        """Synchronizacja delta jednej listy (również usuniętej - tombstone)."""
+        shopping_list = get_object_or_404(
+            ShoppingList.all_objects.filter(created_by=request.user),
+            pk=pk
+        )
+        self.check_object_permissions(request, shopping_list)
+        return self._changes_response(request, shopping_list_id=shopping_list.id)
+    
+    @extend_schema(
+        tags=['shopping-lists'],
+        operation_id='shopping_lists_changes_all',
+        description=(
+            'Zmiany wszystkich list użytkownika od ?since= (version lub ISO 8601). '
+            'Usunięte listy i pozycje zwracane są z is_active=false. '
+            'Rekordy z okna nakładania przed since mogą się powtórzyć - klient deduplikuje je po id.'
+        ),
+        parameters=[
+            OpenApiParameter('since', OpenApiTypes.STR, description='version z poprzedniej odpowiedzi lub data ISO 8601'),
+        ],
+        responses={200: ShoppingListChangesSerializer}
+    )
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes_all(self, request):
+        """Synchronizacja delta wszystkich list użytkownika."""
+        return self._changes_response(request)
+    
+    @extend_schema(
+        tags=['shopping-lists'],
+        description='Eksport pozycji listy zakupów (strumieniowo, CSV lub NDJSON)',
+        parameters=[EXPORT_FORMAT_PARAMETER],
+        responses=EXPORT_RESPONSES
+    )
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Strumieniowy eksport jednej listy zakupów."""
+        shopping_list = self.get_object()
+        return stream_export_response(
+            request,
+            exports.shopping_list_items_for_export(shopping_list_ids=[shopping_list.id]),
+            exports.SHOPPING_LIST_ITEM_COLUMNS,
+            f'lista-zakupow-{shopping_list.id}'
+        )
+    
+    @extend_schema(
+        tags=['shopping-lists'],
+        operation_id='shopping_lists_export_all',
+        description='Eksport pozycji wszystkich list zakupów użytkownika (strumieniowo, CSV lub NDJSON)',
+        parameters=[EXPORT_FORMAT_PARAMETER],
+        responses=EXPORT_RESPONSES
+    )
+    @action(detail=False, methods=['get'], url_path='export')
+    def export_all(self, request):
+        """Strumieniowy eksport wszystkich list zakupów użytkownika."""
+        return stream_export_response(
+            request,
+            exports.shopping_list_items_for_export(user=request.user),
+            exports.SHOPPING_LIST_ITEM_COLUMNS,
+            'listy-zakupow'
+        )
 
 
 @extend_schema_view(
-    list=extend_schema(tags=['shopping-lists'], description='Lista pozycji zakupów'),
-    retrieve=extend_schema(tags=['shopping-lists'], description='Szczegóły pozycji'),
+    list=extend_schema(
+        tags=['shopping-lists'], description='Lista pozycji zakupów',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
+    retrieve=extend_schema(
+        tags=['shopping-lists'], description='Szczegóły pozycji',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
     update=extend_schema(tags=['shopping-lists'], description='Zaktualizuj pozycję'),
     partial_update=extend_schema(tags=['shopping-lists'], description='Zaktualizuj pozycję (częściowo)'),
 )
-class ShoppingListItemViewSet(viewsets.ModelViewSet):
+class ShoppingListItemViewSet(SparseFieldsQuerysetMixin, viewsets.ModelViewSet):
     """Zarządzanie pozycjami listy zakupów."""
     serializer_class = ShoppingListItemSerializer
     permission_classes = [IsAuthenticated, IsShoppingListOwner]
+    query_budget = {'list': 3, 'retrieve': 3}
     http_method_names = ['get', 'patch', 'post', 'head', 'options']  # GET, PATCH i POST (dla akcji check)
     
     def get_queryset(self):
@@ -612,7 +1276,7 @@ class ShoppingListItemViewSet(viewsets.ModelViewSet):
         return ShoppingListItem.objects.filter(
             shopping_list_id=shopping_list_id,
             is_active=True
-        ).select_related('unit', 'shopping_list')
+        ).select_related('unit', 'shopping_list').order_by(*ShoppingListItem.DISPLAY_ORDERING)
     
     @extend_schema(
         tags=['shopping-lists'],
@@ -629,3 +1293,64 @@ class ShoppingListItemViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(item)
         return Response(serializer.data)
+    
+    @extend_schema(
+        tags=['shopping-lists'],
+        description=(
+            'Zbiorczo zaznacz/odznacz pozycje listy. Uprawnienia sprawdzane są raz '
+            'dla listy; zwracane są tylko pozycje, których stan się zmienił.'
+        ),
+        operation_id='shopping_lists_items_bulk_check',
+        request=ShoppingListItemBulkCheckSerializer,
+        responses={200: ShoppingListItemSerializer(many=True)}
+    )
+    def bulk_check(self, request, shopping_list_id=None):
+        """Ustaw is_checked dla wielu pozycji jednym zapytaniem."""
+        input_serializer = ShoppingListItemBulkCheckSerializer(data=request.data)
+        input_serializer.is_valid(raise_exception=True)
+        
+        shopping_list = get_object_or_404(ShoppingList, id=shopping_list_id)
+        self.check_object_permissions(request, shopping_list)
+        
+        states = {
+            entry['id']: entry['is_checked']
+            for entry in input_serializer.validated_data['items']
+        }
+        
+        try:
+            changed = services.set_items_checked(shopping_list, states)
+        except ValueError as e:
+            raise drf_serializers.ValidationError({'items': [str(e)]})
+        
+        serializer = self.get_serializer(changed, many=True)
+        return Response(serializer.data)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        tags=['jobs'], description='Lista zadań w tle użytkownika',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
+    retrieve=extend_schema(
+        tags=['jobs'], description='Status zadania w tle',
+        parameters=SPARSE_FIELDS_PARAMETERS
+    ),
+)
+class JobViewSet(SparseFieldsQuerysetMixin, viewsets.ReadOnlyModelViewSet):
+    """Podgląd statusu zadań w tle (polling po odpowiedzi 202)."""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = {'list': 3, 'retrieve': 2}
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['created_at', 'status']
+    ordering = ['-created_at']
+    
+    def get_queryset(self):
+        """Zwróć zadania zlecone przez użytkownika."""
+        queryset = Job.objects.filter(created_by=self.request.user)
+        
+        status_param = self.request.query_params.get('status')
+        if status_param:
+            queryset = queryset.filter(status=status_param.upper())
+        
+        return queryset